@@ -0,0 +1,124 @@
+"""Benchmark the throughput of the document coercer, in documents per second.
+
+Documents holding a value for every property of a model (see
+benchmarks.synthetic.build_documents) are coerced in batches by the coercer compiled from
+the model, and by a coercer looking up the mapping of every field of every document, as
+a baseline.
+
+Usage:
+    python -m benchmarks.bench_coercion [--model INDEX/DOC_TYPE ...] [--documents N]
+        [--batch-size N] [--output PATH]
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import gdcmodels
+from benchmarks import synthetic
+from gdcmodels import coercion
+
+
+def _coerce_walking(value: Any, property: Dict[str, Any]) -> Any:
+    """Coerce a value by looking up its mapping, as a baseline."""
+    if isinstance(value, list):
+        return [_coerce_walking(v, property) for v in value]
+    if "properties" in property:
+        properties = property["properties"]
+        return {
+            n: _coerce_walking(v, properties[n]) if n in properties else v
+            for n, v in value.items()
+        }
+
+    convert = {"long": coercion.to_integer, "double": coercion.to_float}.get(
+        property.get("type", ""), coercion.to_string
+    )
+
+    return convert(value)
+
+
+def measure(
+    mapping: Dict[str, Any], settings: Dict[str, Any], documents: int, batch_size: int
+) -> Dict[str, float]:
+    """Measure the throughput of coercing documents of a mapping.
+
+    Args:
+        mapping: The mapping of the documents.
+        settings: The settings of the index.
+        documents: The number of documents to coerce.
+        batch_size: The number of documents per batch.
+
+    Returns:
+        The documents per second of the compiled and the baseline coercer, along with
+        the time it took to compile the coercer.
+    """
+    start = time.perf_counter()
+    coercer = coercion.Coercer(mapping, settings)
+    compile_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in coercer.coerce_batches(synthetic.build_documents(mapping, documents), batch_size):
+        pass
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for document in synthetic.build_documents(mapping, documents):
+        _coerce_walking(document, mapping)
+    walking = time.perf_counter() - start
+
+    # The time spent building the documents is not part of the coercion
+    start = time.perf_counter()
+    for _ in synthetic.build_documents(mapping, documents):
+        pass
+    building = time.perf_counter() - start
+
+    return {
+        "compile_seconds": compile_seconds,
+        "compiled": documents / max(compiled - building, 1e-9),
+        "walking": documents / max(walking - building, 1e-9),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--model",
+        nargs="+",
+        default=["case_centric/case_centric", "gdc_from_graph/case", "synthetic"],
+        help="the models to coerce the documents of, 'synthetic' for a synthetic model",
+    )
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--output", help="write the results as JSON to PATH")
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, Any]] = []
+    print(
+        f"{'model':<32} {'compile (ms)':>14} {'compiled (docs/s)':>18} {'walking (docs/s)':>18}"
+    )
+
+    for name in args.model:
+        if name == "synthetic":
+            mapping, _, _ = synthetic.build_model(synthetic.Shape(fields=500))
+            settings: Dict[str, Any] = {}
+        else:
+            index_name, doc_type = name.split("/")
+            model = gdcmodels.get_es_models()[index_name][doc_type]
+            mapping, settings = model.mappings, model.settings
+
+        result = measure(mapping, settings, args.documents, args.batch_size)
+        results.append({"model": name, **result})
+
+        print(
+            f"{name:<32} {result['compile_seconds'] * 1e3:>14.2f}"
+            f" {result['compiled']:>18.0f} {result['walking']:>18.0f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
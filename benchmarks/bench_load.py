@@ -0,0 +1,70 @@
+"""Benchmark the serial and parallel loading of the real esmodels tree.
+
+The on-disk cache and the compiled models (of wheel installs) are disabled so every run
+parses the YAML models.
+
+Usage:
+    python -m benchmarks.bench_load [--repeat N] [--workers N ...]
+"""
+
+import argparse
+import contextlib
+import os
+import statistics
+import time
+from typing import Iterator, Optional, Sequence
+
+import gdcmodels
+from gdcmodels import extraction
+
+
+@contextlib.contextmanager
+def _yaml_models() -> Iterator[None]:
+    """Load the models from the YAML files, even if the compiled models are installed."""
+    import_compiled = extraction._import_compiled
+    extraction._import_compiled = lambda: None
+
+    try:
+        yield
+    finally:
+        extraction._import_compiled = import_compiled
+
+
+def _load(workers: Optional[int]) -> None:
+    models = gdcmodels.get_es_models(cache=False, workers=workers)
+
+    # Access every model so the serial (lazy) path does the same work as the parallel one
+    for index in models.values():
+        for model in index.values():
+            _ = model.mappings
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per configuration")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[2, 4, os.cpu_count() or 1],
+        help="the worker counts to benchmark",
+    )
+    args = parser.parse_args(argv)
+
+    print(f"{'workers':>8} {'min (s)':>10} {'median (s)':>11}")
+
+    with _yaml_models():
+        for workers in (None, *sorted(set(args.workers))):
+            timings = []
+
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                _load(workers)
+                timings.append(time.perf_counter() - start)
+
+            label = workers or "serial"
+            print(f"{label:>8} {min(timings):>10.3f} {statistics.median(timings):>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Benchmark how the load, lookup and sync stages scale with the size of the models.
+
+Synthetic models (see benchmarks.synthetic) are generated by sweeping one parameter of
+their shape at a time, the others being kept at their defaults. For every model each
+stage is timed:
+
+    load: parsing the mapping and applying its vestigial properties
+    walk: mapper._walk_mapping over the whole mapping
+    normalize: DefaultNormalizerSynchronizer._build_normalized_tree
+    apply_defaults: sync.common.apply_defaults of the normalized tree
+    diff: the diff of the vestigial mapping against the base one, as done by
+        sync.cli.compute_delta
+
+For the field count sweep, the slope of log(time) against log(fields) of each stage is
+reported as well: ~1 means the stage scales linearly with the number of fields.
+
+Usage:
+    python -m benchmarks.bench_scaling [--repeat N] [--fields N ...] [--depth N ...]
+        [--nested-ratio R ...] [--vestigial N ...] [--output PATH]
+"""
+
+import argparse
+import json
+import math
+import pathlib
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from benchmarks import synthetic
+from gdcmodels import extraction, mapper, mapping_diff
+from gdcmodels.sync import common
+
+STAGES = ("load", "walk", "normalize", "apply_defaults", "diff")
+
+
+def _median(func: Callable[[], Any], repeat: int) -> float:
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings)
+
+
+def measure(shape: synthetic.Shape, repeat: int) -> Dict[str, float]:
+    """Time every stage on a synthetic model of the given shape.
+
+    Args:
+        shape: The shape of the model.
+        repeat: The number of runs of each stage, the median of which is reported.
+
+    Returns:
+        The median seconds of each stage.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        synthetic.generate(pathlib.Path(tmp_dir), shape)
+        (detail,) = extraction._extract_details(pathlib.Path(tmp_dir))
+
+        base = extraction._extract_mapping(detail, vestigial_included=False)
+        full = extraction._extract_mapping(detail, vestigial_included=True)
+
+        timings = {
+            "load": _median(lambda: extraction._extract_mapping(detail, True), repeat),
+        }
+
+    normalizer = common.DefaultNormalizerSynchronizer()
+    tree = normalizer._build_normalized_tree(full)
+
+    timings["walk"] = _median(lambda: list(mapper._walk_mapping(full)), repeat)
+    timings["normalize"] = _median(lambda: normalizer._build_normalized_tree(full), repeat)
+    timings["apply_defaults"] = _median(lambda: common.apply_defaults(full, tree), repeat)
+    timings["diff"] = _median(lambda: mapping_diff.diff_mappings(full, base), repeat)
+
+    return timings
+
+
+def _slope(xs: Sequence[float], ys: Sequence[float]) -> float:
+    """The least squares slope of log(ys) against log(xs)."""
+    log_xs, log_ys = [math.log(x) for x in xs], [math.log(y) for y in ys]
+    mean_x, mean_y = statistics.mean(log_xs), statistics.mean(log_ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(log_xs, log_ys))
+
+    return covariance / sum((x - mean_x) ** 2 for x in log_xs)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    defaults = synthetic.Shape()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage")
+    parser.add_argument("--fields", type=int, nargs="+", default=[500, 2000, 8000, 32000])
+    parser.add_argument("--depth", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--nested-ratio", type=float, nargs="+", default=[0.0, 0.5, 1.0])
+    parser.add_argument("--vestigial", type=int, nargs="+", default=[0, 500, 2000])
+    parser.add_argument("--output", help="write the results as JSON to PATH")
+    args = parser.parse_args(argv)
+
+    sweeps = {
+        "fields": args.fields,
+        "depth": args.depth,
+        "nested_ratio": args.nested_ratio,
+        "vestigial": args.vestigial,
+    }
+    results: Dict[str, List[Dict[str, Any]]] = {}
+
+    for parameter, values in sweeps.items():
+        print(f"\n{parameter:>12}" + "".join(f"{s + ' (ms)':>20}" for s in STAGES))
+        rows = results[parameter] = []
+
+        for value in values:
+            shape = defaults._replace(**{parameter: value})
+            timings = measure(shape, args.repeat)
+            rows.append({"shape": shape._asdict(), "seconds": timings})
+
+            print(f"{value:>12}" + "".join(f"{timings[s] * 1e3:>20.2f}" for s in STAGES))
+
+    if len(args.fields) > 1:
+        fields = [r["shape"]["fields"] for r in results["fields"]]
+        slopes = {s: _slope(fields, [r["seconds"][s] for r in results["fields"]]) for s in STAGES}
+
+        print(f"\n{'slope':>12}" + "".join(f"{slopes[s]:>20.2f}" for s in STAGES))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
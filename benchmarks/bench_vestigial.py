@@ -0,0 +1,85 @@
+"""Benchmark applying vestigial properties with deepdiff.Delta versus vestigial overlays.
+
+A vestigial file is generated from the real gdc_from_graph/case mapping by removing
+every other top level property, as the sync would write it, and then applied back onto
+the remaining mapping with both implementations.
+
+Usage:
+    python -m benchmarks.bench_vestigial [--repeat N]
+"""
+
+import argparse
+import copy
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import deepdiff
+
+from gdcmodels import esmodels, extraction_utils, vestigial
+
+if sys.version_info < (3, 9):
+    import importlib_resources as resources
+else:
+    from importlib import resources
+
+
+def _time(func: Callable[[], Any], repeat: int) -> List[float]:
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="runs per implementation")
+    args = parser.parse_args(argv)
+
+    mapping_file = resources.files(esmodels) / "gdc_from_graph/case/mapping.yaml"
+    content = mapping_file.read_bytes()
+    full: Dict[str, Any] = extraction_utils.load_yaml(content)
+
+    base = copy.deepcopy(full)
+    for name in list(base["properties"])[::2]:
+        del base["properties"][name]
+
+    # The same content the sync writes, see mapping_diff.MappingDiff.vestigial_delta
+    added = deepdiff.Delta(deepdiff.DeepDiff(base, full)).diff[vestigial.ITEM_ADDED]
+    delta = extraction_utils.dump_yaml({vestigial.ITEM_ADDED: added}, None)  # type: ignore
+
+    def load_base() -> Dict[str, Any]:
+        mapping = extraction_utils.load_yaml(content)
+        for name in list(mapping["properties"])[::2]:
+            del mapping["properties"][name]
+        return mapping
+
+    def with_deepdiff() -> Dict[str, Any]:
+        mapping = load_base()
+        mapping += deepdiff.Delta(delta, deserializer=extraction_utils.load_yaml)
+        return mapping
+
+    def with_overlay() -> Dict[str, Any]:
+        return vestigial.apply_overlay(load_base(), vestigial.load_overlay(delta))
+
+    assert with_deepdiff() == with_overlay() == full
+
+    print(f"vestigial items: {len(added)}, size: {len(delta)} bytes")
+    print(f"{'implementation':>16} {'min (ms)':>10} {'median (ms)':>12}")
+
+    for name, func in (
+        ("no vestigial", load_base),
+        ("deepdiff.Delta", with_deepdiff),
+        ("overlay", with_overlay),
+    ):
+        timings = _time(func, args.repeat)
+        print(f"{name:>16} {min(timings) * 1e3:>10.2f} {statistics.median(timings) * 1e3:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
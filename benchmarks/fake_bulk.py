@@ -0,0 +1,166 @@
+"""A local stand-in for the bulk endpoint of elasticsearch.
+
+The server accepts `_bulk` requests over HTTP, as a real cluster would, but only counts
+the documents it is sent (and answers whether indices exist). It can reject requests (429) and documents
+(es_rejected_execution_exception) to exercise the retries of gdcmodels.bulk:
+
+    with fake_bulk.FakeBulkServer(reject_requests=2) as server:
+        es = elasticsearch.Elasticsearch(hosts=[server.host])
+        bulk.load_ndjson(es, lines, "index")
+
+    server.documents  # the documents indexed, by index
+"""
+
+import collections
+import http.server
+import json
+import threading
+import time
+from typing import Any, Counter, Dict, Iterable, List, Optional
+
+# The answer to the product check of the elasticsearch client.
+_INFO = {
+    "name": "fake",
+    "cluster_name": "fake",
+    "version": {"number": "7.17.0", "build_flavor": "default"},
+    "tagline": "You Know, for Search",
+}
+
+# The error of the requests and documents rejected by elasticsearch.
+_REJECTED = {"type": "es_rejected_execution_exception"}
+
+
+class FakeBulkServer:
+    """A threaded HTTP server answering bulk requests.
+
+    Attributes:
+        documents: The number of documents indexed, by index.
+        requests: The number of bulk requests received, rejected ones included.
+        rejected: The number of documents rejected, whole requests included.
+    """
+
+    def __init__(
+        self,
+        reject_requests: int = 0,
+        reject_documents: int = 0,
+        fail_field: Optional[str] = None,
+        delay: float = 0.0,
+        indices: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Create the server.
+
+        Args:
+            reject_requests: The number of bulk requests to reject with a 429 first.
+            reject_documents: The number of documents to reject first, once the requests
+                are no longer rejected.
+            fail_field: If given, the documents holding this field fail to be indexed with
+                a mapper_parsing_exception.
+            delay: The seconds each bulk request takes.
+            indices: The names of the indices which exist, any of them by default.
+        """
+        self.documents: Counter[str] = collections.Counter()
+        self.requests = 0
+        self.rejected = 0
+        self._reject_requests = reject_requests
+        self._reject_documents = reject_documents
+        self._fail_field = fail_field
+        self._delay = delay
+        self._indices = None if indices is None else frozenset(indices)
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def host(self) -> Dict[str, Any]:
+        """The host of the server, as given to the elasticsearch client."""
+        return {"host": "127.0.0.1", "port": self._server.server_address[1]}
+
+    def __enter__(self) -> "FakeBulkServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _bulk(self, index: str, body: bytes) -> Dict[str, Any]:
+        lines = body.splitlines()
+        time.sleep(self._delay)
+
+        with self._lock:
+            self.requests += 1
+
+            if self._reject_requests:
+                self._reject_requests -= 1
+                self.rejected += len(lines) // 2
+                return {"status": 429, "error": _REJECTED}
+
+        items: List[Dict[str, Any]] = []
+
+        for source in lines[1::2]:
+            with self._lock:
+                reject = self._reject_documents > 0
+                if reject:
+                    self._reject_documents -= 1
+                    self.rejected += 1
+
+            if reject:
+                error: Optional[Dict[str, Any]] = _REJECTED
+                status = 429
+            elif self._fail_field and self._fail_field in json.loads(source):
+                error, status = {"type": "mapper_parsing_exception"}, 400
+            else:
+                error, status = None, 201
+
+            items.append({"index": {"_index": index, "status": status, "error": error}})
+
+        with self._lock:
+            self.documents[index] += sum(1 for i in items if i["index"]["error"] is None)
+
+        for item in items:
+            if item["index"]["error"] is None:
+                del item["index"]["error"]
+
+        return {"took": 1, "errors": any("error" in i["index"] for i in items), "items": items}
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, status: int, body: Dict[str, Any]) -> None:
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.send_header("X-Elastic-Product", "Elasticsearch")
+                self.end_headers()
+
+                if self.command != "HEAD":
+                    self.wfile.write(content)
+
+            def do_GET(self) -> None:
+                self._respond(200, _INFO)
+
+            def do_HEAD(self) -> None:
+                index = self.path.split("?")[0].strip("/")
+                exists = server._indices is None or index in server._indices
+                self._respond(200 if exists else 404, {})
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                path = self.path.split("?")[0].strip("/").split("/")
+
+                if path[-1] != "_bulk":
+                    self._respond(404, {"error": "not found", "status": 404})
+                    return
+
+                response = server._bulk(path[0] if len(path) == 2 else "", body)
+                self._respond(response.get("status", 200), response)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
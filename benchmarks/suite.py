@@ -0,0 +1,383 @@
+"""Offline benchmarks of the load, lookup and sync hot paths.
+
+Each benchmark is run once to warm up and then timed over --repeat runs. The results are
+written as JSON, along with the commit they were run against, so that runs can be
+compared across commits:
+
+    python -m benchmarks.suite --output before.json
+    git checkout <other commit>
+    python -m benchmarks.suite --output after.json --compare before.json
+
+Benchmarks which need the optional sync dependencies (gdcdictionary, gdcdatamodel2) are
+reported as skipped when those are not installed.
+
+Usage:
+    python -m benchmarks.suite [--repeat N] [--filter REGEX] [--output PATH]
+        [--compare PATH]
+"""
+
+import argparse
+import contextlib
+import copy
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence
+
+import gdcmodels
+from gdcmodels import extraction
+
+Setup = Callable[[], ContextManager[Callable[[], Any]]]
+
+# The benchmarks by name, each set up by a context manager yielding the function to time.
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def _benchmark(name: str) -> Callable[[Callable[[], Iterator[Callable[[], Any]]]], Setup]:
+    def register(setup: Callable[[], Iterator[Callable[[], Any]]]) -> Setup:
+        BENCHMARKS[name] = contextlib.contextmanager(setup)
+        return BENCHMARKS[name]
+
+    return register
+
+
+def _load_all(**kwargs: Any) -> None:
+    models = gdcmodels.get_es_models(**kwargs)
+
+    for index in models.values():
+        for model in index.values():
+            _ = model.mappings, model.settings
+
+
+def _base_mapping(index_name: str, doc_type: str) -> Dict[str, Any]:
+    model = gdcmodels.get_es_models(vestigial_included=False)[index_name][doc_type]
+    mapping = copy.deepcopy(model.mappings)
+    mapping.pop("_meta", None)
+
+    return mapping
+
+
+@_benchmark("load.vestigial")
+def load_vestigial() -> Iterator[Callable[[], Any]]:
+    yield lambda: _load_all(vestigial_included=True, cache=False)
+
+
+@_benchmark("load.base")
+def load_base() -> Iterator[Callable[[], Any]]:
+    yield lambda: _load_all(vestigial_included=False, cache=False)
+
+
+@_benchmark("load.cached")
+def load_cached() -> Iterator[Callable[[], Any]]:
+    previous = os.environ.get(extraction.CACHE_DIR_ENV)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ[extraction.CACHE_DIR_ENV] = cache_dir
+
+        try:
+            # The warm up run populates the cache
+            yield lambda: _load_all(vestigial_included=True, cache=True)
+        finally:
+            if previous is None:
+                del os.environ[extraction.CACHE_DIR_ENV]
+            else:
+                os.environ[extraction.CACHE_DIR_ENV] = previous
+
+
+@_benchmark("select_mapping.observation")
+def select_observation() -> Iterator[Callable[[], Any]]:
+    model = gdcmodels.get_es_models()["ssm_occurrence_centric"]["ssm_occurrence_centric"]
+
+    yield lambda: model.select_mapping("observation")
+
+
+@_benchmark("select_mapping.selector")
+def select_with_selector() -> Iterator[Callable[[], Any]]:
+    model = gdcmodels.get_es_models()["gdc_from_graph"]["file"]
+
+    yield lambda: model.select_mapping("project", selector="tissue_source_site")
+
+
+# The doc_types resolved by the viz serializers, each from a freshly loaded model
+_VIZ_SELECTORS = {
+    "ssm": None,
+    "observation": None,
+    "gene": "consequence",
+    "consequence": None,
+    "transcript": None,
+    "case": None,
+}
+
+
+def _fresh_model(index_name: str, doc_type: str) -> Callable[[], Any]:
+    model = gdcmodels.get_es_models()[index_name][doc_type]
+
+    return lambda: type(model)(index_name, doc_type, model.settings, model.mappings)
+
+
+@_benchmark("select_mappings.batch")
+def select_batch() -> Iterator[Callable[[], Any]]:
+    fresh_model = _fresh_model("ssm_occurrence_centric", "ssm_occurrence_centric")
+
+    yield lambda: fresh_model().select_mappings(_VIZ_SELECTORS)
+
+
+@_benchmark("select_mappings.repeated")
+def select_repeated() -> Iterator[Callable[[], Any]]:
+    fresh_model = _fresh_model("ssm_occurrence_centric", "ssm_occurrence_centric")
+
+    def select() -> None:
+        model = fresh_model()
+
+        for doc_type, selector in _VIZ_SELECTORS.items():
+            model.select_mapping(doc_type, selector)
+
+    yield select
+
+
+@_benchmark("fields.filter")
+def filter_fields() -> Iterator[Callable[[], Any]]:
+    fields = gdcmodels.get_es_models()["case_centric"]["case_centric"].fields()
+
+    yield lambda: fields.filter("files.*", type="keyword")
+
+
+@_benchmark("fields.search")
+def search_fields() -> Iterator[Callable[[], Any]]:
+    model = gdcmodels.get_es_models()["gdc_from_graph"]["case"]
+
+    yield lambda: model.search_fields("diag", limit=20)
+
+
+@_benchmark("validate.documents")
+def validate_documents() -> Iterator[Callable[[], Any]]:
+    from gdcmodels import validation
+
+    validator = validation.compile_validator(
+        gdcmodels.get_es_models()["case_centric"]["case_centric"].mappings
+    )
+    document = {
+        "case_id": "case",
+        "primary_site": "Lung",
+        "diagnoses": [{"age_at_diagnosis": "1000", "treatments": [{"treatment_type": "x"}]}],
+        "files": [{"file_id": f"file-{i}", "file_size": i} for i in range(20)],
+    }
+
+    yield lambda: [validator.validate(document) for _ in range(1000)]
+
+
+@_benchmark("coerce.documents")
+def coerce_documents() -> Iterator[Callable[[], Any]]:
+    from benchmarks import synthetic
+    from gdcmodels import coercion
+
+    model = gdcmodels.get_es_models()["gdc_from_graph"]["case"]
+    coercer = coercion.compile_coercer(model)
+    documents = list(synthetic.build_documents(model.mappings, 20, items=1))
+
+    yield lambda: list(coercer.coerce_batches(documents, batch_size=10))
+
+
+@_benchmark("columnar.flatten")
+def flatten_columns() -> Iterator[Callable[[], Any]]:
+    from benchmarks import synthetic
+    from gdcmodels import columnar
+
+    model = gdcmodels.get_es_models()["ssm_occurrence_centric"]["ssm_occurrence_centric"]
+    flattener = columnar.Flattener(columnar.derive_schema(model))
+    documents = list(synthetic.build_documents(model.mappings, 100, items=1))
+
+    yield lambda: list(flattener.flatten(documents, batch_size=50))
+
+
+@_benchmark("diff.mappings")
+def diff_mappings() -> Iterator[Callable[[], Any]]:
+    from gdcmodels import mapping_diff
+
+    new_mapping = _base_mapping("case_centric", "case_centric")
+    old_mapping = copy.deepcopy(
+        gdcmodels.get_es_models()["case_centric"]["case_centric"].mappings
+    )
+    old_mapping.pop("_meta", None)
+
+    yield lambda: mapping_diff.diff_mappings(old_mapping, new_mapping)
+
+
+@_benchmark("bulk.load")
+def bulk_load() -> Iterator[Callable[[], Any]]:
+    import elasticsearch
+
+    from benchmarks import fake_bulk
+    from gdcmodels import bulk
+
+    lines = [
+        json.dumps({"case_id": f"case-{i}", "primary_site": "Lung"}).encode() for i in range(5000)
+    ]
+
+    with fake_bulk.FakeBulkServer() as server:
+        es = elasticsearch.Elasticsearch(hosts=[server.host])
+
+        yield lambda: bulk.load_ndjson(es, lines, "index", max_documents=500)
+
+
+@_benchmark("drift.detect")
+def detect_drift() -> Iterator[Callable[[], Any]]:
+    from gdcmodels import drift, registry
+
+    class Indices:
+        def __init__(self, live: Dict[str, Any]) -> None:
+            self.live = live
+
+        def get(self, index: str, flat_settings: bool) -> Dict[str, Any]:
+            return self.live
+
+    class Client:
+        indices = Indices(
+            {
+                name: {
+                    "mappings": copy.deepcopy(registry.thaw(model.mappings)),
+                    "settings": drift._flatten_settings(model.settings),
+                }
+                for name, model in drift.expected_indices("gdc_r53").items()
+            }
+        )
+
+    yield lambda: drift.detect_drift(Client(), "gdc_r53")  # type: ignore
+
+
+@_benchmark("sync.apply_defaults")
+def apply_defaults() -> Iterator[Callable[[], Any]]:
+    from gdcmodels.sync import common
+
+    mapping = _base_mapping("case_centric", "case_centric")
+    defaults = common.DefaultMappingsSynchronizer().default_mappings
+
+    yield lambda: common.apply_defaults(mapping, defaults)
+
+
+@_benchmark("sync.normalizer")
+def normalizer() -> Iterator[Callable[[], Any]]:
+    from gdcmodels.sync import common
+
+    mapping = _base_mapping("case_centric", "case_centric")
+    synchronizer = common.DefaultNormalizerSynchronizer()
+
+    yield lambda: synchronizer.sync(mapping, {})
+
+
+@_benchmark("sync.delta")
+def delta() -> Iterator[Callable[[], Any]]:
+    # NOTE: Importing the sync cli requires the optional sync dependencies
+    from gdcmodels.sync import cli
+
+    # The sync diffs the synced mapping against the existing one, including its
+    # vestigial properties, which are what the delta then re-adds
+    new_mapping = _base_mapping("gdc_from_graph", "case")
+    old_mapping = copy.deepcopy(gdcmodels.get_es_models()["gdc_from_graph"]["case"].mappings)
+    old_mapping.pop("_meta", None)
+
+    yield lambda: cli.compute_delta(new_mapping, old_mapping)
+
+
+def run(setup: Setup, repeat: int) -> Dict[str, Any]:
+    """Run a benchmark.
+
+    Args:
+        setup: The setup of the benchmark.
+        repeat: The number of timed runs.
+
+    Returns:
+        The statistics of the timings, in seconds, or the reason it was skipped.
+    """
+    try:
+        context = setup()
+        func = context.__enter__()
+    except ImportError as e:
+        return {"skipped": str(e)}
+
+    try:
+        func()
+        timings: List[float] = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        context.__exit__(None, None, None)
+
+    return {
+        "runs": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if repeat > 1 else 0.0,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per benchmark")
+    parser.add_argument("--filter", default="", help="only run benchmarks matching REGEX")
+    parser.add_argument("--output", help="write the results as JSON to PATH")
+    parser.add_argument("--compare", help="compare the medians with the results in PATH")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'benchmark':<28} {'min (ms)':>10} {'median (ms)':>12} {'vs baseline':>12}")
+
+    for name, setup in BENCHMARKS.items():
+        if not re.search(args.filter, name):
+            continue
+
+        result = results[name] = run(setup, args.repeat)
+
+        if "skipped" in result:
+            print(f"{name:<28} skipped: {result['skipped']}")
+            continue
+
+        ratio = ""
+        if "median" in baseline.get(name, {}):
+            ratio = f"{result['median'] / baseline[name]['median']:.2f}x"
+
+        print(
+            f"{name:<28} {result['min'] * 1e3:>10.2f} {result['median'] * 1e3:>12.2f}"
+            f" {ratio:>12}"
+        )
+
+    if args.output:
+        report = {
+            "commit": _commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Generate synthetic models of an arbitrary size for scaling benchmarks.
+
+The generated index uses the same layout as the esmodels (and tests.utils.load_model):
+
+    <index>/
+        <doc_type>/
+            mapping.yaml
+            vestigial.yaml
+        settings.yaml
+        descriptions.yaml
+
+Usage:
+    python -m benchmarks.synthetic TARGET_DIR [--fields N] [--depth N]
+        [--nested-ratio R] [--vestigial N] [--seed N]
+"""
+
+import argparse
+import pathlib
+import random
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from gdcmodels import extraction_utils, vestigial
+
+# The leaf property types, weighted towards keywords as in the real models.
+_LEAF_TYPES = ("keyword",) * 6 + ("long", "double", "boolean", "date")
+
+
+class Shape(NamedTuple):
+    """The shape of a synthetic model.
+
+    Attributes:
+        fields: The number of properties within the mapping, at every level.
+        depth: The maximum nesting depth of the object properties.
+        nested_ratio: The fraction of the object properties which are of the nested type.
+        vestigial: The number of properties which are only added by the vestigial file.
+    """
+
+    fields: int = 2000
+    depth: int = 4
+    nested_ratio: float = 0.2
+    vestigial: int = 100
+
+
+def _build_properties(
+    rng: random.Random, fields: int, depth: int, nested_ratio: float
+) -> Dict[str, Any]:
+    """Build the properties of an object containing the given number of properties.
+
+    Args:
+        rng: The source of randomness.
+        fields: The number of properties within the object, at every level.
+        depth: The number of levels of objects which may still be nested.
+        nested_ratio: The fraction of object properties which are of the nested type.
+
+    Returns:
+        The properties of the object.
+    """
+    if depth == 0 or fields < 4:
+        return {f"field_{i}": {"type": rng.choice(_LEAF_TYPES)} for i in range(fields)}
+
+    # Spread the properties so that every level has roughly the same fan out
+    width = max(2, round(fields ** (1 / (depth + 1))))
+    objects = max(1, width // 2)
+    leaves = width - objects
+    remaining = fields - width
+    properties: Dict[str, Any] = {
+        f"field_{i}": {"type": rng.choice(_LEAF_TYPES)} for i in range(leaves)
+    }
+
+    for i in range(objects):
+        share = remaining // objects + (1 if i < remaining % objects else 0)
+        child: Dict[str, Any] = {}
+
+        if rng.random() < nested_ratio:
+            child["type"] = "nested"
+
+        child["properties"] = _build_properties(rng, share, depth - 1, nested_ratio)
+        properties[f"object_{i}"] = child
+
+    return properties
+
+
+def _object_paths(
+    properties: Dict[str, Any], path: Tuple[str, ...] = ()
+) -> List[Tuple[str, ...]]:
+    """List the key paths of the properties of every object, including the root."""
+    paths = [(*path, "properties")]
+
+    for name, property in properties.items():
+        if "properties" in property:
+            paths.extend(_object_paths(property["properties"], (*path, "properties", name)))
+
+    return paths
+
+
+def _field_names(properties: Dict[str, Any], prefix: str) -> List[str]:
+    """List the dotted names of every leaf property."""
+    names = []
+
+    for name, property in properties.items():
+        if "properties" in property:
+            names.extend(_field_names(property["properties"], f"{prefix}.{name}"))
+        else:
+            names.append(f"{prefix}.{name}")
+
+    return names
+
+
+def build_model(
+    shape: Shape, seed: int = 0
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, str]]:
+    """Build a synthetic model.
+
+    Args:
+        shape: The shape of the model.
+        seed: The seed of the randomness, the same seed always builds the same model.
+
+    Returns:
+        The mapping (without the vestigial properties), the vestigial delta and the
+        descriptions of the model.
+    """
+    rng = random.Random(seed)
+    mapping = {
+        "dynamic": "strict",
+        "properties": _build_properties(rng, shape.fields, shape.depth, shape.nested_ratio),
+    }
+
+    parents = _object_paths(mapping["properties"])
+    added = {
+        vestigial.format_path((*rng.choice(parents), f"vestigial_{i}")): {
+            "type": rng.choice(_LEAF_TYPES)
+        }
+        for i in range(shape.vestigial)
+    }
+    delta = {vestigial.ITEM_ADDED: added} if added else {}
+
+    descriptions = {
+        name: f"The description of {name}."
+        for name in _field_names(mapping["properties"], "root")
+    }
+
+    return mapping, delta, descriptions
+
+
+def _build_value(rng: random.Random, property: Dict[str, Any], items: int) -> Any:
+    """Build a value of a property, with scalars given as strings as often as not."""
+    if "properties" in property:
+        objects = [
+            {n: _build_value(rng, p, items) for n, p in property["properties"].items()}
+            for _ in range(items if property.get("type") == "nested" else 1)
+        ]
+        return objects if property.get("type") == "nested" else objects[0]
+
+    property_type = property.get("type")
+
+    if property_type == "long":
+        value: Any = rng.randrange(10**6)
+    elif property_type in ("integer", "short", "byte"):
+        value = rng.randrange(100)
+    elif property_type in ("double", "float", "half_float", "scaled_float"):
+        value = round(rng.uniform(0, 100), 3)
+    elif property_type == "boolean":
+        value = rng.random() < 0.5
+    elif property_type == "date":
+        return "2020-01-01"
+    else:
+        return f"Value {rng.randrange(100)}"
+
+    return str(value).lower() if rng.random() < 0.5 else value
+
+
+def build_documents(
+    mapping: Dict[str, Any], count: int, items: int = 2, seed: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """Build documents holding a value for every property of a mapping.
+
+    Numbers and booleans are given as strings half of the time, as they often are in the
+    documents produced for indexing.
+
+    Args:
+        mapping: The mapping of the documents, e.g. built by build_model.
+        count: The number of documents.
+        items: The number of objects within every nested property.
+        seed: The seed of the randomness, the same seed always builds the same documents.
+
+    Yields:
+        The documents.
+    """
+    rng = random.Random(seed)
+
+    for _ in range(count):
+        yield _build_value(rng, {"properties": mapping["properties"]}, items)
+
+
+def generate(
+    models: pathlib.Path,
+    shape: Shape,
+    index_name: str = "synthetic",
+    doc_type: str = "synthetic",
+    seed: int = 0,
+) -> pathlib.Path:
+    """Write a synthetic index into the given models directory.
+
+    Args:
+        models: The directory containing all models.
+        shape: The shape of the model.
+        index_name: The name of the index to create.
+        doc_type: The name of the doc_type within the index.
+        seed: The seed of the randomness, the same seed always builds the same model.
+
+    Returns:
+        The directory of the created index.
+    """
+    mapping, delta, descriptions = build_model(shape, seed)
+    index_dir = models / index_name
+    doc_type_dir = index_dir / doc_type
+    doc_type_dir.mkdir(parents=True, exist_ok=True)
+
+    files = {
+        doc_type_dir / "mapping.yaml": mapping,
+        doc_type_dir / "vestigial.yaml": delta,
+        index_dir / "settings.yaml": {"index.mapping.total_fields.limit": shape.fields * 2},
+        index_dir / "descriptions.yaml": descriptions,
+    }
+
+    for path, content in files.items():
+        with open(path, "w") as f:
+            extraction_utils.dump_yaml(content, f)
+
+    return index_dir
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    defaults = Shape()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("target", type=pathlib.Path, help="the models directory to write to")
+    parser.add_argument("--fields", type=int, default=defaults.fields)
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument("--nested-ratio", type=float, default=defaults.nested_ratio)
+    parser.add_argument("--vestigial", type=int, default=defaults.vestigial)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    shape = Shape(args.fields, args.depth, args.nested_ratio, args.vestigial)
+    print(generate(args.target, shape, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
+import logging
 import os
+import pathlib
 import re
+import sys
 
 from setuptools import setup
+from setuptools.command.build_py import build_py
 from setuptools_scm import Configuration
 from setuptools_scm._get_version_impl import parse_version
 
@@ -36,7 +40,35 @@ def get_version() -> str:
     return version.format_next_version(guess_next_version, fmt)
 
 
+class BuildPyCommand(build_py):
+    """Compile the YAML models into python modules alongside the built package.
+
+    The compiled models are skipped for editable installs (which load the YAML models
+    directly) or when GDCMODELS_SKIP_COMPILE is set.
+    """
+
+    def run(self) -> None:
+        super().run()
+
+        if getattr(self, "editable_mode", False) or os.getenv("GDCMODELS_SKIP_COMPILE"):
+            return
+
+        sys.path.insert(0, os.path.abspath("src"))
+
+        try:
+            from gdcmodels import compilation
+        except ImportError:
+            logging.warning("Unable to import gdcmodels, skipping the compilation of models")
+            return
+        finally:
+            sys.path.pop(0)
+
+        target = pathlib.Path(self.build_lib) / "gdcmodels" / "compiled"
+        compilation.compile_models(pathlib.Path("src/gdcmodels/esmodels"), target)
+
+
 setup(
+    cmdclass={"build_py": BuildPyCommand},
     setuptools_git_versioning={
         "enabled": True,
         "version_callback": get_version,
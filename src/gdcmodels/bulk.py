@@ -0,0 +1,311 @@
+"""Stream NDJSON documents into an index with parallel bulk requests.
+
+The documents are read one line at a time and grouped into chunks bounded both by their
+number of documents and by their size in bytes. Each chunk is sent as one `_bulk` request
+by a pool of worker threads, with at most a few chunks per worker in flight, so that the
+memory used stays flat however large the input is:
+
+    with open("cases.ndjson", "rb") as f:
+        report = bulk.load_ndjson(es, f, "gdc_r53_case_centric")
+
+    report.indexed, report.rate  # 1000000, 25000.0 (docs/s)
+
+Elasticsearch rejects requests (429 Too Many Requests) and documents
+(es_rejected_execution_exception) when its write queues are full. Those are retried with
+an exponential backoff, only the rejected documents of a chunk being sent again. Any
+other failure of a document is counted as an error of its type.
+"""
+
+import collections
+import concurrent.futures
+import json
+import time
+from typing import Any, Callable, Counter, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import elasticsearch
+
+from gdcmodels import coercion
+
+# The error of the documents rejected by elasticsearch when its write queue is full.
+REJECTED = "es_rejected_execution_exception"
+
+# The errors of the lines which cannot be sent, when they must be parsed: lines which are
+# not JSON objects, and documents without the id field.
+INVALID_JSON = "json"
+MISSING_ID = "missing_id"
+
+_ACTION = b'{"index":{}}\n'
+
+
+class LoadReport(NamedTuple):
+    """The result of loading a stream of documents.
+
+    Attributes:
+        documents: The number of documents read.
+        indexed: The number of documents indexed.
+        requests: The number of bulk requests sent, retries included.
+        retries: The number of chunks (or parts of chunks) sent again after being
+            rejected.
+        bytes: The size in bytes of the bulk requests, retries excluded.
+        seconds: The time the load took.
+        errors: The number of documents which failed per error type. Documents still
+            rejected once the retries are exhausted are counted as REJECTED, and the lines
+            which could not be parsed (or lacked an id) as INVALID_JSON (or MISSING_ID).
+    """
+
+    documents: int
+    indexed: int
+    requests: int
+    retries: int
+    bytes: int
+    seconds: float
+    errors: Counter[str]
+
+    @property
+    def failed(self) -> int:
+        return sum(self.errors.values())
+
+    @property
+    def rate(self) -> float:
+        """The number of documents indexed per second."""
+        return self.indexed / self.seconds if self.seconds else 0.0
+
+
+class _ChunkResult(NamedTuple):
+    indexed: int
+    requests: int
+    retries: int
+    errors: Counter[str]
+
+
+def _build_actions(
+    lines: Iterable[bytes],
+    id_field: Optional[str] = None,
+    coercer: Optional[coercion.Coercer] = None,
+    errors: Optional[Counter[str]] = None,
+) -> Iterator[bytes]:
+    """Build the action and source lines of the bulk request of every document.
+
+    The lines are passed through as is, unless they must be parsed to get the id of the
+    documents or to coerce them. The lines which cannot be parsed, or lack an id, are
+    skipped and counted within errors.
+    """
+    parse = id_field is not None or coercer is not None
+    errors = collections.Counter() if errors is None else errors
+
+    for line in lines:
+        line = line.strip()
+
+        if not line:
+            continue
+
+        if not parse:
+            yield _ACTION + line + b"\n"
+            continue
+
+        try:
+            document = json.loads(line)
+        except ValueError:
+            errors[INVALID_JSON] += 1
+            continue
+
+        if not isinstance(document, dict):
+            errors[INVALID_JSON] += 1
+            continue
+
+        if id_field and document.get(id_field) is None:
+            errors[MISSING_ID] += 1
+            continue
+
+        if coercer is not None:
+            document = coercer.coerce(document)
+            line = json.dumps(document, separators=(",", ":")).encode()
+
+        action = {"index": {"_id": document[id_field]}} if id_field else {"index": {}}
+
+        yield json.dumps(action, separators=(",", ":")).encode() + b"\n" + line + b"\n"
+
+
+def _chunk(actions: Iterable[bytes], max_documents: int, max_bytes: int) -> Iterator[List[bytes]]:
+    """Group the actions into chunks of at most max_documents and (unless a single action
+    is larger) max_bytes."""
+    chunk: List[bytes] = []
+    size = 0
+
+    for action in actions:
+        if chunk and (len(chunk) == max_documents or size + len(action) > max_bytes):
+            yield chunk
+            chunk = []
+            size = 0
+
+        chunk.append(action)
+        size += len(action)
+
+    if chunk:
+        yield chunk
+
+
+class BulkLoader:
+    """Sends chunks of documents to an index, retrying the rejected ones."""
+
+    __slots__ = ("_es", "_index", "_max_retries", "_initial_backoff", "_max_backoff", "_sleep")
+
+    def __init__(
+        self,
+        es: elasticsearch.Elasticsearch,
+        index: str,
+        max_retries: int = 8,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Create the loader.
+
+        Args:
+            es: The elasticsearch client.
+            index: The name of the index to load the documents into.
+            max_retries: The number of times rejected documents are sent again.
+            initial_backoff: The seconds waited before the first retry, doubled on every
+                retry.
+            max_backoff: The maximum number of seconds waited before any retry.
+            sleep: The function waiting between retries.
+        """
+        self._es = es
+        self._index = index
+        self._max_retries = max_retries
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._sleep = sleep
+
+    def send(self, chunk: List[bytes]) -> _ChunkResult:
+        """Send a chunk of actions, retrying the rejected ones.
+
+        Args:
+            chunk: The action and source lines of every document.
+
+        Returns:
+            The result of the chunk.
+
+        Raises:
+            elasticsearch.TransportError: If a request fails for any other reason than
+                being rejected.
+        """
+        pending = chunk
+        indexed = requests = retries = 0
+        errors: Counter[str] = collections.Counter()
+
+        for attempt in range(self._max_retries + 1):
+            if attempt:
+                retries += 1
+                self._sleep(min(self._max_backoff, self._initial_backoff * 2 ** (attempt - 1)))
+
+            requests += 1
+
+            try:
+                response = self._es.bulk(body=b"".join(pending), index=self._index)
+            except elasticsearch.TransportError as e:
+                if e.status_code == 429:
+                    continue
+                raise
+
+            if not response.get("errors"):
+                indexed += len(pending)
+                pending = []
+                break
+
+            rejected = []
+
+            for action, item in zip(pending, response["items"]):
+                ((_, result),) = item.items()
+                error = result.get("error")
+
+                if error is None:
+                    indexed += 1
+                elif result.get("status") == 429 or error.get("type") == REJECTED:
+                    rejected.append(action)
+                else:
+                    errors[error.get("type", "unknown")] += 1
+
+            pending = rejected
+
+            if not pending:
+                break
+
+        errors[REJECTED] += len(pending)
+
+        return _ChunkResult(indexed, requests, retries, +errors)
+
+
+def load_ndjson(
+    es: elasticsearch.Elasticsearch,
+    lines: Iterable[bytes],
+    index: str,
+    workers: int = 4,
+    max_documents: int = 1000,
+    max_bytes: int = 10 * 1024 * 1024,
+    id_field: Optional[str] = None,
+    coercer: Optional[coercion.Coercer] = None,
+    **kwargs: Any,
+) -> LoadReport:
+    """Load a stream of NDJSON documents into an index.
+
+    Args:
+        es: The elasticsearch client.
+        lines: The lines of the stream, one document per line. Blank lines are skipped.
+        index: The name of the index to load the documents into.
+        workers: The number of bulk requests sent concurrently.
+        max_documents: The maximum number of documents per bulk request.
+        max_bytes: The maximum size in bytes of a bulk request, unless it holds a single
+            larger document.
+        id_field: If given, the field of the documents holding their id. Otherwise, the
+            ids are generated by elasticsearch.
+        coercer: If given, the documents are coerced by it before being sent.
+        **kwargs: The retry options of BulkLoader.
+
+    Returns:
+        The report of the load.
+
+    Raises:
+        elasticsearch.TransportError: If a request fails for any other reason than being
+            rejected.
+    """
+    loader = BulkLoader(es, index, **kwargs)
+    documents = size = indexed = requests = retries = 0
+    errors: Counter[str] = collections.Counter()
+    skipped: Counter[str] = collections.Counter()
+    actions = _build_actions(lines, id_field, coercer, skipped)
+    start = time.perf_counter()
+
+    def merge(result: _ChunkResult) -> None:
+        nonlocal indexed, requests, retries
+        indexed += result.indexed
+        requests += result.requests
+        retries += result.retries
+        errors.update(result.errors)
+
+    with concurrent.futures.ThreadPoolExecutor(max(1, workers)) as executor:
+        in_flight: Dict[concurrent.futures.Future, None] = {}
+
+        for chunk in _chunk(actions, max_documents, max_bytes):
+            # Bound the number of chunks held in memory to a couple per worker
+            while len(in_flight) >= 2 * max(1, workers):
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    del in_flight[future]
+                    merge(future.result())
+
+            documents += len(chunk)
+            size += sum(map(len, chunk))
+            in_flight[executor.submit(loader.send, chunk)] = None
+
+        for future in concurrent.futures.as_completed(in_flight):
+            merge(future.result())
+
+    documents += sum(skipped.values())
+    errors.update(skipped)
+
+    return LoadReport(
+        documents, indexed, requests, retries, size, time.perf_counter() - start, errors
+    )
@@ -0,0 +1,363 @@
+"""A flattened catalog of the fields of a mapping.
+
+The catalog answers the common questions about a dotted field path (its type, the
+nested objects it belongs to, its normalizer, its copy_to targets and its depth) without
+walking the mapping:
+
+    fields = mapper.fields()
+
+    fields["diagnoses.treatments.treatment_type"].nested_scopes
+    # ("diagnoses", "diagnoses.treatments")
+    fields.filter("files.*", type="keyword").paths
+
+Fields are stored column-wise, one tuple (or array) per attribute, with a row per field
+in the order the mapping is walked. Multi-fields (e.g. `case_autocomplete.analyzed`) are
+included as children of their field.
+
+Fields can also be searched by prefix (e.g. for autocompletion) through sorted arrays of
+their paths, built on first search:
+
+    fields.search("diagnoses.tre", limit=10)
+    fields.search("primary", types=("keyword",))  # matches "primary_site", ...
+"""
+
+import array
+import bisect
+import fnmatch
+import itertools
+import re
+from typing import (
+    Any,
+    Container,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from gdcmodels import esmodels
+
+
+class Field(NamedTuple):
+    """The details of a field within a mapping.
+
+    Attributes:
+        path: The dotted path of the field, e.g. "diagnoses.treatments.treatment_type".
+        type: The elasticsearch type of the field, "object" for objects without a type.
+        nested_scopes: The paths of the nested objects containing the field, from the
+            outermost to the innermost. Empty if it is not within a nested object.
+        normalizer: The normalizer of the field, if any.
+        copy_to: The fields the field's values are copied to.
+        depth: The number of properties within the path, 1 for top level fields.
+    """
+
+    path: str
+    type: str
+    nested_scopes: Tuple[str, ...]
+    normalizer: Optional[str]
+    copy_to: Tuple[str, ...]
+    depth: int
+
+    @property
+    def nested_path(self) -> Optional[str]:
+        """The path of the innermost nested object containing the field, if any."""
+        return self.nested_scopes[-1] if self.nested_scopes else None
+
+    @property
+    def nested(self) -> bool:
+        """Whether the field is within a nested object."""
+        return bool(self.nested_scopes)
+
+
+class _PrefixIndex:
+    """A sorted array of keys, each associated with a row, searchable by prefix."""
+
+    __slots__ = ("_keys", "_rows")
+
+    def __init__(self, entries: Iterable[Tuple[str, int]]) -> None:
+        entries = sorted(entries)
+        self._keys = tuple(k for k, _ in entries)
+        self._rows = array.array("L", (r for _, r in entries))
+
+    def scan(self, prefix: str) -> Iterator[int]:
+        """Iterate over the rows of the keys starting with the prefix, in key order."""
+        position = bisect.bisect_left(self._keys, prefix)
+
+        while position < len(self._keys) and self._keys[position].startswith(prefix):
+            yield self._rows[position]
+            position += 1
+
+
+class FieldCatalog(Mapping[str, Field]):
+    """The fields of a mapping keyed by their dotted path.
+
+    NOTE: Instances of this class should be built via `ModelMapper.fields`
+    """
+
+    __slots__ = (
+        "_paths",
+        "_types",
+        "_nested_scopes",
+        "_normalizers",
+        "_copy_to",
+        "_depths",
+        "_rows",
+        "_search_index",
+    )
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        types: Sequence[str],
+        nested_scopes: Sequence[Tuple[str, ...]],
+        normalizers: Sequence[Optional[str]],
+        copy_to: Sequence[Tuple[str, ...]],
+        depths: Sequence[int],
+    ) -> None:
+        self._paths = tuple(paths)
+        self._types = tuple(types)
+        self._nested_scopes = tuple(nested_scopes)
+        self._normalizers = tuple(normalizers)
+        self._copy_to = tuple(copy_to)
+        self._depths = array.array("H", depths)
+        self._rows = {path: row for row, path in enumerate(self._paths)}
+        self._search_index: Optional[Tuple[_PrefixIndex, _PrefixIndex]] = None
+
+    @classmethod
+    def from_mapping(
+        cls, mapping: Union[esmodels.ESMapping, esmodels.Property]
+    ) -> "FieldCatalog":
+        """Build the catalog of every field within the mapping.
+
+        Args:
+            mapping: The elasticsearch mapping (or object property) to catalog.
+
+        Returns:
+            The catalog of the mapping's fields.
+        """
+        columns: Tuple[list, ...] = ([], [], [], [], [], [])
+
+        def add(path: str, property: Mapping[str, Any], nested_scopes: Tuple[str, ...]) -> None:
+            copy_to = property.get("copy_to", ())
+            # NOTE: elasticsearch defaults the type of properties without one to object
+            field_type = property.get("type", "object")
+
+            for column, value in zip(
+                columns,
+                (
+                    path,
+                    field_type,
+                    nested_scopes,
+                    property.get("normalizer"),
+                    (copy_to,) if isinstance(copy_to, str) else tuple(copy_to),
+                    path.count(".") + 1,
+                ),
+            ):
+                column.append(value)
+
+        def walk(
+            properties: Mapping[str, Any], prefix: str, nested_scopes: Tuple[str, ...]
+        ) -> None:
+            for name, property in properties.items():
+                path = f"{prefix}{name}"
+                add(path, property, nested_scopes)
+
+                for field_name, field in property.get("fields", {}).items():
+                    add(f"{path}.{field_name}", field, nested_scopes)
+
+                if "properties" in property:
+                    # NOTE: The chain is shared by every field within the same scope
+                    child_scopes = (
+                        (*nested_scopes, path)
+                        if property.get("type") == "nested"
+                        else nested_scopes
+                    )
+                    walk(property["properties"], f"{path}.", child_scopes)
+
+        walk(mapping.get("properties", {}), "", ())
+
+        return cls(*columns)
+
+    def __getitem__(self, path: str) -> Field:
+        return self._field(self._rows[path])
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def _field(self, row: int) -> Field:
+        return Field(
+            self._paths[row],
+            self._types[row],
+            self._nested_scopes[row],
+            self._normalizers[row],
+            self._copy_to[row],
+            self._depths[row],
+        )
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        """The paths of every field, in the order the mapping is walked."""
+        return self._paths
+
+    @property
+    def types(self) -> Tuple[str, ...]:
+        """The type of every field, aligned with paths."""
+        return self._types
+
+    @property
+    def nested_scopes(self) -> Tuple[Tuple[str, ...], ...]:
+        """The nested scopes of every field, aligned with paths."""
+        return self._nested_scopes
+
+    @property
+    def normalizers(self) -> Tuple[Optional[str], ...]:
+        """The normalizer of every field, aligned with paths."""
+        return self._normalizers
+
+    @property
+    def copy_to(self) -> Tuple[Tuple[str, ...], ...]:
+        """The copy_to targets of every field, aligned with paths."""
+        return self._copy_to
+
+    @property
+    def depths(self) -> Sequence[int]:
+        """The depth of every field, aligned with paths."""
+        return self._depths
+
+    def filter(
+        self,
+        pattern: Optional[str] = None,
+        type: Optional[str] = None,
+        nested: Optional[bool] = None,
+        normalizer: Optional[str] = None,
+        max_depth: Optional[int] = None,
+    ) -> "FieldCatalog":
+        """Select the fields matching every given criterion.
+
+        Example:
+            # All keyword fields under files
+            catalog.filter("files.*", type="keyword")
+
+        Args:
+            pattern: A shell-style pattern (see fnmatch) the path must match.
+            type: The type of the field.
+            nested: Whether the field must (or must not) be within a nested object.
+            normalizer: The normalizer of the field.
+            max_depth: The maximum depth of the field.
+
+        Returns:
+            A catalog of the matching fields.
+        """
+        masks = []
+
+        if pattern is not None:
+            match = re.compile(fnmatch.translate(pattern)).match
+            masks.append(match(p) is not None for p in self._paths)
+        if type is not None:
+            masks.append(t == type for t in self._types)
+        if nested is not None:
+            masks.append(bool(n) is nested for n in self._nested_scopes)
+        if normalizer is not None:
+            masks.append(n == normalizer for n in self._normalizers)
+        if max_depth is not None:
+            masks.append(d <= max_depth for d in self._depths)
+
+        if not masks:
+            return self
+
+        mask = tuple(map(all, zip(*masks)))
+        columns = (
+            self._paths,
+            self._types,
+            self._nested_scopes,
+            self._normalizers,
+            self._copy_to,
+            self._depths,
+        )
+
+        return FieldCatalog(*(itertools.compress(column, mask) for column in columns))
+
+    def group_by_nested_scope(self, paths: Iterable[str]) -> Dict[Tuple[str, ...], List[str]]:
+        """Group fields by the chain of nested objects containing them.
+
+        Fields sharing the same innermost nested object can be queried within a single
+        chain of nested queries.
+
+        Example:
+            catalog.group_by_nested_scope(["case_id", "files.file_id", "files.access"])
+            # {(): ["case_id"], ("files",): ["files.file_id", "files.access"]}
+
+        Args:
+            paths: The dotted paths of the fields.
+
+        Returns:
+            The nested scopes, from the outermost to the innermost, mapped to the paths of
+            the fields within them, in the order they were given.
+
+        Raises:
+            KeyError: If a path is not a field of the catalog.
+        """
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+
+        for path in paths:
+            groups.setdefault(self._nested_scopes[self._rows[path]], []).append(path)
+
+        return groups
+
+    def search(
+        self,
+        prefix: str,
+        limit: Optional[int] = 10,
+        types: Optional[Container[str]] = None,
+    ) -> List[Field]:
+        """Search the fields whose path, or any of its dotted suffixes, starts with prefix.
+
+        Fields whose full path matches are returned first, then the fields matching from
+        within their path (e.g. "primary" matches "diagnoses.primary_diagnosis"), each in
+        the sorted order of the matched paths. The search is case insensitive.
+
+        Args:
+            prefix: The prefix of the paths.
+            limit: The maximum number of fields returned, None for all of them.
+            types: If given, only fields of these types are returned.
+
+        Returns:
+            The matching fields.
+        """
+        if self._search_index is None:
+            lowered = [p.lower() for p in self._paths]
+            self._search_index = (
+                _PrefixIndex((p, row) for row, p in enumerate(lowered)),
+                _PrefixIndex(
+                    (p[i + 1 :], row)
+                    for row, p in enumerate(lowered)
+                    for i, char in enumerate(p)
+                    if char == "."
+                ),
+            )
+
+        prefix = prefix.lower()
+        found: Dict[int, None] = {}
+
+        for row in itertools.chain.from_iterable(i.scan(prefix) for i in self._search_index):
+            if limit is not None and len(found) >= limit:
+                break
+            if types is None or self._types[row] in types:
+                found[row] = None
+
+        return [self._field(row) for row in found]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} fields)"
@@ -0,0 +1,445 @@
+"""The gdcmodels command line.
+
+Usage:
+    gdcmodels profile-load [--no-vestigial] [--cache] [--memory] [--json PATH]
+    gdcmodels validate --index INDEX [--doc-type DOC_TYPE] [--vestigial] [--workers N]
+        [--max-invalid N] [--json PATH] FILE
+    gdcmodels load --index INDEX --prefix PREFIX [--doc-type DOC_TYPE] [--host HOST]
+        [--workers N] [--chunk-documents N] [--chunk-bytes N] [--allow-missing-index]
+        [--json PATH] FILE
+    gdcmodels drift --prefix PREFIX [--index INDEX ...] [--host HOST] [--json PATH]
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import sys
+import time
+import tracemalloc
+from typing import IO, Any, Callable, Dict, Iterator, Mapping, Optional, Sequence
+
+import gdcmodels
+from gdcmodels import bulk, coercion, drift, init_index, mapper, profiling, validation
+
+# The leading bytes of gzip files.
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+@contextlib.contextmanager
+def _open_ndjson(path: str) -> Iterator[IO[bytes]]:
+    """Open an NDJSON file, plain or gzip compressed, or stdin for "-".
+
+    Args:
+        path: The path of the file.
+
+    Yields:
+        The binary stream of the decompressed lines.
+    """
+    if path == "-":
+        stream: IO[bytes] = io.BufferedReader(sys.stdin.buffer)  # type: ignore
+        yield gzip.GzipFile(fileobj=stream) if stream.peek(2)[:2] == _GZIP_MAGIC else stream
+        return
+
+    with open(path, "rb") as f:
+        if f.read(2) == _GZIP_MAGIC:
+            f.seek(0)
+            with gzip.GzipFile(fileobj=f) as g:
+                yield g  # type: ignore
+        else:
+            f.seek(0)
+            yield f
+
+
+def _select_model(
+    args: argparse.Namespace, models: Mapping[str, Mapping[str, mapper.ModelMapper]]
+) -> mapper.ModelMapper:
+    """Select the model of the --index and --doc-type arguments.
+
+    Exits with a usage error listing the indices (or doc types) of the models if either is
+    not defined.
+
+    Args:
+        args: The parsed command line arguments.
+        models: The models to select from.
+
+    Returns:
+        The model.
+    """
+    if args.index not in models:
+        args.parser.error(
+            f"unknown index {args.index!r}, expected one of: {', '.join(sorted(models))}"
+        )
+
+    doc_types = models[args.index]
+    doc_type = args.doc_type or args.index
+
+    if doc_type not in doc_types:
+        args.parser.error(
+            f"unknown doc type {doc_type!r} of index {args.index!r}, expected one of "
+            f"(with --doc-type): {', '.join(sorted(doc_types))}"
+        )
+
+    return doc_types[doc_type]
+
+
+def profile_load(args: argparse.Namespace) -> None:
+    """Load every model, printing the time spent within each stage per index.
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    if args.memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+
+    with profiling.record() as events:
+        models = gdcmodels.get_es_models(vestigial_included=args.vestigial, cache=args.cache)
+
+        for index in models.values():
+            for model in index.values():
+                _ = model.mappings, model.settings
+
+    seconds = time.perf_counter() - start
+
+    if args.memory:
+        tracemalloc.stop()
+
+    summary = profiling.summarize(events)
+
+    print(profiling.format_table(summary))
+    print(f"\nLoaded {sum(map(len, models.values()))} models in {seconds:.3f}s")
+
+    if args.json:
+        report: Dict[str, Any] = {
+            "vestigial_included": args.vestigial,
+            "cache": args.cache,
+            "seconds": seconds,
+            "indices": summary,
+            "events": [e._asdict() for e in events],
+        }
+
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def validate(args: argparse.Namespace) -> None:
+    """Validate NDJSON documents against the mapping of a model.
+
+    Exits with a non-zero status if any document is invalid.
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    model = _select_model(args, gdcmodels.get_es_models(vestigial_included=args.vestigial))
+    start = time.perf_counter()
+
+    with _open_ndjson(args.file) as f:
+        report = validation.validate_ndjson(
+            f,
+            model.mappings,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            max_invalid=args.max_invalid,
+        )
+
+    seconds = time.perf_counter() - start
+    rate = report.documents / seconds if seconds else 0.0
+
+    print(
+        f"Validated {report.documents} documents in {seconds:.3f}s ({rate:.0f} docs/s), "
+        f"{report.invalid_documents} invalid"
+    )
+
+    for (path, kind), count in report.errors.most_common():
+        print(f"{count:>10}  {kind:<14} {path}")
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(
+                {
+                    "documents": report.documents,
+                    "invalid": report.invalid_documents,
+                    "invalid_lines": report.invalid,
+                    "errors": [
+                        {"path": path, "kind": kind, "count": count}
+                        for (path, kind), count in report.errors.most_common()
+                    ],
+                },
+                out,
+                indent=2,
+            )
+
+    if not report.valid:
+        sys.exit(1)
+
+
+def load(args: argparse.Namespace) -> None:
+    """Load NDJSON documents into the index of a model.
+
+    Exits with a non-zero status if the index does not exist (unless allowed), or if any
+    document failed to be indexed.
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    # The index is created by init_index, from the models without vestigial properties
+    model = _select_model(args, gdcmodels.get_es_models(vestigial_included=False))
+    index = init_index.ESIndexBuilder(args.index, args.prefix, model.doc_type).full_index_name
+    es = init_index.get_elasticsearch(args)
+
+    # Elasticsearch would otherwise create the index, with dynamic mappings
+    if not args.allow_missing_index and not es.indices.exists(index=index):
+        sys.exit(f"The index {index} does not exist, create it with init_index first")
+
+    with _open_ndjson(args.file) as f:
+        report = bulk.load_ndjson(
+            es,
+            f,
+            index,
+            workers=args.workers,
+            max_documents=args.chunk_documents,
+            max_bytes=args.chunk_bytes,
+            id_field=args.id_field,
+            coercer=coercion.compile_coercer(model, args.normalize) if args.coerce else None,
+            max_retries=args.max_retries,
+        )
+
+    print(
+        f"Loaded {report.indexed} of {report.documents} documents into {index} in "
+        f"{report.seconds:.3f}s ({report.rate:.0f} docs/s), {report.requests} requests, "
+        f"{report.retries} retries, {report.failed} failed"
+    )
+
+    for kind, count in report.errors.most_common():
+        print(f"{count:>10}  {kind}")
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(
+                {
+                    "index": index,
+                    "documents": report.documents,
+                    "indexed": report.indexed,
+                    "requests": report.requests,
+                    "retries": report.retries,
+                    "bytes": report.bytes,
+                    "seconds": report.seconds,
+                    "rate": report.rate,
+                    "errors": dict(report.errors.most_common()),
+                },
+                out,
+                indent=2,
+            )
+
+    if report.failed:
+        sys.exit(1)
+
+
+def detect_drift(args: argparse.Namespace) -> None:
+    """Detect the drift of the live indices under a prefix from the models.
+
+    Exits with a non-zero status if any index drifted.
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    start = time.perf_counter()
+    report = drift.detect_drift(init_index.get_elasticsearch(args), args.prefix, args.index)
+    seconds = time.perf_counter() - start
+
+    for index in report.indices:
+        if not index.exists:
+            print(f"{index.index}: missing")
+            continue
+
+        print(f"{index.index}: {'drifted' if index else 'ok'}")
+
+        for path in index.missing:
+            print(f"    missing field   {path}")
+        for path in index.extra:
+            print(f"    extra field     {path}")
+        for attribute, (expected, live) in index.changed.items():
+            print(f"    changed         {attribute}: expected {expected!r}, got {live!r}")
+        for name, (expected, live) in index.settings.items():
+            print(f"    setting         {name}: expected {expected!r}, got {live!r}")
+
+    for name in report.unexpected:
+        print(f"{name}: unexpected")
+
+    print(
+        f"\nChecked {len(report.indices)} indices in {seconds:.3f}s, "
+        f"{sum(map(bool, report.indices))} drifted, {len(report.unexpected)} unexpected"
+    )
+
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(report.to_dict(), out, indent=2)
+
+    if report:
+        sys.exit(1)
+
+
+def _add_connection_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the connection to elasticsearch, see init_index."""
+    parser.add_argument("--host", default="localhost", help="the elasticsearch host")
+    parser.add_argument("--port", type=int, default=9200, help="the elasticsearch port")
+    parser.add_argument("--ssl", action="store_true", help="connect to elasticsearch over SSL")
+    parser.add_argument("--ssl-ca", help="the path of the CA certificate bundle for SSL")
+    parser.add_argument("--user", default="", help="the elasticsearch user")
+    parser.add_argument("--password", default="", help="the elasticsearch password")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="gdcmodels", description="GDC models utilities.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+
+    profile = commands.add_parser(
+        "profile-load",
+        help="profile the loading of every model",
+        description=(
+            "Load every model, reporting the time, bytes read and peak memory of each "
+            "loading stage per index."
+        ),
+    )
+    profile.add_argument(
+        "--no-vestigial",
+        dest="vestigial",
+        action="store_false",
+        help="load the models without their vestigial properties",
+    )
+    profile.add_argument(
+        "--cache",
+        action="store_true",
+        help="load the models through the on-disk cache, in $GDCMODELS_CACHE_DIR",
+    )
+    profile.add_argument(
+        "--memory",
+        action="store_true",
+        help="trace the peak memory of each stage, which slows down loading (python 3.9+)",
+    )
+    profile.add_argument("--json", metavar="PATH", help="also write the report as JSON to PATH")
+    profile.set_defaults(func=profile_load)
+
+    validator = commands.add_parser(
+        "validate",
+        help="validate NDJSON documents against a model",
+        description=(
+            "Validate NDJSON documents (plain or gzip compressed) against the mapping of a "
+            "model, reporting the number of errors per field."
+        ),
+    )
+    validator.add_argument("file", help="the NDJSON file to validate, '-' for stdin")
+    validator.add_argument("--index", required=True, help="the index of the model")
+    validator.add_argument(
+        "--doc-type", help="the doc_type of the model, defaults to the index name"
+    )
+    validator.add_argument(
+        "--vestigial",
+        action="store_true",
+        help="also accept the vestigial properties of the model, which init_index leaves "
+        "out of the indices it creates",
+    )
+    validator.add_argument(
+        "--workers", type=int, help="validate the documents on a pool of N processes"
+    )
+    validator.add_argument(
+        "--batch-size", type=int, default=1000, help="the number of documents per batch"
+    )
+    validator.add_argument(
+        "--max-invalid",
+        type=int,
+        default=1000,
+        help="the number of line numbers of invalid documents kept for the JSON report",
+    )
+    validator.add_argument("--json", metavar="PATH", help="also write the report as JSON to PATH")
+    validator.set_defaults(func=validate, parser=validator)
+
+    loader = commands.add_parser(
+        "load",
+        help="load NDJSON documents into the index of a model",
+        description=(
+            "Stream NDJSON documents (plain or gzip compressed) into the index of a model "
+            "with parallel bulk requests, retrying the rejected ones."
+        ),
+    )
+    loader.add_argument("file", help="the NDJSON file to load, '-' for stdin")
+    loader.add_argument("--index", required=True, help="the index of the model")
+    loader.add_argument(
+        "--doc-type", help="the doc_type of the model, defaults to the index name"
+    )
+    loader.add_argument("--prefix", required=True, help="the prefix of the index name")
+    _add_connection_arguments(loader)
+    loader.add_argument(
+        "--workers", type=int, default=4, help="the number of concurrent bulk requests"
+    )
+    loader.add_argument(
+        "--chunk-documents",
+        type=int,
+        default=1000,
+        help="the maximum number of documents per bulk request",
+    )
+    loader.add_argument(
+        "--chunk-bytes",
+        type=int,
+        default=10 * 1024 * 1024,
+        help="the maximum size in bytes of a bulk request",
+    )
+    loader.add_argument(
+        "--max-retries",
+        type=int,
+        default=8,
+        help="the number of times rejected documents are retried, with exponential backoff",
+    )
+    loader.add_argument("--id-field", help="the field holding the ids of the documents")
+    loader.add_argument(
+        "--coerce",
+        action="store_true",
+        help="coerce the documents to the types of the model before loading them",
+    )
+    loader.add_argument(
+        "--normalize",
+        action="store_true",
+        help="with '--coerce', also apply the normalizers of the model (e.g. lowercasing) to "
+        "the stored documents, which elasticsearch only applies to the indexed terms",
+    )
+    loader.add_argument(
+        "--allow-missing-index",
+        action="store_true",
+        help="load the documents even if the index does not exist, letting elasticsearch "
+        "create it with dynamic mappings",
+    )
+    loader.add_argument("--json", metavar="PATH", help="also write the report as JSON to PATH")
+    loader.set_defaults(func=load, parser=loader)
+
+    drifter = commands.add_parser(
+        "drift",
+        help="detect the drift of the live indices from the models",
+        description=(
+            "Fetch the mappings and settings of the indices under a prefix in a single "
+            "request, and report the fields missing from, extra to or changed within each "
+            "index, along with its drifted settings."
+        ),
+    )
+    drifter.add_argument("--prefix", required=True, help="the prefix of the index names")
+    drifter.add_argument(
+        "--index", nargs="+", help="the indices of the models to check, all of them by default"
+    )
+    _add_connection_arguments(drifter)
+    drifter.add_argument("--json", metavar="PATH", help="also write the report as JSON to PATH")
+    drifter.set_defaults(func=detect_drift)
+
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = get_parser().parse_args(argv)
+    func: Callable[[argparse.Namespace], None] = args.func
+
+    func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Coerce documents to the types of a model's mapping before they are indexed.
+
+The mapping is compiled once into a tree of converters, one per property, so that
+coercing a document only walks the document itself:
+
+    coercer = coercion.compile_coercer(mapper)
+
+    coercer.coerce({"case_id": 1, "days_to_death": "12", "__comment__": "foo"})
+    # {"case_id": "1", "days_to_death": 12}
+
+Values are converted as elasticsearch coerces them when indexing: numeric strings into
+numbers (truncating the fractions of integers), "true"/"false" into booleans and numbers
+into strings for keyword and text fields. Keywords are normalized by the normalizers of
+the settings which only lowercase, uppercase or trim them (e.g. clinical_normalizer), and
+the fields which are `_source.excludes`'d without being mapped (e.g. __comment__) are
+removed. Values which cannot be converted are left as is, for elasticsearch (or
+gdcmodels.validation) to reject.
+
+Streams of documents are coerced in batches with Coercer.coerce_batches.
+"""
+
+import math
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set
+
+import more_itertools
+
+from gdcmodels import esmodels, mapper
+
+# The token filters of the normalizers which can be emulated, and their emulation.
+_NORMALIZER_FILTERS: Dict[str, Callable[[str], str]] = {
+    "lowercase": str.lower,
+    "uppercase": str.upper,
+    "trim": str.strip,
+}
+
+Converter = Callable[[Any], Any]
+
+
+def to_integer(value: Any) -> Any:
+    """Coerce a value to an integer as elasticsearch does, truncating fractions.
+
+    Args:
+        value: The value to coerce.
+
+    Returns:
+        The integer, or the value itself if it cannot be coerced.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if math.isfinite(value) else value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+
+        return int(number) if math.isfinite(number) else value
+
+    return value
+
+
+def to_float(value: Any) -> Any:
+    """Coerce a value to a float as elasticsearch does.
+
+    Args:
+        value: The value to coerce.
+
+    Returns:
+        The float, or the value itself if it cannot be coerced.
+    """
+    if isinstance(value, float):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+
+    return value
+
+
+def to_boolean(value: Any) -> Any:
+    """Coerce a value to a boolean as elasticsearch does, from "true", "false" or "".
+
+    Args:
+        value: The value to coerce.
+
+    Returns:
+        The boolean, or the value itself if it cannot be coerced.
+    """
+    if value == "true":
+        return True
+    if value in ("false", ""):
+        return False
+
+    return value
+
+
+def to_string(value: Any) -> Any:
+    """Coerce a value to a string as elasticsearch does for keywords and texts.
+
+    Args:
+        value: The value to coerce.
+
+    Returns:
+        The string, or the value itself (e.g. an object) if it cannot be coerced.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+
+    return value
+
+
+def _compile_normalizers(settings: Mapping[str, Any]) -> Dict[str, Converter]:
+    """Compile the emulation of the normalizers of the settings which can be emulated.
+
+    Args:
+        settings: The settings of the index.
+
+    Returns:
+        The emulated normalizers by name.
+    """
+    normalizers: Dict[str, Converter] = {}
+    definitions = settings.get("analysis", {}).get("normalizer", {})
+
+    for name, definition in definitions.items():
+        filters = definition.get("filter", [])
+
+        if definition.get("char_filter") or any(f not in _NORMALIZER_FILTERS for f in filters):
+            continue
+
+        funcs = [_NORMALIZER_FILTERS[f] for f in filters]
+
+        def normalize(value: Any, funcs: List[Callable[[str], str]] = funcs) -> Any:
+            if not isinstance(value, str):
+                value = to_string(value)
+
+                if not isinstance(value, str):
+                    return value
+
+            for func in funcs:
+                value = func(value)
+
+            return value
+
+        normalizers[name] = normalize
+
+    return normalizers
+
+
+def _compile_object(
+    properties: esmodels.Properties,
+    normalizers: Mapping[str, Converter],
+    stripped: Set[str],
+    prefix: str,
+) -> Converter:
+    """Compile the converter of an object, and of all of its properties.
+
+    Args:
+        properties: The properties of the object.
+        normalizers: The emulated normalizers by name.
+        stripped: The dotted paths of the excluded fields, which are removed unless
+            they are mapped.
+        prefix: The dotted path of the object, including the trailing dot.
+
+    Returns:
+        The converter of the object.
+    """
+    converters: Dict[str, Converter] = {}
+
+    for name, property in properties.items():
+        converter = _compile_property(property, normalizers, stripped, f"{prefix}{name}")
+
+        if converter is not None:
+            converters[name] = converter
+
+    removed = frozenset(
+        name
+        for name in (p[len(prefix) :] for p in stripped if p.startswith(prefix))
+        if "." not in name and name not in properties
+    )
+
+    def convert(value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+
+        document = {}
+
+        for name, field in value.items():
+            converter = converters.get(name)
+
+            if converter is None or field is None:
+                if name not in removed:
+                    document[name] = field
+            elif isinstance(field, list):
+                # Arrays are flattened by elasticsearch, each value is converted alike
+                document[name] = [converter(v) for v in field]
+            else:
+                document[name] = converter(field)
+
+        return document
+
+    return convert
+
+
+def _compile_property(
+    property: esmodels.Property,
+    normalizers: Mapping[str, Converter],
+    stripped: Set[str],
+    path: str,
+) -> Optional[Converter]:
+    property_type = property.get("type", "object")
+
+    if property_type in esmodels.OBJECT_TYPES or "properties" in property:
+        return _compile_object(property.get("properties", {}), normalizers, stripped, f"{path}.")
+
+    if property_type in esmodels.INTEGER_TYPES:
+        return to_integer
+    if property_type in esmodels.FLOAT_TYPES:
+        return to_float
+    if property_type == "boolean":
+        return to_boolean
+    if property_type in esmodels.STRING_TYPES:
+        return normalizers.get(property.get("normalizer", ""), to_string)
+
+    # Any other type is left as is
+    return None
+
+
+class Coercer:
+    """A coercer of documents compiled from a mapping."""
+
+    __slots__ = ("_convert",)
+
+    def __init__(
+        self,
+        mapping: Mapping[str, Any],
+        settings: Optional[Mapping[str, Any]] = None,
+        normalize: bool = True,
+    ) -> None:
+        """Compile the coercer.
+
+        Args:
+            mapping: The mapping to coerce the documents to.
+            settings: The settings of the index, defining its normalizers.
+            normalize: If true, the keywords are normalized by the normalizers which can be
+                emulated.
+        """
+        normalizers = _compile_normalizers(settings or {}) if normalize else {}
+        properties = mapping.get("properties", {})
+        excludes = mapping.get("_source", {}).get("excludes", [])
+        stripped = {p for p in excludes if "*" not in p}
+
+        self._convert = _compile_object(properties, normalizers, stripped, "")
+
+    def coerce(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Coerce a document.
+
+        Args:
+            document: The document to coerce, which is left unchanged.
+
+        Returns:
+            The coerced copy of the document.
+        """
+        return self._convert(document)
+
+    def coerce_batches(
+        self, documents: Iterable[Dict[str, Any]], batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Coerce a stream of documents in batches.
+
+        Only one batch is held in memory at a time.
+
+        Args:
+            documents: The documents to coerce.
+            batch_size: The number of documents per batch.
+
+        Yields:
+            The batches of coerced documents.
+        """
+        for batch in more_itertools.chunked(documents, batch_size):
+            yield [self._convert(d) for d in batch]
+
+
+def compile_coercer(model: mapper.ModelMapper, normalize: bool = True) -> Coercer:
+    """Compile the coercer of the documents of a model.
+
+    Args:
+        model: The model to coerce the documents to.
+        normalize: If true, the keywords are normalized by the normalizers of the model's
+            settings which can be emulated, e.g. clinical_normalizer.
+
+    Returns:
+        The compiled coercer.
+    """
+    return Coercer(model.mappings, model.settings, normalize)
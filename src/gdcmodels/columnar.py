@@ -0,0 +1,379 @@
+"""Derive the columnar schema of a model, and flatten its documents into columns.
+
+Every leaf field of the mapping becomes a column named by its dotted path, of the NumPy
+dtype of its type. The fields within nested objects are repeated once per nested object,
+so each nested level gets an offsets column, as in Apache Arrow's list layout: the
+objects of the i-th row of the enclosing level are the rows offsets[i]:offsets[i + 1] of
+the nested level.
+
+    schema = columnar.derive_schema(mapper)
+
+    for batch in columnar.Flattener(schema).flatten(documents):
+        batch["files.file_size"]  # a numpy.ma.MaskedArray masking the missing values
+        batch["files#offsets"]  # the offsets of the files of each document
+
+Arrays are only expected within nested objects. Other fields holding arrays (elasticsearch
+does not tell them apart) must be listed as repeated to get their own offsets column.
+
+NOTE: Flattening requires numpy, installed by the `columnar` extra.
+"""
+
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from gdcmodels import coercion, esmodels, mapper
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore
+
+# The suffix of the names of the offsets columns.
+OFFSETS = "#offsets"
+
+# The NumPy dtypes of the elasticsearch types, any other type is held as objects.
+DTYPES = {
+    "long": "int64",
+    "integer": "int32",
+    "short": "int16",
+    "byte": "int8",
+    "double": "float64",
+    "float": "float32",
+    "half_float": "float16",
+    "scaled_float": "float64",
+    "boolean": "bool",
+}
+
+# The coercion of the values of the numeric and boolean dtypes, and their expected type.
+_CONVERTERS: Dict[str, Tuple[Callable[[Any], Any], type]] = {
+    **dict.fromkeys(("int64", "int32", "int16", "int8"), (coercion.to_integer, int)),
+    **dict.fromkeys(("float64", "float32", "float16"), (coercion.to_float, float)),
+    "bool": (coercion.to_boolean, bool),
+}
+
+Fill = Callable[[Any], None]
+Missing = Callable[[], None]
+
+
+class Column(NamedTuple):
+    """A column of values.
+
+    Attributes:
+        path: The dotted path of the field.
+        type: The elasticsearch type of the field.
+        dtype: The name of the NumPy dtype of the column.
+        level: The path of the innermost list level containing the field, "" for the
+            documents themselves.
+    """
+
+    path: str
+    type: str
+    dtype: str
+    level: str
+
+
+class ListLevel(NamedTuple):
+    """A level of repeated objects (or values), e.g. a nested field.
+
+    Attributes:
+        path: The dotted path of the field.
+        parent: The path of the enclosing list level, "" for the documents themselves.
+    """
+
+    path: str
+    parent: str
+
+    @property
+    def offsets(self) -> str:
+        """The name of the offsets column of the level."""
+        return f"{self.path}{OFFSETS}"
+
+
+class ColumnarSchema(NamedTuple):
+    """The columnar schema of a model.
+
+    Attributes:
+        columns: The columns of the leaf fields, in the order of the mapping.
+        levels: The list levels, parents first.
+    """
+
+    columns: Tuple[Column, ...]
+    levels: Tuple[ListLevel, ...]
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """The names of all columns of the flattened batches, offsets included."""
+        return tuple(c.path for c in self.columns) + tuple(lvl.offsets for lvl in self.levels)
+
+
+def derive_schema(model: mapper.ModelMapper, repeated: Iterable[str] = ()) -> ColumnarSchema:
+    """Derive the columnar schema of a model.
+
+    Multi-fields are not part of the documents, and are left out.
+
+    Args:
+        model: The model to derive the schema of.
+        repeated: The dotted paths of the fields, other than the nested ones, which hold
+            arrays of objects or values.
+
+    Returns:
+        The schema of the model.
+
+    Raises:
+        ValueError: If any of the repeated fields are not within the mapping.
+    """
+    fields = model.fields()
+    repeated = set(repeated)
+    unknown = repeated - fields.keys()
+
+    if unknown:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}")
+
+    columns: List[Column] = []
+    levels: List[ListLevel] = []
+    level_paths = {""}
+
+    for field in fields.values():
+        parent = field.path.rpartition(".")[0]
+
+        # Multi-fields are only part of the index
+        if parent and fields[parent].type not in esmodels.OBJECT_TYPES:
+            continue
+
+        level = next(
+            (p for p in _enclosing(field.path) if p in level_paths),
+            "",
+        )
+
+        if field.type == "nested" or field.path in repeated:
+            levels.append(ListLevel(field.path, level))
+            level_paths.add(field.path)
+            level = field.path
+
+        if field.type not in esmodels.OBJECT_TYPES:
+            columns.append(
+                Column(field.path, field.type, DTYPES.get(field.type, "object"), level)
+            )
+
+    return ColumnarSchema(tuple(columns), tuple(levels))
+
+
+def _enclosing(path: str) -> Iterator[str]:
+    """List the paths of the objects containing the given path, innermost first."""
+    while path:
+        path = path.rpartition(".")[0]
+        yield path
+
+
+class _Buffers:
+    """The values of the columns of the batch being flattened."""
+
+    __slots__ = ("values", "offsets")
+
+    def __init__(self, schema: ColumnarSchema) -> None:
+        self.values: Dict[str, List[Any]] = {c.path: [] for c in schema.columns}
+        self.offsets: Dict[str, List[int]] = {lvl.path: [0] for lvl in schema.levels}
+
+    def clear(self) -> None:
+        # NOTE: The lists are cleared in place as the compiled closures hold them
+        for values in self.values.values():
+            values.clear()
+        for offsets in self.offsets.values():
+            del offsets[1:]
+
+
+def _single(value: Any, path: str) -> Any:
+    """Unwrap a field given as an array of at most one value."""
+    if len(value) > 1:
+        raise ValueError(f"{path} holds an array, it must be declared as repeated")
+
+    return value[0] if value else None
+
+
+def _compile(
+    node: Dict[str, Any], path: str, columns: Dict[str, Column], buffers: _Buffers
+) -> Tuple[Fill, Missing]:
+    """Compile the functions filling the columns of a field from its values.
+
+    Args:
+        node: The tree of the properties of the field.
+        path: The dotted path of the field.
+        columns: The columns by path.
+        buffers: The buffers of the columns to fill.
+
+    Returns:
+        The function filling the columns from a value of the field, and the one filling
+        them when the field is missing.
+    """
+    if path in buffers.offsets:
+        return _compile_level(node, path, columns, buffers)
+
+    return _compile_value(node, path, columns, buffers)
+
+
+def _compile_level(
+    node: Dict[str, Any], path: str, columns: Dict[str, Column], buffers: _Buffers
+) -> Tuple[Fill, Missing]:
+    fill_item, _ = _compile_value(node, path, columns, buffers)
+    offsets = buffers.offsets[path]
+
+    def fill(value: Any) -> None:
+        count = 0
+
+        for item in value if isinstance(value, list) else (value,):
+            # Nulls within arrays are not indexed
+            if item is not None:
+                fill_item(item)
+                count += 1
+
+        offsets.append(offsets[-1] + count)
+
+    def missing() -> None:
+        offsets.append(offsets[-1])
+
+    return fill, missing
+
+
+def _compile_value(
+    node: Dict[str, Any], path: str, columns: Dict[str, Column], buffers: _Buffers
+) -> Tuple[Fill, Missing]:
+    if path in buffers.values:
+        append = buffers.values[path].append
+        convert, expected = _CONVERTERS.get(columns[path].dtype, (coercion.to_string, object))
+
+        def fill_leaf(value: Any) -> None:
+            if isinstance(value, list):
+                value = _single(value, path)
+
+            if value is not None:
+                value = convert(value)
+
+                # NOTE: bool is a subclass of int, but not a valid value of numbers
+                if not isinstance(value, expected) or (
+                    expected is not bool and isinstance(value, bool)
+                ):
+                    raise ValueError(f"{path} holds {value!r:.40}, not a {columns[path].type}")
+
+            append(value)
+
+        return fill_leaf, lambda: append(None)
+
+    children = [
+        (n, *_compile(child, f"{path}.{n}" if path else n, columns, buffers))
+        for n, child in node.items()
+    ]
+    missings = [m for _, _, m in children]
+
+    def fill(value: Any) -> None:
+        if isinstance(value, list):
+            value = _single(value, path)
+
+        if value is None:
+            missing()
+            return
+
+        if not isinstance(value, dict):
+            raise ValueError(f"{path or 'The document'} holds {value!r:.40}, not an object")
+
+        for name, fill_child, missing_child in children:
+            child = value.get(name)
+
+            if child is None:
+                missing_child()
+            else:
+                fill_child(child)
+
+    def missing() -> None:
+        for missing_child in missings:
+            missing_child()
+
+    return fill, missing
+
+
+class Flattener:
+    """Flattens documents into the columns of a schema, in batches of bounded size."""
+
+    __slots__ = ("_schema", "_columns", "_buffers", "_fill")
+
+    def __init__(self, schema: ColumnarSchema) -> None:
+        """Compile the flattener.
+
+        Args:
+            schema: The schema of the columns, see derive_schema.
+
+        Raises:
+            ImportError: If numpy is not installed.
+        """
+        if numpy is None:
+            raise ImportError("Flattening documents requires numpy, see the columnar extra")
+
+        self._schema = schema
+        self._columns = {c.path: c for c in schema.columns}
+        self._buffers = _Buffers(schema)
+
+        tree: Dict[str, Any] = {}
+
+        for column_path in itertools.chain(self._columns, self._buffers.offsets):
+            node = tree
+            for name in column_path.split("."):
+                node = node.setdefault(name, {})
+
+        self._fill, _ = _compile_value(tree, "", self._columns, self._buffers)
+
+    def flatten(
+        self, documents: Iterable[Dict[str, Any]], batch_size: int = 10000
+    ) -> Iterator[Dict[str, Any]]:
+        """Flatten a stream of documents into batches of columns.
+
+        Only the values of one batch of documents are held in memory at a time, the
+        memory used is thus bounded by the batch size, however many documents are
+        flattened.
+
+        Args:
+            documents: The documents to flatten.
+            batch_size: The number of documents per batch.
+
+        Yields:
+            The columns of each batch by name: a numpy.ma.MaskedArray of the values of
+            every column, masking the missing values, and an int64 numpy.ndarray of the
+            offsets of every list level, starting at 0 in every batch.
+
+        Raises:
+            ValueError: If a document does not match the schema.
+        """
+        buffers = self._buffers
+        buffers.clear()
+        count = 0
+
+        for document in documents:
+            self._fill(document)
+            count += 1
+
+            if count == batch_size:
+                yield self._build_batch()
+                buffers.clear()
+                count = 0
+
+        if count:
+            yield self._build_batch()
+            buffers.clear()
+
+    def _build_batch(self) -> Dict[str, Any]:
+        batch: Dict[str, Any] = {}
+
+        for path, values in self._buffers.values.items():
+            dtype = numpy.dtype(self._columns[path].dtype)
+            mask = numpy.fromiter((v is None for v in values), bool, len(values))
+            fill_value = None if dtype.kind == "O" else dtype.type()
+
+            try:
+                data = numpy.array([fill_value if v is None else v for v in values], dtype=dtype)
+            except (OverflowError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid values of {path}: {e}") from e
+
+            batch[path] = numpy.ma.MaskedArray(data, mask)
+
+        for path, offsets in self._buffers.offsets.items():
+            batch[f"{path}{OFFSETS}"] = numpy.array(offsets, dtype="int64")
+
+        return batch
@@ -0,0 +1,157 @@
+"""Compile the YAML models into importable python modules.
+
+When the package is built, every index is written to `gdcmodels.compiled.<index>`
+(holding the index's settings and descriptions) and every doc_type to
+`gdcmodels.compiled.<index>.<doc_type>` (holding its mapping with and without the
+vestigial properties applied). Each value is returned by a function whose body is a
+literal, so every call builds a fresh copy without any YAML parsing, and python caches
+the compiled bytecode like any other module.
+"""
+
+import itertools
+import pathlib
+import pprint
+import shutil
+import sys
+from typing import Any, List
+
+from gdcmodels import esmodels, extraction
+
+if sys.version_info < (3, 9):
+    import importlib_resources as resources
+    from importlib_resources import abc
+else:
+    from importlib import abc, resources
+
+HEADER = "# Generated by gdcmodels.compilation from the esmodels YAML files. DO NOT EDIT.\n"
+
+
+def _format_function(name: str, value: Any) -> str:
+    """Format a function which returns the given value as a literal.
+
+    Args:
+        name: The name of the function.
+        value: The value the function returns, which must be made up of literals.
+
+    Returns:
+        The source code of the function.
+    """
+    literal = pprint.pformat(value, width=94, sort_dicts=False)
+
+    return f"\n\ndef {name}():\n    return {literal}\n"
+
+
+def _write_module(path: pathlib.Path, *definitions: str) -> None:
+    """Write a generated module.
+
+    Args:
+        path: The path of the module.
+        definitions: The source code of each definition contained within the module.
+    """
+    path.write_text("".join((HEADER, *definitions)))
+
+
+def compile_models(models: abc.Traversable, target: pathlib.Path) -> None:
+    """Compile all the models within the models resource into a package of modules.
+
+    Args:
+        models: The gdcmodels esmodels resource containing the YAML models.
+        target: The directory of the package to create. Any existing content is removed.
+
+    Raises:
+        ValueError: If an index or doc_type name is not a valid python identifier.
+    """
+    if target.exists():
+        shutil.rmtree(target)
+
+    target.mkdir(parents=True)
+
+    details = extraction._extract_details(models)
+    indices = {}
+
+    for index_name, index_details in itertools.groupby(details, key=lambda d: d.index_name):
+        index_details = list(index_details)
+        names = (index_name, *(d.doc_type for d in index_details))
+
+        if not all(n.isidentifier() for n in names):
+            raise ValueError(f"Cannot compile {names}, names must be python identifiers")
+
+        index_dir = target / index_name
+        index_dir.mkdir()
+
+        _write_module(
+            index_dir / "__init__.py",
+            _format_function("settings", extraction._extract_settings(index_details[0])),
+            _format_function("descriptions", extraction._extract_descriptions(index_details[0])),
+        )
+
+        for detail in index_details:
+            mapping = extraction._extract_mapping(detail, vestigial_included=False)
+            vestigial_mapping = extraction._extract_mapping(detail, vestigial_included=True)
+
+            _write_module(
+                index_dir / f"{detail.doc_type}.py",
+                _format_function("mapping", mapping),
+                (
+                    _format_function("vestigial_mapping", vestigial_mapping)
+                    if vestigial_mapping != mapping
+                    else "\n\nvestigial_mapping = mapping\n"
+                ),
+            )
+
+        indices[index_name] = tuple(d.doc_type for d in index_details)
+
+    _write_module(
+        target / "__init__.py",
+        f"\nMODELS_HASH = {extraction._hash_models(models)!r}\n",
+        f"\nINDICES = {pprint.pformat(indices, width=94, sort_dicts=False)}\n",
+    )
+
+
+def verify(models: abc.Traversable) -> List[str]:
+    """Compare the compiled models package against the YAML models.
+
+    Args:
+        models: The gdcmodels esmodels resource containing the YAML models.
+
+    Returns:
+        A description of every index/doc_type/variant whose compiled model differs from
+        the one loaded from the YAML models. Empty if all of them are equal.
+    """
+    mismatches = []
+
+    for detail, vestigial_included in itertools.product(
+        extraction._extract_details(models), (False, True)
+    ):
+        expected = (
+            extraction._extract_settings(detail),
+            extraction._extract_es_mapping(detail, vestigial_included),
+        )
+        compiled = extraction._extract_compiled_index(
+            detail.index_name, (detail.doc_type,), vestigial_included, descriptions=True
+        )
+
+        try:
+            model = compiled[detail.doc_type]
+        except ImportError:
+            actual = None
+        else:
+            actual = (model.settings, model.mappings)
+
+        if actual != expected:
+            variant = "vestigial" if vestigial_included else "base"
+            mismatches.append(f"{detail.index_name}/{detail.doc_type} ({variant})")
+
+    return mismatches
+
+
+def main() -> None:
+    """Compile the models of this installation into the given directory."""
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m gdcmodels.compilation TARGET_DIR")
+
+    compile_models(resources.files(esmodels), pathlib.Path(sys.argv[1]))
+
+
+if __name__ == "__main__":
+    main()
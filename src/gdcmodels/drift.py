@@ -0,0 +1,263 @@
+"""Detect the drift of the live indices of a cluster from the models.
+
+The mappings and settings of every index under a prefix are fetched in a single wildcard
+request, and each index is diffed against the model it was created from (see
+init_index.ESIndexBuilder for the names of the indices):
+
+    report = drift.detect_drift(es, "gdc_r53")
+
+    for index in report.indices:
+        index.missing, index.extra, index.changed  # ("foo",), (), {"bar.type": ...}
+
+Only what the models declare is compared: the settings elasticsearch adds to every index
+(e.g. index.uuid or index.creation_date) are ignored, as are the mapping attributes it
+reports with their default values. Values are compared as elasticsearch reports them,
+e.g. the settings as strings.
+"""
+
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+import elasticsearch
+
+import gdcmodels
+from gdcmodels import init_index, mapper, mapping_diff
+
+# The default values of the mapping attributes, which elasticsearch may report (or not)
+# whether or not a model declares them.
+MAPPING_DEFAULTS: Mapping[str, Any] = {
+    "coerce": True,
+    "doc_values": True,
+    "dynamic": "true",
+    "enabled": True,
+    "ignore_malformed": False,
+    "include_in_parent": False,
+    "include_in_root": False,
+    "index": True,
+    "store": False,
+}
+
+
+class IndexDrift(NamedTuple):
+    """The drift of a live index from its model.
+
+    Attributes:
+        index: The name of the index.
+        exists: A flag which determines if the index exists.
+        missing: The dotted paths of the fields of the model missing from the index.
+        extra: The dotted paths of the fields of the index missing from the model, e.g.
+            added dynamically.
+        changed: The (expected, live) values of the attributes of the fields (or of the
+            mapping itself) which differ, e.g. {"foo.type": ("keyword", "long")}. None
+            stands for a missing value.
+        settings: The (expected, live) values of the settings which differ, by flat name.
+    """
+
+    index: str
+    exists: bool
+    missing: Tuple[str, ...] = ()
+    extra: Tuple[str, ...] = ()
+    changed: Dict[str, Tuple[Any, Any]] = {}
+    settings: Dict[str, Tuple[Any, Any]] = {}
+
+    def __bool__(self) -> bool:
+        return not self.exists or bool(
+            self.missing or self.extra or self.changed or self.settings
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the drift into JSON serializable values."""
+        return {
+            "index": self.index,
+            "exists": self.exists,
+            "missing": list(self.missing),
+            "extra": list(self.extra),
+            "changed": {k: list(v) for k, v in self.changed.items()},
+            "settings": {k: list(v) for k, v in self.settings.items()},
+        }
+
+
+class DriftReport(NamedTuple):
+    """The drift of the live indices under a prefix from the models.
+
+    Attributes:
+        prefix: The prefix of the indices.
+        indices: The drift of the index of every model, drifted or not.
+        unexpected: The live indices under the prefix which are not the index of any
+            model.
+    """
+
+    prefix: str
+    indices: Tuple[IndexDrift, ...]
+    unexpected: Tuple[str, ...]
+
+    def __bool__(self) -> bool:
+        return bool(self.unexpected) or any(self.indices)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the report into JSON serializable values."""
+        return {
+            "prefix": self.prefix,
+            "drifted": bool(self),
+            "indices": [i.to_dict() for i in self.indices],
+            "unexpected": list(self.unexpected),
+        }
+
+
+def expected_indices(
+    prefix: str,
+    index_names: Optional[List[str]] = None,
+    es_models: Optional[Mapping[str, Mapping[str, mapper.ModelMapper]]] = None,
+) -> Dict[str, mapper.ModelMapper]:
+    """List the indices of the models under a prefix.
+
+    Args:
+        prefix: The prefix of the indices.
+        index_names: The names of the models' indices to list, all of them by default.
+        es_models: The models, defaulting to the ones init_index creates the indices from,
+            i.e. without their vestigial properties.
+
+    Returns:
+        The model of every index by full index name.
+
+    Raises:
+        KeyError: If any of the index names is not defined in the models.
+    """
+    if es_models is None:
+        es_models = gdcmodels.get_es_models(vestigial_included=False)
+
+    indices = {}
+
+    for index_name in index_names or es_models:
+        for doc_type, model in es_models[index_name].items():
+            if doc_type == "_settings":
+                continue  # settings, not index type
+
+            builder = init_index.ESIndexBuilder(index_name, prefix, doc_type)
+            indices[builder.full_index_name] = model
+
+    return indices
+
+
+def _normalize_mapping(node: Any, key: str = "") -> Any:
+    """Normalize a mapping (or part of it) as elasticsearch reports it."""
+    if isinstance(node, Mapping):
+        normalized = {k: _normalize_mapping(v, k) for k, v in node.items()}
+
+        # Objects with properties are implicitly of the object type
+        if "properties" in normalized and normalized.get("type") == "object":
+            del normalized["type"]
+
+        return normalized
+
+    if key == "dynamic":
+        return str(node).lower()
+    if key == "copy_to" and isinstance(node, str):
+        return [node]
+
+    return node
+
+
+def _flatten_settings(settings: Mapping[str, Any]) -> Dict[str, Any]:
+    """Flatten settings to the flat names and string values of elasticsearch."""
+    flat: Dict[str, Any] = {}
+    stack: List[Tuple[str, Any]] = [
+        (k if k.startswith("index.") or k == "index" else f"index.{k}", v)
+        for k, v in settings.items()
+    ]
+
+    while stack:
+        name, value = stack.pop()
+
+        if isinstance(value, Mapping):
+            stack.extend((f"{name}.{k}", v) for k, v in value.items())
+        elif isinstance(value, list):
+            flat[name] = [_setting_value(v) for v in value]
+        else:
+            flat[name] = _setting_value(value)
+
+    return flat
+
+
+def _setting_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+
+    return str(value)
+
+
+def _is_default(attribute: str, values: Tuple[Any, Any]) -> bool:
+    """Check if an attribute only differs by one side omitting its default value."""
+    name = attribute.rpartition(".")[2]
+
+    if name not in MAPPING_DEFAULTS:
+        return False
+
+    expected, live = values
+
+    if expected is None:
+        return live == MAPPING_DEFAULTS[name]
+    if live is None:
+        return expected == MAPPING_DEFAULTS[name]
+
+    return False
+
+
+def diff_index(index: str, model: mapper.ModelMapper, live: Mapping[str, Any]) -> IndexDrift:
+    """Diff a live index against its model.
+
+    Args:
+        index: The name of the index.
+        model: The model of the index.
+        live: The index as returned by the get index API with flat settings.
+
+    Returns:
+        The drift of the index.
+    """
+    diff = mapping_diff.diff_mappings(
+        _normalize_mapping(model.mappings), _normalize_mapping(live.get("mappings", {}))
+    )
+    paths = diff.property_paths()
+    changed = {
+        attribute: values
+        for attribute, values in diff.attribute_changes().items()
+        if not _is_default(attribute, values)
+    }
+
+    live_settings = live.get("settings", {})
+    settings = {
+        name: (value, live_settings.get(name))
+        for name, value in sorted(_flatten_settings(model.settings).items())
+        if live_settings.get(name) != value
+    }
+
+    return IndexDrift(index, True, paths.removed, paths.added, changed, settings)
+
+
+def detect_drift(
+    es: elasticsearch.Elasticsearch,
+    prefix: str,
+    index_names: Optional[List[str]] = None,
+    es_models: Optional[Mapping[str, Mapping[str, mapper.ModelMapper]]] = None,
+) -> DriftReport:
+    """Detect the drift of the live indices under a prefix from the models.
+
+    Args:
+        es: The elasticsearch client.
+        prefix: The prefix of the indices.
+        index_names: The names of the models' indices to check, all of them by default.
+        es_models: The models, defaulting to the ones init_index creates the indices from,
+            i.e. without their vestigial properties.
+
+    Returns:
+        The drift report.
+    """
+    expected = expected_indices(prefix, index_names, es_models)
+    live = es.indices.get(index=f"{prefix}_*", flat_settings=True)
+
+    indices = tuple(
+        diff_index(index, model, live[index]) if index in live else IndexDrift(index, False)
+        for index, model in expected.items()
+    )
+    unexpected = () if index_names else tuple(sorted(live.keys() - expected.keys()))
+
+    return DriftReport(prefix, indices, unexpected)
@@ -1,5 +1,9 @@
 from gdcmodels.esmodels.models import (
+    FLOAT_TYPES,
     GRAPH_INDICES,
+    INTEGER_TYPES,
+    OBJECT_TYPES,
+    STRING_TYPES,
     VIZ_INDICES,
     Autocomplete,
     AutocompleteField,
@@ -13,9 +17,13 @@ __all__ = (
     "Autocomplete",
     "AutocompleteField",
     "ESMapping",
+    "FLOAT_TYPES",
     "GRAPH_INDICES",
+    "INTEGER_TYPES",
     "Meta",
+    "OBJECT_TYPES",
     "Properties",
     "Property",
+    "STRING_TYPES",
     "VIZ_INDICES",
 )
@@ -16,6 +16,13 @@ VIZ_INDICES = tuple(
 )
 
 
+# The groups of elasticsearch types handled alike when processing documents.
+INTEGER_TYPES = frozenset(("long", "integer", "short", "byte"))
+FLOAT_TYPES = frozenset(("double", "float", "half_float", "scaled_float"))
+STRING_TYPES = frozenset(("keyword", "text"))
+OBJECT_TYPES = frozenset(("object", "nested"))
+
+
 class Meta(TypedDict):
     """The metadata associated with a mapping."""
 
@@ -1,12 +1,33 @@
+import concurrent.futures
 import functools
+import hashlib
+import importlib
 import itertools
+import logging
+import os
+import pathlib
+import pickle
 import sys
+import tempfile
+import threading
 import types
-from typing import Any, Iterable, Iterator, Mapping, NamedTuple, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 import deepdiff
 
-from gdcmodels import esmodels, extraction_utils, mapper
+from gdcmodels import esmodels, extraction_utils, mapper, profiling, vestigial
 
 if sys.version_info < (3, 9):
     import importlib_resources as resources
@@ -14,6 +35,30 @@ if sys.version_info < (3, 9):
 else:
     from importlib import abc, resources
 
+logger = logging.getLogger(__name__)
+
+# The package holding the models compiled into python modules when the package is built,
+# see gdcmodels.compilation. It does not exist in editable installs.
+_COMPILED_PACKAGE = "gdcmodels.compiled"
+
+# The environment variable enabling the cache of resolved models, in the directory it
+# holds. The cache is disabled when it is unset or empty.
+CACHE_DIR_ENV = "GDCMODELS_CACHE_DIR"
+
+# Bump this whenever the layout of the cached artifacts changes so that stale artifacts
+# written by older versions of this library are never loaded.
+_CACHE_VERSION = b"3"
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+# Set once the cache could not be written, which disables it for the rest of the process.
+_cache_failed = threading.Event()
+
+# The stats of the model files and their digest, by models directory, so that the files are
+# only read again by _hash_models once they have changed.
+_models_hashes: Dict[str, Tuple[Tuple[Any, ...], str]] = {}
+
 
 class _MappingDetail(NamedTuple):
     """The various details needed to load a given mapping."""
@@ -87,8 +132,8 @@ def _extract_details(models: abc.Traversable) -> Iterator[_MappingDetail]:
             yield from map(extract_detail, doc_types)
 
 
-def _extract_es_mapping(detail: _MappingDetail, vestigial_included: bool) -> esmodels.ESMapping:
-    """Extract the elasticsearch mapping described in the given detail.
+def _extract_mapping(detail: _MappingDetail, vestigial_included: bool) -> esmodels.ESMapping:
+    """Extract the elasticsearch mapping, without descriptions, described in the detail.
 
     Args:
         detail: The detail with the relevant paths from which to load the mapping.
@@ -96,21 +141,63 @@ def _extract_es_mapping(detail: _MappingDetail, vestigial_included: bool) -> esm
             included when loading the mapping.
 
     Returns:
-        The ESMapping loaded from the paths within the given detail.
+        The ESMapping loaded from the mapping and vestigial files of the given detail.
     """
-    mapping = extraction_utils.load_yaml(detail.mapping.read_bytes())
+    stage = functools.partial(profiling.stage, detail.index_name, detail.doc_type)
+
+    with stage(profiling.READ) as read:
+        content = read.read(detail.mapping.read_bytes())
+
+    with stage(profiling.PARSE):
+        mapping = extraction_utils.load_yaml(content)
 
     if vestigial_included and detail.vestigial.is_file():
-        vestigial_delta = deepdiff.Delta(
-            detail.vestigial.read_text(), deserializer=extraction_utils.load_yaml
-        )
-        mapping += vestigial_delta
+        with stage(profiling.VESTIGIAL) as read:
+            content = read.read(detail.vestigial.read_bytes())
+
+            try:
+                vestigial.apply_overlay(mapping, vestigial.load_overlay(content))
+            except vestigial.UnsupportedOverlayError:
+                # Only hand written vestigial files may need the generic delta machinery
+                mapping += deepdiff.Delta(
+                    content.decode(), deserializer=extraction_utils.load_yaml
+                )
+
+    return mapping
+
+
+def _extract_descriptions(detail: _MappingDetail) -> Mapping[str, str]:
+    """Extract the field descriptions described in the given detail.
+
+    Args:
+        detail: The detail with the relevant paths from which to load the descriptions.
+
+    Returns:
+        The descriptions of the index, empty if the index has none.
+    """
+    if not detail.descriptions.is_file():
+        return {}
+
+    with profiling.stage(detail.index_name, None, profiling.DESCRIPTIONS) as read:
+        return extraction_utils.load_yaml(read.read(detail.descriptions.read_bytes())) or {}
+
+
+def _extract_es_mapping(detail: _MappingDetail, vestigial_included: bool) -> esmodels.ESMapping:
+    """Extract the elasticsearch mapping described in the given detail.
 
-    if detail.descriptions.is_file():
-        descriptions = extraction_utils.load_yaml(detail.descriptions.read_bytes())
+    Args:
+        detail: The detail with the relevant paths from which to load the mapping.
+        vestigial_included: A flag which determine if the vestigial properties should be
+            included when loading the mapping.
 
-        if descriptions:
-            mapping["_meta"] = {"descriptions": descriptions}
+    Returns:
+        The ESMapping loaded from the paths within the given detail.
+    """
+    mapping = _extract_mapping(detail, vestigial_included)
+    descriptions = _extract_descriptions(detail)
+
+    if descriptions:
+        mapping["_meta"] = {"descriptions": descriptions}
 
     return mapping
 
@@ -125,46 +212,561 @@ def _extract_settings(detail: _MappingDetail) -> Mapping[str, Any]:
         The settings associated with the mapping if none are found the default are
         provided.
     """
-    return (
-        extraction_utils.load_settings(detail.settings.read_bytes())
-        if detail.settings.is_file()
-        else {}
+    if not detail.settings.is_file():
+        return {}
+
+    # NOTE: Equivalent to extraction_utils.load_settings, with the expansion of the dot
+    # notations profiled separately
+    with profiling.stage(detail.index_name, None, profiling.SETTINGS) as read:
+        settings = extraction_utils.load_yaml(read.read(detail.settings.read_bytes()))
+
+    with profiling.stage(detail.index_name, None, profiling.EXPAND_SETTINGS):
+        return extraction_utils._expand_settings(settings)
+
+
+def _stat_models(models: abc.Traversable) -> Optional[Tuple[Any, ...]]:
+    """Get the stats of every model file within the models resource.
+
+    Args:
+        models: The gdcmodels esmodels resource.
+
+    Returns:
+        The path, size and modification time of every YAML file, or None if the resource
+        is not a directory of the file system (e.g. a zip archive).
+    """
+    if not isinstance(models, pathlib.Path):
+        return None
+
+    return tuple(
+        sorted(
+            (str(path.relative_to(models)), stat.st_size, stat.st_mtime_ns)
+            for path, stat in ((p, p.stat()) for p in models.rglob("*.yaml"))
+        )
+    )
+
+
+def _hash_models(models: abc.Traversable) -> str:
+    """Compute a digest of the content of every model file within the models resource.
+
+    The digest of a directory of the file system is memoized for the rest of the process,
+    until the stats of any of its model files change.
+
+    Args:
+        models: The gdcmodels esmodels resource to hash.
+
+    Returns:
+        A hex digest which changes whenever any of the YAML files are added, removed or
+        modified.
+    """
+    stats = _stat_models(models)
+    memoized = _models_hashes.get(str(models)) if stats is not None else None
+
+    if memoized is not None and memoized[0] == stats:
+        return memoized[1]
+
+    digest = hashlib.sha256(_CACHE_VERSION)
+
+    def update(resource: abc.Traversable, path: str) -> None:
+        for child in sorted(resource.iterdir(), key=lambda c: c.name):
+            child_path = f"{path}/{child.name}"
+
+            if child.is_dir():
+                update(child, child_path)
+            elif child.name.endswith(".yaml"):
+                content = child.read_bytes()
+                digest.update(f"{child_path}:{len(content)}:".encode())
+                digest.update(content)
+
+    update(models, "")
+
+    if stats is not None:
+        _models_hashes[str(models)] = (stats, digest.hexdigest())
+
+    return digest.hexdigest()
+
+
+def _get_cache_dir() -> Optional[pathlib.Path]:
+    """Get the directory in which the resolved models are cached.
+
+    Returns:
+        The directory configured via GDCMODELS_CACHE_DIR. None when it is not configured,
+        or when the cache has been disabled after failing to be written.
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+
+    if not cache_dir or _cache_failed.is_set():
+        return None
+
+    return pathlib.Path(cache_dir)
+
+
+def _read_cache(artifact: pathlib.Path) -> Any:
+    """Load a cached value from the given artifact.
+
+    Args:
+        artifact: The path of the cached artifact.
+
+    Returns:
+        The cached value or None if the artifact is missing or unreadable.
+    """
+    try:
+        with open(artifact, "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    except Exception:
+        logger.warning(f"Ignoring unreadable model cache '{artifact}'", exc_info=True)
+        return None
+
+
+def _write_cache(artifact: pathlib.Path, value: Any) -> None:
+    """Atomically write a value to the given artifact.
+
+    Failures are ignored as the cache is purely an optimization. The first one is logged,
+    and disables the cache for the rest of the process.
+
+    Args:
+        artifact: The path of the cached artifact.
+        value: The value to store.
+    """
+    try:
+        artifact.parent.mkdir(parents=True, exist_ok=True)
+
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=artifact.parent, prefix=f".{artifact.name}", delete=False
+        ) as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(f.name, artifact)
+    except OSError:
+        if not _cache_failed.is_set():
+            _cache_failed.set()
+            logger.warning(
+                f"Unable to write model cache '{artifact}', disabling the cache",
+                exc_info=True,
+            )
+
+
+class _LazyMapping(Mapping[str, T]):
+    """A read-only mapping whose values are only loaded on first access.
+
+    The keys are known up front so membership checks, iteration and len never trigger
+    a load. Each value is loaded at most once and memoized thereafter.
+    """
+
+    __slots__ = ("_loaders", "_values", "_lock")
+
+    def __init__(self, loaders: Mapping[str, Callable[[], T]]) -> None:
+        self._loaders = loaders
+        self._values: Dict[str, T] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> T:
+        try:
+            return self._values[key]
+        except KeyError:
+            loader = self._loaders[key]
+
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = loader()
+
+        return self._values[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._loaders
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def prime(self, values: Mapping[str, T]) -> None:
+        """Store already loaded values, so that they are not loaded again on access.
+
+        Args:
+            values: The loaded values, keyed by keys of this mapping.
+        """
+        with self._lock:
+            self._values.update((k, v) for k, v in values.items() if k in self._loaders)
+
+    def map(self, func: Callable[[T], U]) -> "_LazyMapping[U]":
+        """Create a lazy mapping of the result of func applied to each value of this one.
+
+        Values which have not been loaded yet are loaded (and passed to func) on first
+        access of the new mapping without being memoized within this one.
+
+        Args:
+            func: The function to apply to each value.
+
+        Returns:
+            The new lazy mapping with the same keys.
+        """
+
+        def loader(key: str) -> U:
+            value = self._values[key] if key in self._values else self._loaders[key]()
+            return func(value)
+
+        return _LazyMapping({key: functools.partial(loader, key) for key in self._loaders})
+
+    def __repr__(self) -> str:
+        loaded = ", ".join(self._values)
+        return f"{type(self).__name__}(keys={list(self._loaders)}, loaded=[{loaded}])"
+
+
+class _Memoized(Generic[T]):
+    """A callable which loads a value on its first call and memoizes it.
+
+    Unlike functools.lru_cache, this can be pickled (as long as its loader can) so that
+    models loaded in worker processes keep their lazy loaders.
+    """
+
+    __slots__ = ("_load", "_value")
+
+    def __init__(self, load: Callable[[], T]) -> None:
+        self._load = load
+        self._value: Optional[T] = None
+
+    def __call__(self) -> T:
+        if self._value is None:
+            self._value = self._load()
+
+        return self._value
+
+    def __getstate__(self) -> Tuple[Callable[[], T], Optional[T]]:
+        return self._load, self._value
+
+    def __setstate__(self, state: Tuple[Callable[[], T], Optional[T]]) -> None:
+        self._load, self._value = state
+
+
+class _IndexDetails(NamedTuple):
+    """The details which are shared between all doc_types of an index.
+
+    Each is only loaded once, on first use, and shared between the index's models.
+    """
+
+    settings: Callable[[], Mapping[str, Any]]
+    descriptions: Callable[[], Mapping[str, str]]
+
+
+def _cached(artifact: Optional[pathlib.Path], load: Callable[[], T]) -> T:
+    """Load a value through the on-disk cache.
+
+    Args:
+        artifact: The path of the cached value, if the cache is enabled.
+        load: The loader of the value used when it has not been cached yet.
+
+    Returns:
+        The cached or loaded value.
+    """
+    if _cache_failed.is_set():
+        artifact = None
+
+    value = _read_cache(artifact) if artifact else None
+
+    if value is None:
+        value = load()
+
+        if artifact:
+            _write_cache(artifact, value)
+
+    return value
+
+
+def _build_model(
+    index_name: str,
+    doc_type: str,
+    index: _IndexDetails,
+    mapping: esmodels.ESMapping,
+    descriptions: bool,
+) -> mapper.ModelMapper:
+    """Build the mapper of a model.
+
+    Args:
+        index_name: The name of the model's index.
+        doc_type: The name of the model's doc_type.
+        index: The details shared by all doc_types of the index.
+        mapping: The model's mapping, without descriptions.
+        descriptions: A flag which determine if the descriptions should be included in
+            the mapping's _meta.
+
+    Returns:
+        The model's mapper.
+    """
+    if descriptions and index.descriptions():
+        mapping["_meta"] = {"descriptions": index.descriptions()}
+
+    return mapper.ModelMapper(
+        index_name, doc_type, index.settings(), mapping, descriptions=index.descriptions
     )
 
 
+def _load_model(
+    detail: _MappingDetail,
+    index: _IndexDetails,
+    vestigial_included: bool,
+    descriptions: bool,
+    artifact: Optional[pathlib.Path],
+) -> mapper.ModelMapper:
+    """Load the model described by the given detail.
+
+    Args:
+        detail: The detail with the relevant paths from which to load the model.
+        index: The details shared by all doc_types of the detail's index.
+        vestigial_included: A flag which determine if the vestigial properties should be
+            included when loading the mapping.
+        descriptions: A flag which determine if the descriptions should be included in
+            the mapping's _meta.
+        artifact: The path of the cached mapping, if the cache is enabled.
+
+    Returns:
+        The model's mapper.
+    """
+    mapping = _cached(artifact, functools.partial(_extract_mapping, detail, vestigial_included))
+
+    return _build_model(detail.index_name, detail.doc_type, index, mapping, descriptions)
+
+
 def _extract_index(
-    details: Iterable[_MappingDetail], vestigial_included: bool
-) -> Iterator[Tuple[str, mapper.ModelMapper]]:
-    settings = None
+    details: Iterable[_MappingDetail],
+    vestigial_included: bool,
+    descriptions: bool,
+    cache_dir: Optional[pathlib.Path],
+) -> _LazyMapping[mapper.ModelMapper]:
+    """Build the lazily loaded models of an index.
 
-    for detail in details:
-        settings = settings or _extract_settings(detail)
-        mapping = _extract_es_mapping(detail, vestigial_included)
+    Args:
+        details: The details of every doc_type within the index.
+        vestigial_included: A flag which determine if the vestigial properties should be
+            included when loading the mappings.
+        descriptions: A flag which determine if the descriptions should be included in
+            the mappings' _meta.
+        cache_dir: The directory holding the cached models, if the cache is enabled.
+
+    Returns:
+        The doc_types of the index mapped to their (lazily loaded) models.
+    """
+    details = tuple(details)
+    index_dir = cache_dir / details[0].index_name if cache_dir else None
+
+    def artifact(name: str) -> Optional[pathlib.Path]:
+        return index_dir / f"{name}.pickle" if index_dir else None
+
+    index = _IndexDetails(
+        settings=_Memoized(
+            functools.partial(
+                _cached, artifact("settings"), functools.partial(_extract_settings, details[0])
+            )
+        ),
+        descriptions=_Memoized(
+            functools.partial(
+                _cached,
+                artifact("descriptions"),
+                functools.partial(_extract_descriptions, details[0]),
+            )
+        ),
+    )
+
+    return _LazyMapping(
+        {
+            detail.doc_type: functools.partial(
+                _load_model,
+                detail,
+                index,
+                vestigial_included,
+                descriptions,
+                artifact(f"mappings/{detail.doc_type}"),
+            )
+            for detail in details
+        }
+    )
+
+
+def _load_index(
+    details: Iterable[_MappingDetail],
+    vestigial_included: bool,
+    descriptions: bool,
+    cache_dir: Optional[pathlib.Path],
+) -> Dict[str, mapper.ModelMapper]:
+    """Eagerly load all the models of an index.
+
+    NOTE: This is run within the worker processes of get_es_models.
+
+    Args:
+        details: The details of every doc_type within the index.
+        vestigial_included: A flag which determine if the vestigial properties should be
+            included when loading the mappings.
+        descriptions: A flag which determine if the descriptions should be included in
+            the mappings' _meta.
+        cache_dir: The directory holding the cached models, if the cache is enabled.
+
+    Returns:
+        The doc_types of the index mapped to their models.
+    """
+    return dict(_extract_index(details, vestigial_included, descriptions, cache_dir))
+
+
+def _import_compiled() -> Optional[types.ModuleType]:
+    """Import the package of compiled models.
+
+    Returns:
+        The compiled models package, or None if this installation was built without it.
+    """
+    try:
+        return importlib.import_module(_COMPILED_PACKAGE)
+    except ImportError:
+        return None
 
-        yield detail.doc_type, mapper.ModelMapper(
-            detail.index_name, detail.doc_type, settings, mapping
-        )
+
+def _load_compiled_model(
+    index_name: str,
+    doc_type: str,
+    index: _IndexDetails,
+    vestigial_included: bool,
+    descriptions: bool,
+) -> mapper.ModelMapper:
+    """Load a model from the compiled models package.
+
+    Args:
+        index_name: The name of the index to load.
+        doc_type: The doc_type within the index to load.
+        index: The details shared by all doc_types of the index.
+        vestigial_included: A flag which determine if the vestigial properties should be
+            included when loading the mapping.
+        descriptions: A flag which determine if the descriptions should be included in
+            the mapping's _meta.
+
+    Returns:
+        The model's mapper.
+    """
+    with profiling.stage(index_name, doc_type, profiling.COMPILED):
+        model = importlib.import_module(f"{_COMPILED_PACKAGE}.{index_name}.{doc_type}")
+        mapping = model.vestigial_mapping() if vestigial_included else model.mapping()
+
+    return _build_model(index_name, doc_type, index, mapping, descriptions)
+
+
+def _extract_compiled_index(
+    index_name: str, doc_types: Iterable[str], vestigial_included: bool, descriptions: bool
+) -> _LazyMapping[mapper.ModelMapper]:
+    """Build the lazily loaded models of an index from the compiled models package.
+
+    Args:
+        index_name: The name of the index.
+        doc_types: The doc_types within the index.
+        vestigial_included: A flag which determine if the vestigial properties should be
+            included when loading the mappings.
+        descriptions: A flag which determine if the descriptions should be included in
+            the mappings' _meta.
+
+    Returns:
+        The doc_types of the index mapped to their (lazily loaded) models.
+    """
+    module = functools.partial(importlib.import_module, f"{_COMPILED_PACKAGE}.{index_name}")
+    index = _IndexDetails(
+        settings=_Memoized(lambda: module().settings()),
+        descriptions=_Memoized(lambda: module().descriptions()),
+    )
+
+    return _LazyMapping(
+        {
+            doc_type: functools.partial(
+                _load_compiled_model,
+                index_name,
+                doc_type,
+                index,
+                vestigial_included,
+                descriptions,
+            )
+            for doc_type in doc_types
+        }
+    )
 
 
 def get_es_models(
     vestigial_included: bool = True,
+    cache: bool = True,
+    workers: Optional[int] = None,
+    descriptions: bool = True,
 ) -> Mapping[str, Mapping[str, mapper.ModelMapper]]:
     """Load all models/mappings provided by this library.
 
+    Only the layout of the models is discovered up front. The mapping and settings of
+    each index/doc_type are loaded on first access and memoized, so a process only pays
+    for the models it actually uses.
+
+    Installations built from a wheel ship the models compiled into python modules (see
+    gdcmodels.compilation), which are used whenever they match the model files. Otherwise
+    (e.g. editable installs), the models are loaded from the YAML files. The resolved
+    models are then cached on disk, keyed by a hash of the content of the model files, so
+    that only the first load of a given set of models pays for parsing the YAML and
+    applying the vestigial properties. The cache is opt-in: it lives in the directory set
+    by `$GDCMODELS_CACHE_DIR`, and is disabled when that is unset or empty, or once it
+    fails to be written.
+
     Args:
         vestigial_included: If true the vestigial properties will be added to the
             models. Otherwise, they are omitted.
+        cache: If false the models are always loaded from the YAML files and the
+            on-disk cache is neither read nor written.
+        workers: If given, every model is loaded up front, each index being loaded
+            concurrently by a pool of this many processes. Loading is bound by the
+            construction of python objects (which holds the GIL), hence processes rather
+            than threads. It only applies to the models loaded from the YAML files: the
+            compiled models are cheap to load, and always loaded lazily.
+        descriptions: If true the descriptions of the index are included in the models'
+            `_meta` (the same descriptions object being shared by all doc_types of an
+            index). Otherwise, they are omitted and only loaded if accessed through
+            `ModelMapper.descriptions`.
 
     Return:
         The models/mappings associated with the indices configured within gdc-models.
     """
     models = resources.files(esmodels)
-    details = _extract_details(models)
-    indices = itertools.groupby(details, key=lambda d: d.index_name)
+    compiled = _import_compiled()
+    cache_dir = _get_cache_dir() if cache else None
+    models_hash = _hash_models(models) if compiled or cache_dir else None
+
+    if compiled and compiled.MODELS_HASH == models_hash:
+        if workers:
+            logger.info(f"Ignoring workers={workers}, the compiled models are loaded lazily")
+
+        return types.MappingProxyType(
+            {
+                index_name: _extract_compiled_index(
+                    index_name, doc_types, vestigial_included, descriptions
+                )
+                for index_name, doc_types in compiled.INDICES.items()
+            }
+        )
 
-    return types.MappingProxyType(
-        {
-            index_name: types.MappingProxyType(dict(_extract_index(details, vestigial_included)))
-            for index_name, details in indices
-        }
-    )
+    if cache_dir:
+        variant = "vestigial" if vestigial_included else "base"
+        cache_dir = cache_dir / f"models-{models_hash}-{variant}"
+
+    details = _extract_details(models)
+    indices = {
+        index_name: tuple(details)
+        for index_name, details in itertools.groupby(details, key=lambda d: d.index_name)
+    }
+    es_models = {
+        index_name: _extract_index(details, vestigial_included, descriptions, cache_dir)
+        for index_name, details in indices.items()
+    }
+
+    if workers:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            loaded = executor.map(
+                _load_index,
+                indices.values(),
+                itertools.repeat(vestigial_included),
+                itertools.repeat(descriptions),
+                itertools.repeat(cache_dir),
+            )
+
+            for index, models in zip(es_models.values(), loaded):
+                index.prime(models)
+
+    return types.MappingProxyType(es_models)
@@ -1,18 +1,45 @@
 #!/usr/bin/env python
 
 import argparse
+import concurrent.futures
+import copy
 import dataclasses
+import json
 import logging
 import sys
-from typing import List, cast
+import time
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    List,
+    Mapping,
+    NamedTuple,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
 
 import elasticsearch
 from typing_extensions import Iterable, Optional, Protocol
 
 import gdcmodels
+from gdcmodels import esutils, mapping_utils
 
 logger = logging.getLogger("init_index")
 
+# The overrides of the model settings of --bulk-load-profile, which speed up the initial
+# bulk load of an index, at the expense of its search freshness, redundancy and
+# durability until it is finalized.
+BULK_LOAD_SETTINGS: Mapping[str, Any] = {
+    "index": {
+        "refresh_interval": "-1",
+        "number_of_replicas": 0,
+        "translog": {"durability": "async"},
+    }
+}
+
 
 @dataclasses.dataclass
 class ESIndexBuilder:
@@ -45,6 +72,12 @@ class Arguments(Protocol):
     user: str
     password: str
     delete: bool
+    workers: int
+    swap: bool
+    delete_previous: bool
+    bulk_load_profile: bool
+    finalize: bool
+    force_merge: bool
 
 
 class ArgumentParser(Protocol):
@@ -101,6 +134,44 @@ def get_parser() -> ArgumentParser:
         action="store_true",
         help="Delete existing index with the same name",
     )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        default=4,
+        type=int,
+        help="Number of indices created concurrently (default: 4)",
+    )
+    parser.add_argument(
+        "--swap",
+        dest="swap",
+        action="store_true",
+        help="Move existing aliases to the new indices, atomically in a single request",
+    )
+    parser.add_argument(
+        "--delete-previous",
+        dest="delete_previous",
+        action="store_true",
+        help="With '--swap', delete the indices the aliases are moved from",
+    )
+    parser.add_argument(
+        "--bulk-load-profile",
+        dest="bulk_load_profile",
+        action="store_true",
+        help="Create the indices with settings optimised for bulk loading, see '--finalize'",
+    )
+    parser.add_argument(
+        "--finalize",
+        dest="finalize",
+        action="store_true",
+        help="Restore the model settings of existing indices once bulk loaded, instead of "
+        "creating them",
+    )
+    parser.add_argument(
+        "--force-merge",
+        dest="force_merge",
+        action="store_true",
+        help="With '--finalize', force merge the finalized indices",
+    )
 
     return cast(ArgumentParser, parser)
 
@@ -138,7 +209,305 @@ def confirm_delete(index_name: str) -> bool:
     return ans == index_name
 
 
+class ClusterState(NamedTuple):
+    """The indices and aliases of a cluster.
+
+    Attributes:
+        indices: The names of the existing indices.
+        aliases: The names of the existing aliases mapped to the indices they point to.
+    """
+
+    indices: FrozenSet[str]
+    aliases: Mapping[str, FrozenSet[str]]
+
+
+def get_cluster_state(es: elasticsearch.Elasticsearch) -> ClusterState:
+    """Fetch the indices and aliases of the cluster in a single request.
+
+    Args:
+        es: The Elasticsearch client.
+
+    Returns:
+        The state of the cluster.
+    """
+    response = es.indices.get_alias()
+    aliases: Dict[str, Set[str]] = {}
+
+    for index, details in response.items():
+        for alias in details.get("aliases", {}):
+            aliases.setdefault(alias, set()).add(index)
+
+    return ClusterState(
+        frozenset(response), {alias: frozenset(i) for alias, i in aliases.items()}
+    )
+
+
+@dataclasses.dataclass
+class IndexCreation:
+    """The creation of an index, deleting the existing index first if requested."""
+
+    builder: ESIndexBuilder
+    settings: Mapping[str, Any]
+    mappings: Mapping[str, Any]
+    delete: bool = False
+    seconds: float = 0.0
+
+    def run(self, es: elasticsearch.Elasticsearch) -> None:
+        start = time.perf_counter()
+
+        if self.delete:
+            logger.info(f"Deleting existing index '{self.builder.full_index_name}'")
+            es.indices.delete(index=self.builder.full_index_name)
+
+        logger.info(f"Creating index '{self.builder.full_index_name}'")
+
+        es.indices.create(
+            index=self.builder.full_index_name,
+            settings=self.settings,
+            mappings=self.mappings,
+        )
+        self.seconds = time.perf_counter() - start
+
+
+def _plan_creations(
+    index_builder: ESIndexBuilder,
+    es_models: Mapping[str, Mapping[str, Any]],
+    state: ClusterState,
+    delete: bool,
+    bulk_load: bool = False,
+) -> List[IndexCreation]:
+    """Plan the creation of the indices of every doc type of an index.
+
+    The deletion of existing indices is confirmed here, so that the prompts happen
+    one at a time before any index is created.
+    """
+    creations = []
+
+    for index_type in es_models[index_builder.index_name].keys():
+        if index_type == "_settings":
+            continue  # settings, not index type
+
+        index_builder.index_type = index_type
+        settings = es_models[index_builder.index_name][index_type].settings
+        creation = IndexCreation(
+            dataclasses.replace(index_builder),
+            bulk_load_settings(settings) if bulk_load else settings,
+            es_models[index_builder.index_name][index_type].mappings,
+        )
+
+        if index_builder.full_index_name in state.indices:
+            if not delete:
+                logger.info(
+                    f"Elasticsearch index '{index_builder.full_index_name}' exists, "
+                    "'--delete' not specified, skipping"
+                )
+                continue
+            else:
+                logger.info(
+                    f"Elasticsearch index '{index_builder.full_index_name}' exists, '--delete' specified"
+                )
+                if confirm_delete(index_builder.full_index_name):
+                    creation.delete = True
+                else:
+                    logger.info("Index name mismatch, skipping deleting")
+                    continue
+
+        creations.append(creation)
+
+    return creations
+
+
+def bulk_load_settings(settings: Mapping[str, Any]) -> Dict[str, Any]:
+    """Override the settings of a model with the bulk load profile.
+
+    Args:
+        settings: The settings of the model.
+
+    Returns:
+        A copy of the settings, overridden by BULK_LOAD_SETTINGS.
+    """
+    return mapping_utils.deep_merge_mapping_files(
+        copy.deepcopy(settings), copy.deepcopy(dict(BULK_LOAD_SETTINGS))
+    )
+
+
+def finalized_settings(settings: Mapping[str, Any]) -> Dict[str, Any]:
+    """List the settings of a model overridden by the bulk load profile.
+
+    Args:
+        settings: The settings of the model.
+
+    Returns:
+        The dotted name of every setting of BULK_LOAD_SETTINGS mapped to its value within
+        the model settings, or None (which resets it to its default) if the model does
+        not declare it.
+    """
+    finalized = {}
+    overrides = [((k,), v) for k, v in BULK_LOAD_SETTINGS.items()]
+
+    while overrides:
+        path, value = overrides.pop(0)
+
+        if isinstance(value, Mapping):
+            overrides.extend(((*path, k), v) for k, v in value.items())
+            continue
+
+        declared: Any = settings
+        for key in path:
+            declared = declared.get(key) if isinstance(declared, Mapping) else None
+
+        finalized[".".join(path)] = declared
+
+    return finalized
+
+
+def _finalize(
+    indices: Sequence[ESIndexBuilder],
+    es_models: Mapping[str, Mapping[str, Any]],
+    es: elasticsearch.Elasticsearch,
+    state: ClusterState,
+    force_merge: bool,
+) -> Dict[str, float]:
+    """Restore the model settings of indices created with the bulk load profile.
+
+    The indices whose settings are restored to the same values are updated together, in
+    a single request.
+
+    Returns:
+        The time each step took.
+    """
+    timings: Dict[str, float] = {}
+    restored: Dict[str, Tuple[Dict[str, Any], List[str]]] = {}
+
+    for index_builder in indices:
+        if not es_models.get(index_builder.index_name):
+            logger.info(
+                f"Specified index '{index_builder.index_name}' is not defined in es-models, skipping it!"
+            )
+            continue
+
+        for index_type, model in es_models[index_builder.index_name].items():
+            if index_type == "_settings":
+                continue  # settings, not index type
+
+            index_builder.index_type = index_type
+
+            if index_builder.full_index_name not in state.indices:
+                logger.warning(
+                    f"Elasticsearch index '{index_builder.full_index_name}' does not exist, "
+                    "skipping finalizing"
+                )
+                continue
+
+            settings = finalized_settings(model.settings)
+            key = json.dumps(settings, sort_keys=True)
+            restored.setdefault(key, (settings, []))[1].append(index_builder.full_index_name)
+
+    step = time.perf_counter()
+
+    for settings, names in restored.values():
+        logger.info(f"Restoring the settings of {names}: {settings}")
+        es.indices.put_settings(body=settings, index=",".join(names))
+
+    timings["restore settings"] = time.perf_counter() - step
+    names = [name for _, index_names in restored.values() for name in index_names]
+
+    if force_merge and names:
+        step = time.perf_counter()
+        esutils.force_merge_elasticsearch_indices(es, names)
+        timings["force merge"] = time.perf_counter() - step
+
+    return timings
+
+
+def _swap_alias(
+    index_builder: ESIndexBuilder, state: ClusterState, previous: Dict[str, Set[str]]
+) -> List[Dict[str, Any]]:
+    """Plan the actions moving an existing alias to the index of the builder.
+
+    Args:
+        index_builder: The builder of the index the alias is moved to.
+        state: The state of the cluster.
+        previous: The indices the aliases are moved from, updated with the indices the
+            alias is moved from.
+
+    Returns:
+        The actions removing the alias from its current indices and adding it to the
+        index of the builder, empty if the alias already only points to that index.
+    """
+    alias, index = index_builder.alias_name, index_builder.full_index_name
+    current = state.aliases[alias] - {index}
+
+    if not current:
+        logger.info(f"Alias '{alias}' already points to '{index}', skipping swapping.")
+        return []
+
+    logger.info(f"Swapping alias '{alias}' from {sorted(current)} to '{index}'")
+
+    for previous_index in current:
+        previous.setdefault(previous_index, set()).add(alias)
+
+    return [
+        *({"remove": {"index": i, "alias": alias}} for i in sorted(current)),
+        {"add": {"index": index, "alias": alias}},
+    ]
+
+
+def _delete_previous(
+    actions: List[Dict[str, Any]], state: ClusterState, previous: Mapping[str, Set[str]]
+) -> List[Dict[str, Any]]:
+    """Replace the removal of the swapped aliases by the deletion of their previous indices.
+
+    The deletion of each index is confirmed, and an index is only deleted if all of its
+    aliases are moved.
+
+    Args:
+        actions: The alias actions.
+        state: The state of the cluster.
+        previous: The indices the aliases are moved from, with the aliases moved.
+
+    Returns:
+        The alias actions, deleting the confirmed previous indices as part of them.
+    """
+    deleted = set()
+
+    for index, moved in sorted(previous.items()):
+        remaining = {a for a, indices in state.aliases.items() if index in indices} - moved
+
+        if remaining:
+            logger.warning(
+                f"Index '{index}' is still aliased by {sorted(remaining)}, skipping deleting."
+            )
+        elif confirm_delete(index):
+            logger.info(f"Deleting previous index '{index}'")
+            deleted.add(index)
+        else:
+            logger.info("Index name mismatch, skipping deleting")
+
+    # NOTE: Deleting an index removes its aliases
+    kept = [a for a in actions if a.get("remove", {}).get("index") not in deleted]
+
+    return kept + [{"remove_index": {"index": index}} for index in sorted(deleted)]
+
+
+def _print_summary(
+    creations: Sequence[IndexCreation], timings: Mapping[str, float], total: float
+) -> None:
+    """Print the time each step and each index creation took."""
+    print(f"{'step':<48} {'seconds':>8}")
+
+    for step, seconds in timings.items():
+        print(f"{step:<48} {seconds:>8.3f}")
+
+    for creation in creations:
+        action = "recreate" if creation.delete else "create"
+        print(f"{action + ' ' + creation.builder.full_index_name:<48} {creation.seconds:>8.3f}")
+
+    print(f"{'total':<48} {total:>8.3f}")
+
+
 def init_index(args: Arguments):
+    start = time.perf_counter()
     es_models = gdcmodels.get_es_models(vestigial_included=False)
     es = get_elasticsearch(args)
 
@@ -151,6 +520,33 @@ def init_index(args: Arguments):
         for index, alias_name in zip(indices, args.alias):
             index.alias_name = alias_name
 
+    if args.delete_previous and not args.swap:
+        logger.error("'--delete-previous' can only be specified along with '--swap'")
+        return
+
+    if args.force_merge and not args.finalize:
+        logger.error("'--force-merge' can only be specified along with '--finalize'")
+        return
+
+    if args.finalize and (args.delete or args.swap or args.bulk_load_profile):
+        logger.error(
+            "'--finalize' cannot be specified along with '--delete', '--swap' or "
+            "'--bulk-load-profile'"
+        )
+        return
+
+    timings: Dict[str, float] = {}
+    step = time.perf_counter()
+    state = get_cluster_state(es)
+    timings["fetch cluster state"] = time.perf_counter() - step
+
+    if args.finalize:
+        timings.update(_finalize(indices, es_models, es, state, args.force_merge))
+        _print_summary([], timings, time.perf_counter() - start)
+        return
+
+    planned: List[Tuple[ESIndexBuilder, List[IndexCreation]]] = []
+
     for index_builder in indices:
         if not es_models.get(index_builder.index_name):
             logger.info(
@@ -158,46 +554,41 @@ def init_index(args: Arguments):
             )
             continue
 
-        indices_created = 0
-        for index_type in es_models[index_builder.index_name].keys():
-            if index_type == "_settings":
-                continue  # settings, not index type
+        planned.append(
+            (
+                index_builder,
+                _plan_creations(
+                    index_builder, es_models, state, args.delete, args.bulk_load_profile
+                ),
+            )
+        )
 
-            index_builder.index_type = index_type
+    creations = [c for _, index_creations in planned for c in index_creations]
 
-            if es.indices.exists(index=index_builder.full_index_name):
-                if not args.delete:
-                    logger.info(
-                        f"Elasticsearch index '{index_builder.full_index_name}' exists, "
-                        "'--delete' not specified, skipping"
-                    )
-                    continue
-                else:
-                    logger.info(
-                        f"Elasticsearch index '{index_builder.full_index_name}' exists, '--delete' specified"
-                    )
-                    if confirm_delete(index_builder.full_index_name):
-                        logger.info(f"Deleting existing index '{index_builder.full_index_name}'")
-                        es.indices.delete(index=index_builder.full_index_name)
-                    else:
-                        logger.info("Index name mismatch, skipping deleting")
-                        continue
-
-            logger.info(f"Creating index '{index_builder.full_index_name}'")
-
-            es.indices.create(
-                index=index_builder.full_index_name,
-                settings=es_models[index_builder.index_name][index_type].settings,
-                mappings=es_models[index_builder.index_name][index_type].mappings,
-            )
-            indices_created += 1
+    step = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max(1, args.workers)) as executor:
+        futures = [executor.submit(c.run, es) for c in creations]
+
+    timings["create indices"] = time.perf_counter() - step
 
+    # Raise the first failure, once every other index has been created
+    for future in futures:
+        future.result()
+
+    actions: List[Dict[str, Any]] = []
+    aliases = set(state.aliases)
+    # The indices the swapped aliases are moved from, with the aliases moved
+    previous: Dict[str, Set[str]] = {}
+
+    for index_builder, index_creations in planned:
         # Skip this step if no alias provided.
         if not index_builder.should_create_alias:
             continue
 
         # Skip this step if no index was created in the above steps.
-        if not es.indices.exists(index=index_builder.full_index_name):
+        if index_builder.full_index_name not in state.indices and not any(
+            c.builder.full_index_name == index_builder.full_index_name for c in index_creations
+        ):
             logger.warning(
                 f"Index '{index_builder.index_name}' not created so alias '{index_builder.alias_name}' will not be created."
             )
@@ -210,20 +601,39 @@ def init_index(args: Arguments):
         # --index flag. This breaks the alias logic but we don't use this
         # script to create those indices so this conditional should never
         # happen in practice.
-        if indices_created > 1:
+        if len(index_creations) > 1:
             logger.warning(
                 f"Cannot create alias '{index_builder.alias_name}' because too many indices created for '{index_builder.index_name}'"
             )
             continue
 
-        if es.indices.exists_alias(name=index_builder.alias_name):
+        if args.swap and index_builder.alias_name in state.aliases:
+            actions.extend(_swap_alias(index_builder, state, previous))
+            continue
+
+        if index_builder.alias_name in aliases:
             logger.warning(
                 f"Alias '{index_builder.alias_name}' exists already, skipping creating."
             )
             continue
 
         logger.info(f"Creating alias '{index_builder.alias_name}'")
-        es.indices.put_alias(name=index_builder.alias_name, index=index_builder.full_index_name)
+        aliases.add(index_builder.alias_name)
+        actions.append(
+            {"add": {"index": index_builder.full_index_name, "alias": index_builder.alias_name}}
+        )
+
+    if args.delete_previous:
+        actions = _delete_previous(actions, state, previous)
+
+    if actions:
+        # NOTE: All actions are applied atomically, readers never see an alias pointing
+        #       to no index or to both the previous and the new index.
+        step = time.perf_counter()
+        es.indices.update_aliases(body={"actions": actions})
+        timings["update aliases"] = time.perf_counter() - step
+
+    _print_summary(creations, timings, time.perf_counter() - start)
 
 
 def main():
@@ -1,17 +1,34 @@
 """This module maintains the abstraction between the models and the es mappings."""
 
+import functools
 import re
-from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Container,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
 
 import more_itertools
 
-from gdcmodels import esmodels
+from gdcmodels import catalog, esmodels, source
 
 # A type alias for the selector parameter of the select_mapping method of the
 # ModelMapper. For more information on its use, please see the documentation for the
 # method.
 Selector = Union[Callable[[Iterable[str]], Iterable[str]], str]
 
+# The descriptions of a model's fields or a callable which loads them on demand.
+Descriptions = Union[Mapping[str, str], Callable[[], Mapping[str, str]]]
+
 
 def _walk_mapping(
     mapping: Union[esmodels.ESMapping, esmodels.Property], path: str = "root"
@@ -31,13 +48,48 @@ def _walk_mapping(
         yield from _walk_mapping(property, sub_path)
 
 
+def _index_paths(
+    mapping: Union[esmodels.ESMapping, esmodels.Property],
+) -> Dict[str, Dict[str, esmodels.Property]]:
+    """Index every path within the mapping by the name of the property it leads to.
+
+    Args:
+        mapping: The elasticsearch mapping to index.
+
+    Returns:
+        Each property name mapped to every path (in the order they are walked) which
+        ends with that name, and their associated property definition.
+    """
+    index: Dict[str, Dict[str, esmodels.Property]] = {}
+
+    for path, property in _walk_mapping(mapping):
+        index.setdefault(path.rpartition(".")[2], {})[path] = property
+
+    return index
+
+
+@functools.lru_cache(maxsize=256)
+def _selector_pattern(selector: str) -> Pattern[str]:
+    """Compile the pattern matching the paths going through the selector property."""
+    return re.compile(rf"\.{selector}\.")
+
+
 class ModelMapper:
     """This translates the model into elasticsearch mappings/settings.
 
     NOTE: Instances of this class should be instantiated via `get_es_models`
     """
 
-    __slots__ = ("_index_name", "_doc_type", "_settings", "_mapping")
+    __slots__ = (
+        "_index_name",
+        "_doc_type",
+        "_settings",
+        "_mapping",
+        "_descriptions",
+        "_paths",
+        "_fields",
+        "_source_planner",
+    )
 
     def __init__(
         self,
@@ -45,11 +97,26 @@ class ModelMapper:
         doc_type: str,
         settings: Mapping[str, Any],
         mapping: esmodels.ESMapping,
+        descriptions: Optional[Descriptions] = None,
     ) -> None:
         self._index_name = index_name
         self._doc_type = doc_type
         self._settings = settings
         self._mapping = mapping
+        self._descriptions = descriptions
+        self._paths: Optional[Dict[str, Dict[str, esmodels.Property]]] = None
+        self._fields: Optional[catalog.FieldCatalog] = None
+        self._source_planner: Optional[source.SourcePlanner] = None
+
+    def __reduce__(self) -> Tuple[type, Tuple[Any, ...]]:
+        # NOTE: The indices built from the mapping are not pickled, they are rebuilt on use
+        return type(self), (
+            self._index_name,
+            self._doc_type,
+            self._settings,
+            self._mapping,
+            self._descriptions,
+        )
 
     @property
     def index_name(self) -> str:
@@ -69,6 +136,139 @@ class ModelMapper:
         """The settings object for the elasticsearch index."""
         return self._settings
 
+    @property
+    def descriptions(self) -> Mapping[str, str]:
+        """The descriptions of the model's fields, loaded on first access.
+
+        These are available even if the models were loaded without descriptions in their
+        mappings' _meta.
+        """
+        if callable(self._descriptions):
+            self._descriptions = self._descriptions()
+
+        if self._descriptions is None:
+            return self._mapping.get("_meta", {}).get("descriptions", {})
+
+        return self._descriptions
+
+    def fields(self) -> catalog.FieldCatalog:
+        """Get the catalog of every field within the mapping, keyed by dotted path.
+
+        Example:
+            mapper.fields()["diagnoses.treatments.treatment_type"].type
+            # All keyword fields under files
+            mapper.fields().filter("files.*", type="keyword")
+
+        The catalog is built on first use, which assumes the mapping is not modified
+        afterwards.
+
+        Returns:
+            The catalog of the mapping's fields.
+        """
+        if self._fields is None:
+            self._fields = catalog.FieldCatalog.from_mapping(self._mapping)
+
+        return self._fields
+
+    def nested_scopes(self, path: str) -> Tuple[str, ...]:
+        """Get the chain of nested objects containing the field, as needed to query it.
+
+        Example:
+            mapper.nested_scopes("files.analysis.input_files.file_id")
+            # ("files", "files.analysis.input_files")
+
+        Args:
+            path: The dotted path of the field.
+
+        Returns:
+            The paths of the nested objects containing the field, from the outermost to the
+            innermost. Empty if it is not within a nested object.
+
+        Raises:
+            KeyError: If the path is not a field of the mapping.
+        """
+        return self.fields()[path].nested_scopes
+
+    def group_by_nested_scope(self, paths: Iterable[str]) -> Dict[Tuple[str, ...], List[str]]:
+        """Group fields by the chain of nested objects containing them.
+
+        See FieldCatalog.group_by_nested_scope.
+
+        Args:
+            paths: The dotted paths of the fields.
+
+        Returns:
+            The nested scopes, from the outermost to the innermost, mapped to the paths of
+            the fields within them.
+        """
+        return self.fields().group_by_nested_scope(paths)
+
+    def search_fields(
+        self, prefix: str, limit: Optional[int] = 10, types: Optional[Container[str]] = None
+    ) -> List[catalog.Field]:
+        """Search the fields by path prefix, e.g. to autocomplete field names.
+
+        See FieldCatalog.search, the index searched is built once per mapper.
+
+        Args:
+            prefix: The prefix of the paths, or of any of their dotted suffixes.
+            limit: The maximum number of fields returned, None for all of them.
+            types: If given, only fields of these types are returned.
+
+        Returns:
+            The matching fields.
+        """
+        return self.fields().search(prefix, limit, types)
+
+    def plan_source(self, fields: Iterable[str], inner_hits: bool = False) -> source.SourcePlan:
+        """Plan the fewest `_source` include/exclude patterns which return the fields.
+
+        Example:
+            plan = mapper.plan_source(["case_id", "files.file_id"])
+            search = {"query": ..., "_source": plan.source}
+
+        The plans are memoized per mapper, see source.SourcePlanner.
+
+        Args:
+            fields: The dotted paths of the requested fields.
+            inner_hits: If true, the fields within nested objects are planned as the
+                _source of the inner hits of their innermost nested scope instead of the
+                top level _source.
+
+        Returns:
+            The plan of the _source filtering.
+
+        Raises:
+            ValueError: If any of the fields are not within the mapping.
+        """
+        if self._source_planner is None:
+            self._source_planner = source.SourcePlanner(self.fields())
+
+        return self._source_planner.plan(fields, inner_hits)
+
+    def _select_paths(self, doc_type: str) -> Mapping[str, esmodels.Property]:
+        """Get every path ending with the given doc_type and its property definition.
+
+        The paths are indexed by property name on first use, which assumes the mapping is
+        not modified afterwards.
+
+        Args:
+            doc_type: The name of the property, or a dotted path suffix.
+
+        Returns:
+            The paths (in the order they are walked) and their property definitions.
+        """
+        if self._paths is None:
+            self._paths = _index_paths(self._mapping)
+
+        name = doc_type.rpartition(".")[2]
+        mappings = self._paths.get(name, {})
+
+        if name != doc_type:
+            return {p: m for p, m in mappings.items() if p.endswith(f".{doc_type}")}
+
+        return mappings
+
     def select_mapping(
         self,
         doc_type: str,
@@ -104,16 +304,41 @@ class ModelMapper:
         if self.doc_type in [doc_type, f"{doc_type}_centric"]:
             return self.mappings
 
-        mappings = {p: m for p, m in _walk_mapping(self.mappings) if p.endswith(f".{doc_type}")}
+        mappings = self._select_paths(doc_type)
 
         if callable(selector):
             paths = selector(mappings.keys())
         elif isinstance(selector, str):
-            pattern = re.compile(rf"\.{selector}\.")
-            paths = filter(pattern.search, mappings.keys())
+            paths = filter(_selector_pattern(selector).search, mappings.keys())
         else:
             paths = mappings.keys()
 
         selected_path = more_itertools.one(paths)
 
         return mappings[selected_path]
+
+    def select_mappings(
+        self, selectors: Mapping[str, Optional[Selector]]
+    ) -> Dict[str, Union[esmodels.ESMapping, esmodels.Property]]:
+        """Select the sub-mappings of several doc_types at once.
+
+        Example:
+            mapper.select_mappings({"ssm": None, "observation": "ssm", "gene": None})
+
+        All doc_types are resolved from the same index of the mapping's paths, which is
+        built by a single walk of the mapping (see select_mapping).
+
+        Args:
+            selectors: The doc_types mapped to the selector of each, or None.
+
+        Returns:
+            The doc_types mapped to their mapping or property definition.
+
+        Raises:
+            ValueError: If no path or several paths are selected for any doc_type, as
+                raised by more_itertools.one.
+        """
+        return {
+            doc_type: self.select_mapping(doc_type, selector)
+            for doc_type, selector in selectors.items()
+        }
@@ -0,0 +1,193 @@
+"""Diff mappings (or settings) in a single pass over their trees.
+
+Unlike deepdiff, which handles any python objects, the diff only knows of the dicts,
+lists and scalars the mappings are made of: dicts are compared key by key, and any other
+value is compared as a whole.
+
+    diff = mapping_diff.diff_mappings(old_mapping, new_mapping)
+
+    diff.removed  # {("properties", "foo"): {"type": "keyword"}}
+    diff.property_paths().changed  # ("bar",)
+
+The properties removed from a mapping can be emitted in the format of the vestigial
+files (see gdcmodels.vestigial), so that applying them to the new mapping restores them.
+"""
+
+import itertools
+from typing import Any, Dict, Mapping, NamedTuple, Tuple
+
+from gdcmodels import vestigial
+
+
+class PropertyPaths(NamedTuple):
+    """The dotted paths of the properties which differ between two mappings.
+
+    Attributes:
+        added: The properties only within the new mapping.
+        removed: The properties only within the old mapping.
+        changed: The properties within both mappings whose definitions differ, e.g. by
+            their type or normalizer.
+    """
+
+    added: Tuple[str, ...]
+    removed: Tuple[str, ...]
+    changed: Tuple[str, ...]
+
+
+class MappingDiff(NamedTuple):
+    """The differences between two mappings, by key path.
+
+    A key path is the sequence of keys leading to a value, e.g. ("properties", "foo",
+    "type") for mapping["properties"]["foo"]["type"].
+
+    Attributes:
+        added: The values only within the new mapping.
+        removed: The values only within the old mapping.
+        changed: The (old, new) values within both mappings which differ. Dicts within
+            both mappings are never changed, only the values within them are.
+    """
+
+    added: Dict[vestigial.Path, Any]
+    removed: Dict[vestigial.Path, Any]
+    changed: Dict[vestigial.Path, Tuple[Any, Any]]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def property_paths(self) -> PropertyPaths:
+        """List the dotted paths of the properties which differ.
+
+        Returns:
+            The dotted paths of the added, removed and changed properties, in the order
+            they were found. Differences outside of the properties, e.g. of the dynamic
+            setting of the mapping, are left out.
+        """
+        added = [p for p in self.added if _is_property(p)]
+        removed = [p for p in self.removed if _is_property(p)]
+        changed = dict.fromkeys(
+            _owner(p)
+            for p in itertools.chain(self.changed, self.added, self.removed)
+            if p in self.changed or not _is_property(p)
+        )
+        changed.pop("", None)
+
+        return PropertyPaths(
+            tuple(map(_owner, added)), tuple(map(_owner, removed)), tuple(changed)
+        )
+
+    def attribute_changes(self) -> Dict[str, Tuple[Any, Any]]:
+        """List the (old, new) values of the attributes which differ.
+
+        An attribute is any value other than a property, e.g. the type of a property or
+        the dynamic setting of the mapping, and is named by the dotted path of its
+        property followed by its keys, e.g. "foo.bar.type" or "_source.excludes".
+
+        Returns:
+            The (old, new) values of the changed, added and removed attributes, None
+            standing for the values missing from either mapping. The attributes of the
+            added and removed properties are left out.
+        """
+        changes = {_attribute(p): values for p, values in self.changed.items()}
+        changes.update(
+            (_attribute(p), (None, value))
+            for p, value in self.added.items()
+            if not _is_property(p)
+        )
+        changes.update(
+            (_attribute(p), (value, None))
+            for p, value in self.removed.items()
+            if not _is_property(p)
+        )
+
+        return changes
+
+    def overlay(self) -> vestigial.Overlay:
+        """The overlay restoring the removed values, see vestigial.apply_overlay."""
+        return tuple(self.removed.items())
+
+    def vestigial_delta(self) -> Dict[str, Any]:
+        """The content of the vestigial file restoring the removed values.
+
+        Returns:
+            The delta in the format of the vestigial files, empty if nothing was removed.
+        """
+        if not self.removed:
+            return {}
+
+        return {
+            vestigial.ITEM_ADDED: {
+                vestigial.format_path(path): value for path, value in self.removed.items()
+            }
+        }
+
+
+def _is_property(path: vestigial.Path) -> bool:
+    """Check if a key path leads to a property, i.e. is made of (properties, name) pairs."""
+    return len(path) % 2 == 0 and all(k == "properties" for k in path[::2])
+
+
+def _owner(path: vestigial.Path) -> str:
+    """The dotted path of the innermost property containing a key path, "" if none does."""
+    end = 0
+
+    while end + 2 <= len(path) and path[end] == "properties":
+        end += 2
+
+    return ".".join(map(str, path[1:end:2]))
+
+
+def _attribute(path: vestigial.Path) -> str:
+    """The dotted path of an attribute, i.e. of its property followed by its keys."""
+    end = 0
+
+    while end + 2 <= len(path) and path[end] == "properties":
+        end += 2
+
+    return ".".join(map(str, (*path[1:end:2], *path[end:])))
+
+
+def diff_mappings(old: Mapping[str, Any], new: Mapping[str, Any]) -> MappingDiff:
+    """Diff two mappings.
+
+    Args:
+        old: The old mapping.
+        new: The new mapping.
+
+    Returns:
+        The differences between the mappings.
+    """
+    diff = MappingDiff({}, {}, {})
+    _diff(old, new, (), diff)
+
+    return diff
+
+
+def _diff(
+    old: Mapping[str, Any], new: Mapping[str, Any], path: vestigial.Path, diff: MappingDiff
+) -> None:
+    for key, value in old.items():
+        if key not in new:
+            diff.removed[(*path, key)] = value
+            continue
+
+        other = new[key]
+
+        if value is other:
+            continue
+
+        if isinstance(value, dict) and isinstance(other, dict):
+            _diff(value, other, (*path, key), diff)
+        elif value != other or not _same_kind(value, other):
+            diff.changed[(*path, key)] = (value, other)
+
+    for key, value in new.items():
+        if key not in old:
+            diff.added[(*path, key)] = value
+
+
+def _same_kind(one: Any, two: Any) -> bool:
+    """Check if equal values are of the same kind, e.g. 1 is not the same as True or 1.0."""
+    if isinstance(one, list) and isinstance(two, list):
+        return True
+
+    return type(one) is type(two)
@@ -1,8 +1,10 @@
+import itertools
 from typing import Dict
 
-import deepdiff
 import mergedeep
 
+from gdcmodels import mapping_diff
+
 
 def deep_merge_mapping_files(one: Dict, two: Dict) -> Dict:
     return mergedeep.merge(one, two, strategy=mergedeep.Strategy.ADDITIVE)
@@ -10,5 +12,16 @@ def deep_merge_mapping_files(one: Dict, two: Dict) -> Dict:
 
 def deep_diff_mapping_files(new: Dict, old: Dict) -> Dict:
     """Return the dictionary of things that are in the old dict and not in the new."""
-    diff = deepdiff.DeepDiff(new, old)
-    return {} + deepdiff.Delta(diff, force=True)
+    diff = mapping_diff.diff_mappings(new, old)
+    difference: Dict = {}
+
+    # The values changed between the dicts are part of the difference, as in the old dict
+    changed = ((path, values[1]) for path, values in diff.changed.items())
+
+    for path, value in itertools.chain(diff.added.items(), changed):
+        parent = difference
+        for key in path[:-1]:
+            parent = parent.setdefault(key, {})
+        parent[path[-1]] = value
+
+    return difference
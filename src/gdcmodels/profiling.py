@@ -0,0 +1,278 @@
+"""Instrumentation of the model loading path.
+
+Every stage of loading a model from the YAML files (reading and parsing the mapping,
+applying the vestigial properties, loading the descriptions and settings, ...) emits a
+StageEvent with its wall time, the number of bytes it read and, while tracemalloc is
+tracing, its peak memory. Events are passed to every registered hook and logged at the
+DEBUG level on the `gdcmodels.profiling` logger:
+
+    from gdcmodels import get_es_models, profiling
+
+    with profiling.record() as events:
+        get_es_models(cache=False)["case_centric"]["case_centric"].mappings
+
+    print(profiling.summarize(events))
+
+When no hook is registered and DEBUG logging is disabled, the instrumentation costs a
+single check per stage.
+
+NOTE: Models loaded within the worker processes of `get_es_models(workers=N)` do not
+emit events in the calling process.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# The stages of loading a model, in the order they occur.
+READ = "read"
+PARSE = "parse"
+VESTIGIAL = "vestigial"
+DESCRIPTIONS = "descriptions"
+SETTINGS = "settings"
+EXPAND_SETTINGS = "expand_settings"
+COMPILED = "compiled"
+
+STAGES = (READ, PARSE, VESTIGIAL, DESCRIPTIONS, SETTINGS, EXPAND_SETTINGS, COMPILED)
+
+
+class StageEvent(NamedTuple):
+    """The measurements of a single stage of loading a model.
+
+    Attributes:
+        index_name: The index being loaded.
+        doc_type: The doc_type being loaded, None for stages shared by the whole index
+            (settings and descriptions).
+        stage: The name of the stage, one of STAGES.
+        seconds: The wall time spent within the stage.
+        bytes_read: The number of bytes read from the model files during the stage.
+        peak_memory: The peak memory, in bytes, allocated during the stage. None if
+            tracemalloc is not tracing (or cannot reset its peak, prior to python 3.9).
+    """
+
+    index_name: str
+    doc_type: Optional[str]
+    stage: str
+    seconds: float
+    bytes_read: int
+    peak_memory: Optional[int]
+
+
+Hook = Callable[[StageEvent], None]
+
+_hooks: List[Hook] = []
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook: Hook) -> None:
+    """Register a hook called with every StageEvent emitted within this process.
+
+    Args:
+        hook: The hook to register.
+    """
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    """Unregister a hook registered with add_hook.
+
+    Args:
+        hook: The hook to unregister.
+
+    Raises:
+        ValueError: If the hook is not registered.
+    """
+    with _hooks_lock:
+        _hooks.remove(hook)
+
+
+@contextlib.contextmanager
+def record() -> Iterator[List[StageEvent]]:
+    """Collect every StageEvent emitted within the context.
+
+    Yields:
+        The list to which the events are appended.
+    """
+    events: List[StageEvent] = []
+    add_hook(events.append)
+
+    try:
+        yield events
+    finally:
+        remove_hook(events.append)
+
+
+def enabled() -> bool:
+    """Check if any consumer of StageEvents is registered.
+
+    Returns:
+        True if there is a hook registered or DEBUG logging is enabled.
+    """
+    return bool(_hooks) or logger.isEnabledFor(logging.DEBUG)
+
+
+class _Stage:
+    """The measurement of a stage in progress, see stage."""
+
+    __slots__ = ("bytes_read",)
+
+    def __init__(self) -> None:
+        self.bytes_read = 0
+
+    def read(self, content: bytes) -> bytes:
+        """Account for content read from a model file.
+
+        Args:
+            content: The content which was read.
+
+        Returns:
+            The given content.
+        """
+        self.bytes_read += len(content)
+        return content
+
+
+class _NullStage(_Stage):
+    """A stage which measures nothing, used when profiling is disabled."""
+
+    __slots__ = ()
+
+    def read(self, content: bytes) -> bytes:
+        return content
+
+
+_NULL_STAGE = _NullStage()
+
+
+def _emit(event: StageEvent) -> None:
+    logger.debug(
+        "%s/%s %s: %.6fs, %d bytes read, peak memory %s",
+        event.index_name,
+        event.doc_type or "*",
+        event.stage,
+        event.seconds,
+        event.bytes_read,
+        event.peak_memory,
+    )
+
+    for hook in tuple(_hooks):
+        hook(event)
+
+
+@contextlib.contextmanager
+def stage(index_name: str, doc_type: Optional[str], name: str) -> Iterator[_Stage]:
+    """Measure a stage of loading a model.
+
+    Stages are not meant to be nested, as measuring the peak memory of a stage resets
+    the peak traced by tracemalloc.
+
+    Args:
+        index_name: The index being loaded.
+        doc_type: The doc_type being loaded, None for stages shared by the whole index.
+        name: The name of the stage.
+
+    Yields:
+        The stage, through which any content read from the model files is accounted for.
+    """
+    if not enabled():
+        yield _NULL_STAGE
+        return
+
+    # NOTE: tracemalloc.reset_peak is only available from python 3.9
+    reset_peak = getattr(tracemalloc, "reset_peak", None)
+    tracing = reset_peak is not None and tracemalloc.is_tracing()
+
+    if tracing:
+        reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+
+    current = _Stage()
+    start = time.perf_counter()
+
+    yield current
+
+    seconds = time.perf_counter() - start
+    peak_memory = tracemalloc.get_traced_memory()[1] - start_memory if tracing else None
+
+    _emit(StageEvent(index_name, doc_type, name, seconds, current.bytes_read, peak_memory))
+
+
+def summarize(events: Iterable[StageEvent]) -> Dict[str, Dict[str, Any]]:
+    """Aggregate the events per index.
+
+    Args:
+        events: The events to aggregate.
+
+    Returns:
+        For each index, the number of doc_types loaded, the total seconds spent within
+        each stage, the total seconds and bytes read and the largest peak memory of any
+        of its stages (None if memory was not traced).
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+
+    for event in events:
+        index = summary.setdefault(
+            event.index_name,
+            {
+                "doc_types": set(),
+                "stages": {},
+                "seconds": 0.0,
+                "bytes_read": 0,
+                "peak_memory": None,
+            },
+        )
+
+        if event.doc_type:
+            index["doc_types"].add(event.doc_type)
+
+        index["stages"][event.stage] = index["stages"].get(event.stage, 0.0) + event.seconds
+        index["seconds"] += event.seconds
+        index["bytes_read"] += event.bytes_read
+
+        if event.peak_memory is not None:
+            index["peak_memory"] = max(index["peak_memory"] or 0, event.peak_memory)
+
+    for index in summary.values():
+        index["doc_types"] = len(index["doc_types"])
+
+    return summary
+
+
+def format_table(summary: Dict[str, Dict[str, Any]]) -> str:
+    """Format the summary of the events as a table with a row per index.
+
+    Args:
+        summary: The summary returned by summarize.
+
+    Returns:
+        The table, with the time spent within each stage in milliseconds.
+    """
+    stages = [s for s in STAGES if any(s in i["stages"] for i in summary.values())]
+    header = ["index", "doc_types", *stages, "total", "read (KiB)", "peak (KiB)"]
+    rows = []
+
+    for index_name, index in sorted(summary.items(), key=lambda i: -i[1]["seconds"]):
+        peak_memory = index["peak_memory"]
+        rows.append(
+            [
+                index_name,
+                str(index["doc_types"]),
+                *(f"{index['stages'].get(s, 0.0) * 1000:.1f}" for s in stages),
+                f"{index['seconds'] * 1000:.1f}",
+                f"{index['bytes_read'] / 1024:.1f}",
+                "-" if peak_memory is None else f"{peak_memory / 1024:.1f}",
+            ]
+        )
+
+    widths = [max(len(r[i]) for r in (header, *rows)) for i in range(len(header))]
+
+    return "\n".join(
+        "  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(r, widths)))
+        for r in (header, *rows)
+    )
@@ -0,0 +1,230 @@
+"""A process-wide registry of shared, deeply immutable models.
+
+Every call to `get_es_models` builds new mutable mappings, which forces callers that
+share them to defensively copy. The registry instead hands out a single, frozen copy of
+each model to every caller in the process:
+
+    from gdcmodels import registry
+
+    mappings = registry.get_models()["case_centric"]["case_centric"].mappings
+    mappings["properties"] = {}  # TypeError
+
+Callers which need to modify a model can `thaw` it. Thawing is copy-on-write: only the
+levels of the mapping which are actually accessed are copied, everything else is shared
+with the frozen model. `copy.deepcopy` of a frozen (or thawed) value returns plain,
+fully mutable dicts and lists.
+"""
+
+import functools
+import types
+from typing import Any, Dict, Iterable, List, Mapping, NoReturn, Tuple
+
+from gdcmodels import extraction, mapper
+
+
+def _immutable(self: Any, *args: Any, **kwargs: Any) -> NoReturn:
+    raise TypeError(
+        f"'{type(self).__name__}' object is immutable, use registry.thaw to get a mutable copy"
+    )
+
+
+class FrozenDict(Dict[str, Any]):
+    """An immutable dict.
+
+    This subclasses dict, rather than only implementing Mapping, so that it can be used
+    anywhere a dict is expected (e.g. serialized to JSON by the elasticsearch client).
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, Any]:
+        return _unfreeze(self)
+
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[str, Any]]]:
+        return type(self), (dict(self),)
+
+
+class FrozenList(List[Any]):
+    """An immutable list, see FrozenDict."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = clear = extend = insert = pop = remove = reverse = sort = _immutable
+
+    def __copy__(self) -> "FrozenList":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> List[Any]:
+        return _unfreeze(self)
+
+    def __reduce__(self) -> Tuple[type, Tuple[List[Any]]]:
+        return type(self), (list(self),)
+
+
+class ThawedDict(Dict[str, Any]):
+    """A mutable, copy-on-write copy of a FrozenDict.
+
+    Only the top level is copied when thawing. Any frozen value is replaced by its own
+    thawed copy when it is accessed, so only the parts of a mapping which are walked
+    are ever copied.
+    """
+
+    __slots__ = ()
+
+    def _thaw(self, key: str, value: Any) -> Any:
+        thawed = thaw(value)
+
+        if thawed is not value:
+            super().__setitem__(key, thawed)
+
+        return thawed
+
+    def _thaw_all(self) -> None:
+        for key, value in list(super().items()):
+            self._thaw(key, value)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._thaw(key, super().__getitem__(key))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+
+        return self[key]
+
+    def pop(self, key: str, *default: Any) -> Any:
+        return thaw(super().pop(key, *default))
+
+    def popitem(self) -> Tuple[str, Any]:
+        key, value = super().popitem()
+        return key, thaw(value)
+
+    def values(self):  # type: ignore
+        self._thaw_all()
+        return super().values()
+
+    def items(self):  # type: ignore
+        self._thaw_all()
+        return super().items()
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, Any]:
+        return _unfreeze(self)
+
+
+def freeze(value: Any) -> Any:
+    """Make a deeply immutable copy of the given value.
+
+    Args:
+        value: The value to freeze, made up of dicts, lists and scalars.
+
+    Returns:
+        The value with every dict replaced by a FrozenDict and list by a FrozenList.
+    """
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(map(freeze, value))
+
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Make a mutable, copy-on-write copy of the given frozen value.
+
+    Args:
+        value: The value to thaw.
+
+    Returns:
+        A ThawedDict for a FrozenDict, a list for a FrozenList and the value itself
+        otherwise.
+    """
+    if isinstance(value, FrozenDict):
+        return ThawedDict(value)
+    if isinstance(value, FrozenList):
+        return [thaw(v) for v in value]
+
+    return value
+
+
+def _unfreeze(value: Any) -> Any:
+    """Make a plain, deeply mutable copy of the given value."""
+    if isinstance(value, dict):
+        return {k: _unfreeze(v) for k, v in dict.items(value)}
+    if isinstance(value, list):
+        return [_unfreeze(v) for v in value]
+
+    return value
+
+
+class _SharedFreezer:
+    """Freezes the values shared between the models of an index only once.
+
+    The settings and descriptions of an index are the same objects for all of its
+    doc_types, so they are frozen once and the frozen copy shared between the models.
+    """
+
+    __slots__ = ("_frozen",)
+
+    def __init__(self) -> None:
+        self._frozen: Dict[int, Tuple[Any, Any]] = {}
+
+    def __call__(self, value: Any) -> Any:
+        # Keep a reference to the value so that its id is never reused
+        if id(value) not in self._frozen:
+            self._frozen[id(value)] = (value, freeze(value))
+
+        return self._frozen[id(value)][1]
+
+    def freeze_model(self, model: mapper.ModelMapper) -> mapper.ModelMapper:
+        mapping = FrozenDict(
+            (k, self._freeze_meta(v) if k == "_meta" else freeze(v))
+            for k, v in model.mappings.items()
+        )
+
+        return mapper.ModelMapper(
+            model.index_name,
+            model.doc_type,
+            self(model.settings),
+            mapping,
+            # NOTE: Loaded eagerly so that the unfrozen model is not kept alive
+            descriptions=self(model.descriptions),
+        )
+
+    def _freeze_meta(self, meta: Mapping[str, Any]) -> FrozenDict:
+        return FrozenDict(
+            (k, self(v) if k == "descriptions" else freeze(v)) for k, v in meta.items()
+        )
+
+
+@functools.lru_cache(None)
+def get_models(vestigial_included: bool = True) -> Mapping[str, Mapping[str, mapper.ModelMapper]]:
+    """Get the process-wide shared models.
+
+    Every call returns the same models, whose mappings and settings are deeply frozen.
+    As with get_es_models, each model is only loaded on first access.
+
+    Args:
+        vestigial_included: If true the vestigial properties will be added to the
+            models. Otherwise, they are omitted.
+
+    Returns:
+        The frozen models/mappings associated with the indices configured within
+        gdc-models.
+    """
+    indices: Iterable[Tuple[str, Any]] = extraction.get_es_models(vestigial_included).items()
+
+    return types.MappingProxyType(
+        {index_name: models.map(_SharedFreezer().freeze_model) for index_name, models in indices}
+    )
@@ -0,0 +1,242 @@
+"""Plan the `_source` filtering of searches from the fields they request.
+
+Given the dotted fields a request needs, the planner returns the fewest `_source`
+include/exclude patterns which return exactly those fields:
+
+    plan = mapper.plan_source(["case_id", "files.file_id", "files.access"])
+
+    plan.source  # {"includes": ["case_id", "files.access", "files.file_id"]}
+
+An object is included as a whole when all of its fields are requested, and included
+with exclusions when that takes fewer patterns than listing the requested fields. The
+fields within nested objects can instead be planned as the `_source` of the inner hits
+of their innermost nested scope, so that only the matching nested documents are fetched.
+
+Plans are memoized in a bounded LRU cache keyed by the normalized set of fields.
+"""
+
+import functools
+import itertools
+import types
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Set,
+    Tuple,
+    Union,
+)
+
+from gdcmodels import catalog, esmodels
+
+_FULL, _PARTIAL, _NONE = range(3)
+
+
+class SourcePlan(NamedTuple):
+    """The `_source` filtering of a search.
+
+    Attributes:
+        includes: The include patterns, empty if no field is fetched from the top level
+            _source.
+        excludes: The exclude patterns.
+        inner_hits: The nested scopes mapped to the plan of the _source of their inner
+            hits, when planned with inner hits.
+    """
+
+    includes: Tuple[str, ...]
+    excludes: Tuple[str, ...] = ()
+    inner_hits: Mapping[str, "SourcePlan"] = types.MappingProxyType({})
+
+    @property
+    def source(self) -> Union[bool, Dict[str, List[str]]]:
+        """The value of the `_source` parameter of the search (or inner hits)."""
+        if not self.includes:
+            return False
+
+        source = {"includes": list(self.includes)}
+
+        if self.excludes:
+            source["excludes"] = list(self.excludes)
+
+        return source
+
+
+class SourcePlanner:
+    """Plans the `_source` filtering of the fields of a mapping.
+
+    NOTE: Instances of this class should be used via `ModelMapper.plan_source`
+    """
+
+    __slots__ = ("_fields", "_children", "_plan")
+
+    def __init__(self, fields: catalog.FieldCatalog, maxsize: int = 1024) -> None:
+        """Build the planner.
+
+        Args:
+            fields: The catalog of the mapping's fields.
+            maxsize: The maximum number of plans memoized.
+        """
+        self._fields = fields
+        self._children: Dict[str, List[str]] = {}
+
+        for path in fields.paths:
+            parent = path.rpartition(".")[0]
+
+            if not parent or fields[parent].type in esmodels.OBJECT_TYPES:
+                self._children.setdefault(parent, []).append(path)
+
+        self._plan = functools.lru_cache(maxsize)(self._build_plan)
+
+    def normalize(self, fields: Iterable[str]) -> FrozenSet[str]:
+        """Normalize the requested fields into the set of _source fields they need.
+
+        Multi-fields are replaced by their field, and fields within another requested
+        object are dropped.
+
+        Args:
+            fields: The dotted paths of the requested fields.
+
+        Returns:
+            The normalized fields.
+
+        Raises:
+            ValueError: If any of the fields are not within the mapping.
+        """
+        fields = set(fields)
+        unknown = fields - self._fields.keys()
+
+        if unknown:
+            raise ValueError(f"Unknown fields: {sorted(unknown)}")
+
+        normalized = set()
+
+        for path in fields:
+            parent = path.rpartition(".")[0]
+
+            # Multi-fields are not part of the _source, their field is
+            while parent and self._fields[parent].type not in esmodels.OBJECT_TYPES:
+                path, parent = parent, parent.rpartition(".")[0]
+
+            normalized.add(path)
+
+        return frozenset(p for p in normalized if not any(a in normalized for a in _ancestors(p)))
+
+    def plan(self, fields: Iterable[str], inner_hits: bool = False) -> SourcePlan:
+        """Plan the `_source` filtering which returns the given fields.
+
+        Args:
+            fields: The dotted paths of the requested fields.
+            inner_hits: If true, the fields within nested objects are planned as the
+                _source of the inner hits of their innermost nested scope instead of the
+                top level _source.
+
+        Returns:
+            The memoized plan.
+
+        Raises:
+            ValueError: If any of the fields are not within the mapping.
+        """
+        return self._plan(self.normalize(fields), inner_hits)
+
+    def cache_info(self) -> Any:
+        """The statistics of the cache of plans, see functools.lru_cache."""
+        return self._plan.cache_info()
+
+    def _build_plan(self, fields: FrozenSet[str], inner_hits: bool) -> SourcePlan:
+        if not inner_hits:
+            return SourcePlan(*self._patterns(fields))
+
+        scopes = self._fields.group_by_nested_scope(sorted(fields))
+        top_level = scopes.pop((), [])
+
+        return SourcePlan(
+            *self._patterns(frozenset(top_level)),
+            inner_hits=types.MappingProxyType(
+                {
+                    scope[-1]: SourcePlan(*self._patterns(frozenset(paths)))
+                    for scope, paths in scopes.items()
+                }
+            ),
+        )
+
+    def _patterns(self, fields: FrozenSet[str]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """Find the fewest include/exclude patterns which select exactly the fields."""
+        touched = set(itertools.chain.from_iterable(map(_ancestors, fields)))
+        states: Dict[str, int] = {}
+
+        def state(path: str) -> int:
+            if path not in states:
+                if path in fields:
+                    states[path] = _FULL
+                elif path not in touched:
+                    states[path] = _NONE
+                else:
+                    children = self._children[path]
+                    full = all(state(c) == _FULL for c in children)
+                    states[path] = _FULL if full else _PARTIAL
+
+            return states[path]
+
+        def exclude(path: str) -> List[str]:
+            excludes = []
+
+            for child in self._children[path]:
+                if state(child) == _NONE:
+                    excludes.append(child)
+                elif state(child) == _PARTIAL:
+                    excludes.extend(exclude(child))
+
+            return excludes
+
+        def include(path: str) -> Tuple[List[str], List[str]]:
+            if state(path) == _FULL:
+                return [path], []
+            if state(path) == _NONE:
+                return [], []
+
+            includes: List[str] = []
+            excludes: List[str] = []
+
+            for child in self._children[path]:
+                child_includes, child_excludes = include(child)
+                includes.extend(child_includes)
+                excludes.extend(child_excludes)
+
+            excluded = exclude(path)
+
+            if 1 + len(excluded) < len(includes) + len(excludes):
+                return [path], excluded
+
+            return includes, excludes
+
+        includes: List[str] = []
+        excludes: List[str] = []
+
+        for path in self._children.get("", ()):
+            path_includes, path_excludes = include(path)
+            includes.extend(path_includes)
+            excludes.extend(path_excludes)
+
+        if fields:
+            excluded = exclude("") if "" in touched else []
+
+            if 1 + len(excluded) < len(includes) + len(excludes):
+                includes, excludes = ["*"], excluded
+
+        return tuple(sorted(includes)), tuple(sorted(excludes))
+
+
+def _ancestors(path: str) -> Iterable[str]:
+    """List the paths of the objects containing the given path, including the root ""."""
+    ancestors: Set[str] = {""}
+    parent = path.rpartition(".")[0]
+
+    while parent:
+        ancestors.add(parent)
+        parent = parent.rpartition(".")[0]
+
+    return ancestors
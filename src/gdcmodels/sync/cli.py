@@ -1,15 +1,15 @@
 """The basic cli functionality for the sync."""
 
 import collections
+import copy
 import itertools
 import sys
 import types
 from typing import AbstractSet, Any, Mapping, Optional, Sequence, Union
 
 import click
-import deepdiff
 
-from gdcmodels import esmodels, extraction_utils
+from gdcmodels import esmodels, extraction_utils, mapping_diff
 from gdcmodels.sync import common, gene_expression, graph, viz
 
 if sys.version_info < (3, 9):
@@ -30,29 +30,11 @@ INDICES = tuple(SYNCHRONIZERS.keys())
 DOC_TYPES = tuple(itertools.chain.from_iterable(v.keys() for v in SYNCHRONIZERS.values()))
 
 
-class VestigialDelta(deepdiff.Delta):
-    """A custom Delta object which only writes the items added to the dictionary."""
-
-    def __init__(self, diff) -> None:
-        super().__init__(
-            diff,
-            serializer=lambda *args: extraction_utils.dump_yaml(*args),
-        )
-
-    def dumps(self):
-        # NOTE: The vestigial data is only data which must be added to the current
-        #       dictionary.
-        if "dictionary_item_added" in self.diff:
-            return self.serializer({"dictionary_item_added": self.diff["dictionary_item_added"]})
-
-        return self.serializer({})
-
-
 def _write_files(
     index_name: str,
     doc_type: str,
     mapping: esmodels.ESMapping,
-    delta: deepdiff.Delta,
+    delta: mapping_diff.MappingDiff,
     settings: Mapping[str, Any],
     descriptions: Optional[Mapping[str, Any]],
 ) -> None:
@@ -62,7 +44,8 @@ def _write_files(
         index_name: The index name of the associated with the data.
         doc_type: The doc-type name of the associated with the data.
         mapping: The mapping of the index.
-        delta: The delta object representing any vestigial data.
+        delta: The diff of the existing mapping against the synced one, whose removed
+            properties are the vestigial data.
         settings: The settings with which the index needs to be configured.
         descriptions: Any optional descriptions associated with the index.
     """
@@ -76,18 +59,35 @@ def _write_files(
     with resources.as_file(settings_file) as file, open(file, "w") as f:
         extraction_utils.dump_yaml(settings, f)
 
-    if delta.diff:
+    if delta:
         with resources.as_file(mapping_file) as file, open(file, "w") as f:
             extraction_utils.dump_yaml(mapping, f)
 
         with resources.as_file(vestigial_file) as file, open(file, "w") as f:
-            delta.dump(f)
+            extraction_utils.dump_yaml(delta.vestigial_delta(), f)
 
     if descriptions:
         with resources.as_file(descriptions_file) as file, open(file, "w") as f:
             extraction_utils.dump_yaml(descriptions, f)
 
 
+def compute_delta(
+    new_mapping: esmodels.ESMapping, old_mapping: esmodels.ESMapping
+) -> mapping_diff.MappingDiff:
+    """Compute the vestigial delta between the synced and the existing mapping.
+
+    Args:
+        new_mapping: The synced mapping.
+        old_mapping: The existing mapping, including its vestigial properties.
+
+    Returns:
+        The diff of the existing mapping against the synced one. Its removed values are
+        the properties of the existing mapping which no longer exist within the synced
+        mapping, written as the vestigial delta (see MappingDiff.vestigial_delta).
+    """
+    return mapping_diff.diff_mappings(old_mapping, new_mapping)
+
+
 def run_synchronization(index_name: str, doc_type: str) -> None:
     """Run the synchronization of the index/doc-type.
 
@@ -96,17 +96,15 @@ def run_synchronization(index_name: str, doc_type: str) -> None:
         doc_type: The doc type associated with the index.
     """
     mapper = common.load_models()[index_name][doc_type]
-    old_mapping, old_settings = mapper.mappings, mapper.settings
+    # The shared models are frozen, so work on plain copies of them
+    old_mapping, old_settings = copy.deepcopy(mapper.mappings), copy.deepcopy(mapper.settings)
     _ = old_mapping.pop("_meta", None)
 
     synchronizer = SYNCHRONIZERS[index_name][doc_type]
     new_mapping, new_settings = synchronizer.sync(old_mapping, old_settings)
     descriptions = new_mapping.pop("_meta", {"descriptions": {}}).get("descriptions")
 
-    diff = deepdiff.DeepDiff(new_mapping, old_mapping)
-    delta = VestigialDelta(diff)
-
-    assert (new_mapping + delta) == old_mapping
+    delta = compute_delta(new_mapping, old_mapping)
 
     _write_files(index_name, doc_type, new_mapping, delta, new_settings, descriptions)
 
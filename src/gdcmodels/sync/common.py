@@ -7,8 +7,7 @@ from typing import Any, Container, Dict, Iterable, Mapping, Optional, Tuple, Typ
 import mergedeep
 from typing_extensions import Protocol
 
-import gdcmodels
-from gdcmodels import common, esmodels, extraction_utils, mapper
+from gdcmodels import common, esmodels, extraction_utils, mapper, registry
 
 if sys.version_info < (3, 9):
     import importlib_resources as resources
@@ -20,14 +19,15 @@ Export = Tuple[esmodels.ESMapping, Mapping[str, Any]]
 TMapping = TypeVar("TMapping", bound=Mapping[str, Any])
 
 
-@functools.lru_cache(None)
 def load_models() -> Mapping[str, Mapping[str, mapper.ModelMapper]]:
-    """Call get_es_models and manage cache of the results.
+    """Get the shared models from the registry.
+
+    NOTE: The models are frozen, use registry.thaw or copy.deepcopy to modify them.
 
     Returns:
         The loaded models.
     """
-    return gdcmodels.get_es_models(vestigial_included=True)
+    return registry.get_models(vestigial_included=True)
 
 
 def apply_defaults(mapping: TMapping, *defaults: Mapping[str, object]) -> TMapping:
@@ -0,0 +1,417 @@
+"""Validate documents against a model's mapping before they are indexed.
+
+The mapping is compiled once into a tree of check functions, one per property, so that
+validating a document only walks the document itself:
+
+    validator = validation.compile_validator(mapper.mappings)
+
+    validator.validate({"case_id": 1, "unknown": "foo"})
+    # [FieldError("case_id", "type", ...), FieldError("unknown", "unknown_field", ...)]
+
+A document is checked for the same errors elasticsearch rejects it for: fields unknown
+to a `dynamic: strict` object, values of the wrong type (with elasticsearch's default
+coercion of numeric and boolean strings) and scalars given for objects or vice versa.
+
+NDJSON streams are validated in batches, optionally across a pool of processes, with
+validate_ndjson.
+"""
+
+import collections
+import concurrent.futures
+import functools
+import itertools
+import json
+import math
+from typing import (
+    Any,
+    Callable,
+    Counter,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import more_itertools
+
+from gdcmodels import esmodels
+
+# The kinds of errors found within documents.
+UNKNOWN_FIELD = "unknown_field"
+TYPE = "type"
+SHAPE = "shape"
+
+
+class FieldError(NamedTuple):
+    """An error found within a document.
+
+    Attributes:
+        path: The dotted path of the field.
+        kind: The kind of error, one of UNKNOWN_FIELD, TYPE or SHAPE.
+        message: The description of the error.
+    """
+
+    path: str
+    kind: str
+    message: str
+
+
+Errors = List[FieldError]
+Check = Callable[[Any, str, Errors], None]
+
+
+def _describe(value: Any) -> str:
+    if isinstance(value, dict):
+        return "an object"
+    if isinstance(value, list):
+        return "an array"
+
+    return f"{type(value).__name__} {value!r:.40}"
+
+
+def _is_integer(value: Any, coerce: bool) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return True
+    if not coerce:
+        return False
+    # NOTE: elasticsearch coerces any finite number, truncating its fraction
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if isinstance(value, str):
+        try:
+            return math.isfinite(float(value))
+        except ValueError:
+            return False
+
+    return False
+
+
+def _is_float(value: Any, coerce: bool) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    if coerce and isinstance(value, str):
+        try:
+            float(value)
+        except ValueError:
+            return False
+
+        return True
+
+    return False
+
+
+def _is_boolean(value: Any, coerce: bool) -> bool:
+    return isinstance(value, bool) or (coerce and value in ("true", "false", ""))
+
+
+def _is_string(value: Any, coerce: bool) -> bool:
+    # NOTE: elasticsearch always indexes numbers and booleans given for string fields
+    return isinstance(value, (str, int, float))
+
+
+def _is_date(value: Any, coerce: bool) -> bool:
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+def _is_scalar(value: Any, coerce: bool) -> bool:
+    return not isinstance(value, dict)
+
+
+def _compile_leaf(property_type: str, coerce: bool) -> Check:
+    """Compile the check of a field holding scalars of the given type."""
+    if property_type in esmodels.INTEGER_TYPES:
+        is_valid = _is_integer
+    elif property_type in esmodels.FLOAT_TYPES:
+        is_valid = _is_float
+    elif property_type == "boolean":
+        is_valid = _is_boolean
+    elif property_type in esmodels.STRING_TYPES:
+        is_valid = _is_string
+    elif property_type == "date":
+        is_valid = _is_date
+    else:
+        # Any other type is accepted as is, only its shape is checked
+        is_valid = _is_scalar
+
+    def check(value: Any, path: str, errors: Errors) -> None:
+        if value is None:
+            return
+
+        if isinstance(value, list):
+            for item in value:
+                check(item, path, errors)
+        elif isinstance(value, dict):
+            errors.append(FieldError(path, SHAPE, f"expected {property_type}, got an object"))
+        elif not is_valid(value, coerce):
+            errors.append(
+                FieldError(path, TYPE, f"expected {property_type}, got {_describe(value)}")
+            )
+
+    return check
+
+
+def _compile_object(
+    properties: esmodels.Properties, dynamic: Any, property_type: str, coerce: bool, prefix: str
+) -> Check:
+    """Compile the check of an object, and of all of its properties.
+
+    Args:
+        properties: The properties of the object.
+        dynamic: The dynamic setting of the object, inherited from its parents.
+        property_type: The type of the object, object or nested.
+        coerce: A flag which determine if values elasticsearch coerces are valid.
+        prefix: The dotted path of the object, including the trailing dot.
+
+    Returns:
+        The check of the object.
+    """
+    checks: Dict[str, Check] = {}
+    paths: Dict[str, str] = {}
+
+    for name, property in properties.items():
+        paths[name] = f"{prefix}{name}"
+        checks[name] = _compile_property(property, dynamic, coerce, paths[name])
+
+    strict = str(dynamic).lower() == "strict"
+
+    def check(value: Any, path: str, errors: Errors) -> None:
+        if value is None:
+            return
+
+        if isinstance(value, list):
+            for item in value:
+                check(item, path, errors)
+        elif not isinstance(value, dict):
+            errors.append(
+                FieldError(path, SHAPE, f"expected {property_type}, got {_describe(value)}")
+            )
+        else:
+            for name, field in value.items():
+                field_check = checks.get(name)
+
+                if field_check is not None:
+                    field_check(field, paths[name], errors)
+                elif strict:
+                    errors.append(FieldError(f"{prefix}{name}", UNKNOWN_FIELD, "unknown field"))
+
+    return check
+
+
+def _compile_property(
+    property: esmodels.Property, dynamic: Any, coerce: bool, path: str
+) -> Check:
+    property_type = property.get("type", "object")
+
+    if property_type in esmodels.OBJECT_TYPES or "properties" in property:
+        return _compile_object(
+            property.get("properties", {}),
+            property.get("dynamic", dynamic),
+            property_type,
+            coerce,
+            f"{path}.",
+        )
+
+    return _compile_leaf(property_type, coerce)
+
+
+class Validator:
+    """A validator of documents compiled from a mapping."""
+
+    __slots__ = ("_check",)
+
+    def __init__(
+        self, mapping: Union[esmodels.ESMapping, Mapping[str, Any]], coerce: bool = True
+    ) -> None:
+        """Compile the validator.
+
+        Args:
+            mapping: The mapping the documents must conform to.
+            coerce: If true (as is the default of elasticsearch), numeric and boolean
+                strings are valid values of numeric and boolean fields.
+        """
+        self._check = _compile_object(
+            mapping.get("properties", {}), mapping.get("dynamic", True), "object", coerce, ""
+        )
+
+    def validate(self, document: Any) -> Errors:
+        """Validate a document.
+
+        Args:
+            document: The document to validate.
+
+        Returns:
+            The errors found within the document, empty if it is valid.
+        """
+        errors: Errors = []
+        self._check(document, "", errors)
+
+        return errors
+
+
+def compile_validator(
+    mapping: Union[esmodels.ESMapping, Mapping[str, Any]], coerce: bool = True
+) -> Validator:
+    """Compile the validator of the documents of the given mapping.
+
+    Args:
+        mapping: The mapping the documents must conform to, e.g. ModelMapper.mappings.
+        coerce: If true (as is the default of elasticsearch), numeric and boolean strings
+            are valid values of numeric and boolean fields.
+
+    Returns:
+        The compiled validator.
+    """
+    return Validator(mapping, coerce)
+
+
+class ValidationReport(NamedTuple):
+    """The result of validating a stream of documents.
+
+    Attributes:
+        documents: The number of documents validated.
+        invalid_documents: The number of invalid documents.
+        invalid: The line numbers (starting at 1) of the first invalid documents, at most
+            max_invalid of them.
+        errors: The number of errors found per (path, kind).
+    """
+
+    documents: int
+    invalid_documents: int
+    invalid: List[int]
+    errors: Counter[Tuple[str, str]]
+
+    @property
+    def valid(self) -> bool:
+        return not self.invalid_documents
+
+
+# The validator of the worker processes of validate_ndjson.
+_worker_validator: Optional[Validator] = None
+
+
+def _init_worker(mapping: Mapping[str, Any], coerce: bool) -> None:
+    global _worker_validator
+    _worker_validator = Validator(mapping, coerce)
+
+
+def _validate_batch(
+    batch: Tuple[int, List[Union[str, bytes]]],
+    validator: Optional[Validator] = None,
+    max_invalid: Optional[int] = None,
+) -> ValidationReport:
+    """Validate a batch of NDJSON lines.
+
+    NOTE: This is run within the worker processes of validate_ndjson.
+
+    Args:
+        batch: The line number of the first line and the lines of the batch.
+        validator: The validator to use, defaulting to the worker's validator.
+        max_invalid: The maximum number of line numbers of invalid documents to keep, all
+            of them if None.
+
+    Returns:
+        The report of the batch.
+    """
+    validator = validator or _worker_validator
+    assert validator is not None
+
+    start, lines = batch
+    invalid: List[int] = []
+    errors: Counter[Tuple[str, str]] = collections.Counter()
+    documents = invalid_documents = 0
+
+    for number, line in enumerate(lines, start):
+        if not line.strip():
+            continue
+
+        documents += 1
+
+        try:
+            document_errors = validator.validate(json.loads(line))
+        except ValueError as e:
+            document_errors = [FieldError("", "json", str(e))]
+
+        if document_errors:
+            invalid_documents += 1
+            errors.update((e.path, e.kind) for e in document_errors)
+
+            if max_invalid is None or len(invalid) < max_invalid:
+                invalid.append(number)
+
+    return ValidationReport(documents, invalid_documents, invalid, errors)
+
+
+def validate_ndjson(
+    lines: Iterable[Union[str, bytes]],
+    mapping: Mapping[str, Any],
+    coerce: bool = True,
+    batch_size: int = 1000,
+    workers: Optional[int] = None,
+    max_invalid: Optional[int] = 1000,
+) -> ValidationReport:
+    """Validate a stream of NDJSON documents.
+
+    Args:
+        lines: The lines of the stream, one document per line. Blank lines are skipped.
+        mapping: The mapping the documents must conform to.
+        coerce: If true (as is the default of elasticsearch), numeric and boolean strings
+            are valid values of numeric and boolean fields.
+        batch_size: The number of lines validated per batch.
+        workers: If given, the batches are validated by a pool of this many processes,
+            each compiling its own validator. Otherwise, they are validated serially.
+        max_invalid: The maximum number of line numbers of invalid documents to keep, so
+            that the memory used stays flat however many documents are invalid. All of
+            them are kept if None.
+
+    Returns:
+        The report of all documents. Lines which are not valid JSON are counted as errors
+        of the kind "json".
+    """
+    batches: Iterator[Tuple[int, List[Union[str, bytes]]]] = (
+        (1 + i * batch_size, batch)
+        for i, batch in enumerate(more_itertools.chunked(lines, batch_size))
+    )
+
+    if workers:
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(mapping, coerce)
+        ) as executor:
+            # Bound the number of batches held in memory to a few per worker
+            reports: Iterable[ValidationReport] = itertools.chain.from_iterable(
+                executor.map(functools.partial(_validate_batch, max_invalid=max_invalid), chunk)
+                for chunk in more_itertools.chunked(batches, workers * 4)
+            )
+            return _merge(reports, max_invalid)
+
+    validator = Validator(mapping, coerce)
+    validate_batch = functools.partial(
+        _validate_batch, validator=validator, max_invalid=max_invalid
+    )
+
+    return _merge(map(validate_batch, batches), max_invalid)
+
+
+def _merge(reports: Iterable[ValidationReport], max_invalid: Optional[int]) -> ValidationReport:
+    documents = invalid_documents = 0
+    invalid: List[int] = []
+    errors: Counter[Tuple[str, str]] = collections.Counter()
+
+    for report in reports:
+        documents += report.documents
+        invalid_documents += report.invalid_documents
+        errors.update(report.errors)
+        # The batches are in order, so the first line numbers are kept
+        invalid.extend(
+            report.invalid[: None if max_invalid is None else max_invalid - len(invalid)]
+        )
+
+    return ValidationReport(documents, invalid_documents, invalid, errors)
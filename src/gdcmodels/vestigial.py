@@ -0,0 +1,133 @@
+"""Apply the vestigial properties to a mapping.
+
+The vestigial.yaml files are written by the sync (see gdcmodels.mapping_diff) in the
+format of a deepdiff delta which only ever contains `dictionary_item_added`:
+
+    dictionary_item_added:
+      root['properties']['foo']:
+        type: keyword
+
+Rather than going through the generic deepdiff.Delta machinery, the delta is loaded
+into an overlay: a sequence of (key path, subtree) pairs which are inserted directly
+into the mapping.
+"""
+
+import ast
+import functools
+import logging
+import re
+from typing import IO, Any, MutableMapping, Sequence, Tuple, Union
+
+from gdcmodels import extraction_utils
+
+logger = logging.getLogger(__name__)
+
+# The only deepdiff delta operation found within the vestigial files.
+ITEM_ADDED = "dictionary_item_added"
+
+# A key path within a mapping, e.g. ("properties", "foo") for root['properties']['foo'].
+Path = Tuple[Any, ...]
+Overlay = Sequence[Tuple[Path, Any]]
+
+_PATH_ROOT = "root"
+_PATH_KEY = re.compile(r"""\[('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|-?\d+)\]""")
+
+
+class UnsupportedOverlayError(ValueError):
+    """Raised when a vestigial delta contains more than added dictionary items."""
+
+
+@functools.lru_cache(maxsize=None)
+def parse_path(path: str) -> Path:
+    """Parse a deepdiff path into the sequence of keys it is made of.
+
+    Example:
+        parse_path("root['properties']['foo']") == ("properties", "foo")
+
+    Args:
+        path: The deepdiff path.
+
+    Returns:
+        The keys of the path.
+
+    Raises:
+        ValueError: If the path is not a valid deepdiff path.
+    """
+    if not path.startswith(_PATH_ROOT):
+        raise ValueError(f"Invalid path {path!r}, paths must start with '{_PATH_ROOT}'")
+
+    keys = []
+    position = len(_PATH_ROOT)
+
+    while position < len(path):
+        match = _PATH_KEY.match(path, position)
+
+        if not match:
+            raise ValueError(f"Invalid path {path!r} at position {position}")
+
+        keys.append(ast.literal_eval(match.group(1)))
+        position = match.end()
+
+    return tuple(keys)
+
+
+def format_path(path: Path) -> str:
+    """Format a sequence of keys into a deepdiff path, the inverse of parse_path.
+
+    Args:
+        path: The keys of the path.
+
+    Returns:
+        The deepdiff path.
+    """
+    return _PATH_ROOT + "".join(f"[{key!r}]" for key in path)
+
+
+def load_overlay(stream: Union[str, bytes, IO[str], IO[bytes]]) -> Overlay:
+    """Load the overlay contained within a vestigial file.
+
+    Args:
+        stream: The content of the vestigial file.
+
+    Returns:
+        The overlay of the vestigial properties.
+
+    Raises:
+        UnsupportedOverlayError: If the delta contains other operations than added
+            dictionary items.
+    """
+    delta = extraction_utils.load_yaml(stream) or {}
+    unsupported = delta.keys() - {ITEM_ADDED}
+
+    if unsupported:
+        raise UnsupportedOverlayError(f"Unsupported vestigial operations: {sorted(unsupported)}")
+
+    return tuple((parse_path(path), value) for path, value in delta.get(ITEM_ADDED, {}).items())
+
+
+def apply_overlay(
+    mapping: MutableMapping[str, Any], overlay: Overlay
+) -> MutableMapping[str, Any]:
+    """Insert the overlay's subtrees into the given mapping, in place.
+
+    As with deepdiff.Delta, an item whose parent does not exist is logged and skipped.
+
+    Args:
+        mapping: The mapping to which the vestigial properties are added.
+        overlay: The overlay of vestigial properties.
+
+    Returns:
+        The given mapping.
+    """
+    for path, value in overlay:
+        parent = mapping
+
+        try:
+            for key in path[:-1]:
+                parent = parent[key]
+
+            parent[path[-1]] = value
+        except (IndexError, KeyError, TypeError):
+            logger.error(f"Unable to add the vestigial item {format_path(path)}")
+
+    return mapping
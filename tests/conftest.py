@@ -2,6 +2,7 @@ import os
 import pathlib
 import sys
 import tempfile
+import threading
 from typing import Callable, Iterator
 
 import elasticsearch
@@ -12,6 +13,21 @@ if sys.version_info < (3, 9):
 else:
     from importlib import resources
 
+from gdcmodels import extraction
+
+
+@pytest.fixture(autouse=True)
+def model_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path_factory: pytest.TempPathFactory
+) -> pathlib.Path:
+    """Point the cache of resolved models at a temporary directory for every test."""
+    cache_dir = tmp_path_factory.mktemp("model_cache")
+
+    monkeypatch.setenv("GDCMODELS_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(extraction, "_cache_failed", threading.Event())
+
+    return cache_dir
+
 
 @pytest.fixture
 def es_models(monkeypatch: pytest.MonkeyPatch) -> Iterator[pathlib.Path]:
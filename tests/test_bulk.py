@@ -0,0 +1,257 @@
+import collections
+import gzip
+import json
+import pathlib
+import tracemalloc
+from typing import Any, Iterator, List
+
+import elasticsearch
+import pytest
+
+from benchmarks import fake_bulk
+from gdcmodels import bulk, cli, coercion, init_index
+from tests import utils
+
+
+def ndjson(count: int) -> Iterator[bytes]:
+    for i in range(count):
+        yield json.dumps({"case_id": f"case-{i}", "days_to_death": str(i)}).encode() + b"\n"
+
+
+def load(server: fake_bulk.FakeBulkServer, lines: Iterator[bytes], **kwargs) -> bulk.LoadReport:
+    es = elasticsearch.Elasticsearch(hosts=[server.host])
+    return bulk.load_ndjson(es, lines, "index", initial_backoff=0.001, **kwargs)
+
+
+def test_chunk__bounds_documents_and_bytes() -> None:
+    actions = [b"a" * 10, b"b" * 10, b"c" * 30, b"d" * 5, b"e" * 5, b"f" * 5]
+
+    chunks = list(bulk._chunk(actions, max_documents=2, max_bytes=25))
+
+    # A single action larger than max_bytes is sent on its own
+    assert chunks == [actions[0:2], actions[2:3], actions[3:5], actions[5:6]]
+
+
+def test_build_actions() -> None:
+    lines = [b'{"case_id": "foo"}\n', b"\n", b'{"case_id": "bar"}']
+
+    assert list(bulk._build_actions(lines)) == [
+        b'{"index":{}}\n{"case_id": "foo"}\n',
+        b'{"index":{}}\n{"case_id": "bar"}\n',
+    ]
+    assert list(bulk._build_actions(lines[:1], id_field="case_id")) == [
+        b'{"index":{"_id":"foo"}}\n{"case_id": "foo"}\n'
+    ]
+
+
+def test_load_ndjson() -> None:
+    with fake_bulk.FakeBulkServer() as server:
+        report = load(server, ndjson(2500), max_documents=100, workers=4)
+
+    assert server.documents == {"index": 2500}
+    assert server.requests == 25
+    assert (report.documents, report.indexed, report.requests, report.retries) == (
+        2500,
+        2500,
+        25,
+        0,
+    )
+    assert report.failed == 0
+    assert report.rate > 0
+
+
+def test_load_ndjson__retries_rejected_requests_and_documents() -> None:
+    with fake_bulk.FakeBulkServer(reject_requests=3, reject_documents=150) as server:
+        report = load(server, ndjson(1000), max_documents=100, workers=2)
+
+    assert server.documents == {"index": 1000}
+    assert report.indexed == 1000
+    assert report.failed == 0
+    # Only the rejected documents are sent again
+    assert server.rejected == 150 + 3 * 100
+    assert report.requests == server.requests
+    assert report.retries == report.requests - 10
+
+
+def test_load_ndjson__gives_up_after_max_retries() -> None:
+    sleeps: List[float] = []
+
+    with fake_bulk.FakeBulkServer(reject_requests=100) as server:
+        es = elasticsearch.Elasticsearch(hosts=[server.host])
+        report = bulk.load_ndjson(
+            es, ndjson(10), "index", max_retries=4, initial_backoff=0.5, sleep=sleeps.append
+        )
+
+    assert report.indexed == 0
+    assert report.errors == {bulk.REJECTED: 10}
+    assert sleeps == [0.5, 1.0, 2.0, 4.0]
+
+
+def test_load_ndjson__counts_failed_documents() -> None:
+    lines = [*ndjson(5), b'{"invalid": true}\n']
+
+    with fake_bulk.FakeBulkServer(fail_field="invalid") as server:
+        report = load(server, iter(lines))
+
+    assert report.indexed == 5
+    assert report.requests == 1
+    assert report.errors == {"mapper_parsing_exception": 1}
+
+
+@pytest.mark.parametrize("coerce", (False, True))
+def test_load_ndjson__counts_unparsable_lines(coerce: bool) -> None:
+    lines = [*ndjson(3), b"{not json\n", b'["not an object"]\n', b'{"other": 1}\n', *ndjson(2)]
+    coercer = coercion.Coercer({"properties": {}}) if coerce else None
+
+    with fake_bulk.FakeBulkServer() as server:
+        report = load(server, iter(lines), id_field="case_id", coercer=coercer)
+
+    assert server.documents == {"index": 5}
+    assert report.documents == 8
+    assert report.indexed == 5
+    assert report.errors == {bulk.INVALID_JSON: 2, bulk.MISSING_ID: 1}
+
+
+def test_load_ndjson__raises_other_errors() -> None:
+    es = elasticsearch.Elasticsearch(hosts=[{"host": "127.0.0.1", "port": 1}], max_retries=0)
+
+    with pytest.raises(elasticsearch.ConnectionError):
+        bulk.load_ndjson(es, ndjson(10), "index")
+
+
+def test_load_ndjson__bounded_memory() -> None:
+    def peak(count: int) -> int:
+        with fake_bulk.FakeBulkServer() as server:
+            tracemalloc.start()
+            load(server, ndjson(count), max_documents=50, workers=2)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        return peak
+
+    # Loading 10 times the documents takes about the same memory
+    assert peak(5000) < 2 * peak(500)
+
+
+def test_cli__load(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture) -> None:
+    documents = tmp_path / "documents.ndjson.gz"
+    report = tmp_path / "report.json"
+
+    with gzip.open(documents, "wb") as f:
+        f.writelines(ndjson(30))
+
+    with fake_bulk.FakeBulkServer() as server:
+        cli.main(
+            [
+                "load",
+                "--index",
+                "case_centric",
+                "--prefix",
+                "gdc_r53",
+                "--port",
+                str(server.host["port"]),
+                "--host",
+                server.host["host"],
+                "--chunk-documents",
+                "10",
+                "--coerce",
+                "--json",
+                str(report),
+                str(documents),
+            ]
+        )
+
+    assert server.documents == {"gdc_r53_case_centric": 30}
+    assert "Loaded 30 of 30 documents into gdc_r53_case_centric" in capsys.readouterr().out
+    assert json.loads(report.read_text())["requests"] == 3
+
+
+def test_cli__load__missing_index(tmp_path: pathlib.Path) -> None:
+    documents = tmp_path / "documents.ndjson"
+    documents.write_bytes(b"".join(ndjson(10)))
+
+    with fake_bulk.FakeBulkServer(indices=["gdc_r52_case_centric"]) as server:
+        args = [
+            "load",
+            "--index",
+            "case_centric",
+            "--prefix",
+            "gdc_r53",
+            "--port",
+            str(server.host["port"]),
+            str(documents),
+        ]
+
+        with pytest.raises(SystemExit) as e:
+            cli.main(args)
+
+        assert "gdc_r53_case_centric does not exist" in str(e.value.code)
+        assert server.requests == 0
+
+        # Unless explicitly allowed, elasticsearch would create the index
+        cli.main(args + ["--allow-missing-index"])
+
+    assert server.documents == {"gdc_r53_case_centric": 10}
+
+
+@pytest.mark.parametrize(
+    ("args", "message"),
+    (
+        (["--index", "missing"], "unknown index 'missing'"),
+        (["--index", "gdc_from_graph"], "expected one of (with --doc-type): annotation, case"),
+    ),
+)
+def test_cli__load__unknown_model(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture, args: List[str], message: str
+) -> None:
+    with pytest.raises(SystemExit) as e:
+        cli.main(["load", "--prefix", "gdc_r53", *args, str(tmp_path / "documents.ndjson")])
+
+    assert e.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+@pytest.fixture
+def coercers(monkeypatch: pytest.MonkeyPatch) -> List[coercion.Coercer]:
+    """Record the coercers the load command is run with, instead of loading."""
+    coercers: List[coercion.Coercer] = []
+
+    def load_ndjson(es: Any, lines: Any, index: str, coercer: Any, **kwargs: Any) -> Any:
+        coercers.append(coercer)
+        return bulk.LoadReport(1, 1, 1, 0, 0, 1.0, collections.Counter())
+
+    es = utils.FakeElasticsearch({"gdc_r53_case_centric": [], "gdc_r53_foo": []})
+    monkeypatch.setattr(init_index, "get_elasticsearch", lambda _: es)
+    monkeypatch.setattr(bulk, "load_ndjson", load_ndjson)
+
+    return coercers
+
+
+@pytest.mark.parametrize("normalize", (False, True))
+def test_cli__load__normalize(
+    tmp_path: pathlib.Path, coercers: List[coercion.Coercer], normalize: bool
+) -> None:
+    documents = tmp_path / "documents.ndjson"
+    documents.write_text('{"primary_site": "Lung"}\n')
+    args = ["load", "--index", "case_centric", "--prefix", "gdc_r53", "--coerce", str(documents)]
+
+    cli.main(args + ["--normalize"] if normalize else args)
+
+    # The stored documents keep their case, unless normalizing is asked for
+    site = "lung" if normalize else "Lung"
+    assert coercers[0].coerce({"primary_site": "Lung"}) == {"primary_site": site}
+
+
+def test_cli__load__without_vestigial(
+    es_models: pathlib.Path, tmp_path: pathlib.Path, coercers: List[coercion.Coercer]
+) -> None:
+    mapping = {"properties": {"case_id": {"type": "keyword"}}}
+    vestigial = {"dictionary_item_added": {"root['properties']['old']": {"type": "keyword"}}}
+    utils.load_model(es_models, "foo", mapping, vestigial=vestigial)
+    documents = tmp_path / "documents.ndjson"
+    documents.write_text('{"case_id": 1, "old": 1}\n')
+
+    cli.main(["load", "--index", "foo", "--prefix", "gdc_r53", "--coerce", str(documents)])
+
+    # The vestigial properties are not part of the index, so they are not coerced
+    assert coercers[0].coerce({"case_id": 1, "old": 1}) == {"case_id": "1", "old": 1}
@@ -0,0 +1,157 @@
+import pytest
+
+import gdcmodels
+from gdcmodels import catalog, mapper
+
+MAPPING = {
+    "properties": {
+        "case_id": {"type": "keyword", "copy_to": "autocomplete"},
+        "autocomplete": {
+            "type": "keyword",
+            "fields": {"analyzed": {"type": "text"}},
+        },
+        "files": {
+            "type": "nested",
+            "properties": {
+                "file_id": {"type": "keyword", "normalizer": "clinical_normalizer"},
+                "file_size": {"type": "long"},
+                "analysis": {
+                    "properties": {
+                        "workflow": {"type": "keyword", "copy_to": ["autocomplete"]},
+                        "reads": {
+                            "type": "nested",
+                            "properties": {"count": {"type": "long"}},
+                        },
+                    }
+                },
+            },
+        },
+    }
+}
+
+
+@pytest.fixture
+def fields() -> catalog.FieldCatalog:
+    return mapper.ModelMapper("foo", "foo", {}, MAPPING).fields()
+
+
+def test_fields__catalog(fields: catalog.FieldCatalog) -> None:
+    assert list(fields) == [
+        "case_id",
+        "autocomplete",
+        "autocomplete.analyzed",
+        "files",
+        "files.file_id",
+        "files.file_size",
+        "files.analysis",
+        "files.analysis.workflow",
+        "files.analysis.reads",
+        "files.analysis.reads.count",
+    ]
+    assert fields["case_id"] == catalog.Field(
+        "case_id", "keyword", (), None, ("autocomplete",), 1
+    )
+    assert fields["files.file_id"] == catalog.Field(
+        "files.file_id", "keyword", ("files",), "clinical_normalizer", (), 2
+    )
+    assert fields["files.analysis"].type == "object"
+    assert fields["files.analysis.workflow"].copy_to == ("autocomplete",)
+    assert fields["files.analysis.reads"].nested_path == "files"
+    assert fields["files.analysis.reads.count"].nested_scopes == ("files", "files.analysis.reads")
+    assert fields["files.analysis.reads.count"].nested_path == "files.analysis.reads"
+    assert fields["autocomplete.analyzed"].type == "text"
+    assert not fields["files"].nested
+    assert "files.missing" not in fields
+
+
+def test_fields__built_once() -> None:
+    model = mapper.ModelMapper("foo", "foo", {}, MAPPING)
+
+    assert model.fields() is model.fields()
+
+
+@pytest.mark.parametrize(
+    ("criteria", "expected"),
+    (
+        ({"pattern": "files.*", "type": "keyword"}, ["files.file_id", "files.analysis.workflow"]),
+        ({"type": "nested"}, ["files", "files.analysis.reads"]),
+        ({"nested": False, "max_depth": 1}, ["case_id", "autocomplete", "files"]),
+        ({"normalizer": "clinical_normalizer"}, ["files.file_id"]),
+        ({"pattern": "*.count", "nested": True}, ["files.analysis.reads.count"]),
+    ),
+)
+def test_filter(fields: catalog.FieldCatalog, criteria: dict, expected: list) -> None:
+    filtered = fields.filter(**criteria)
+
+    assert list(filtered.paths) == expected
+    assert all(filtered[p] == fields[p] for p in expected)
+
+
+def test_nested_scopes() -> None:
+    model = mapper.ModelMapper("foo", "foo", {}, MAPPING)
+
+    assert model.nested_scopes("case_id") == ()
+    assert model.nested_scopes("files") == ()
+    assert model.nested_scopes("files.analysis.workflow") == ("files",)
+    assert model.nested_scopes("files.analysis.reads.count") == ("files", "files.analysis.reads")
+
+    with pytest.raises(KeyError):
+        model.nested_scopes("files.missing")
+
+
+def test_group_by_nested_scope() -> None:
+    model = mapper.ModelMapper("foo", "foo", {}, MAPPING)
+
+    groups = model.group_by_nested_scope(
+        ["files.file_id", "case_id", "files.analysis.reads.count", "files.file_size"]
+    )
+
+    assert groups == {
+        ("files",): ["files.file_id", "files.file_size"],
+        (): ["case_id"],
+        ("files", "files.analysis.reads"): ["files.analysis.reads.count"],
+    }
+
+
+def test_fields__real_model() -> None:
+    model = gdcmodels.get_es_models()["case_centric"]["case_centric"]
+    fields = model.fields()
+
+    assert model.nested_scopes("diagnoses.treatments.treatment_type") == (
+        "diagnoses",
+        "diagnoses.treatments",
+    )
+    assert len(fields.filter(type="nested")) == sum(
+        p.get("type") == "nested" for _, p in mapper._walk_mapping(model.mappings)
+    )
+
+
+@pytest.mark.parametrize(
+    ("prefix", "kwargs", "expected"),
+    (
+        ("files.analysis.r", {}, ["files.analysis.reads", "files.analysis.reads.count"]),
+        ("FILES.ANALYSIS.W", {}, ["files.analysis.workflow"]),
+        ("file", {"limit": 2}, ["files", "files.analysis"]),
+        # Full path matches come first, then the matches from within the paths
+        (
+            "a",
+            {"limit": 4},
+            ["autocomplete", "autocomplete.analyzed", "files.analysis", "files.analysis.reads"],
+        ),
+        ("a", {"types": ("text", "object")}, ["autocomplete.analyzed", "files.analysis"]),
+        ("reads.", {"limit": None}, ["files.analysis.reads.count"]),
+        ("missing", {}, []),
+    ),
+)
+def test_search(fields: catalog.FieldCatalog, prefix: str, kwargs: dict, expected: list) -> None:
+    assert [f.path for f in fields.search(prefix, **kwargs)] == expected
+
+
+def test_search_fields() -> None:
+    model = gdcmodels.get_es_models()["case_centric"]["case_centric"]
+
+    found = model.search_fields("primary", limit=None, types=("keyword",))
+
+    assert "primary_site" == found[0].path
+    assert "diagnoses.primary_diagnosis" in {f.path for f in found}
+    assert all(f.type == "keyword" for f in found)
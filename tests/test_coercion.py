@@ -0,0 +1,113 @@
+from typing import Any, Dict
+
+import pytest
+
+import gdcmodels
+from gdcmodels import coercion, mapper, validation
+
+SETTINGS = {
+    "analysis": {
+        "normalizer": {
+            "clinical_normalizer": {"char_filter": [], "filter": ["lowercase"], "type": "custom"},
+            "folding_normalizer": {"filter": ["lowercase", "asciifolding"], "type": "custom"},
+        }
+    }
+}
+
+MAPPING = {
+    "_source": {"excludes": ["__comment__", "files.*"]},
+    "dynamic": "strict",
+    "properties": {
+        "case_id": {"type": "keyword"},
+        "site": {"type": "keyword", "normalizer": "clinical_normalizer"},
+        "name": {"type": "keyword", "normalizer": "folding_normalizer"},
+        "age": {"type": "long"},
+        "score": {"type": "double"},
+        "is_ffpe": {"type": "boolean"},
+        "created": {"type": "date"},
+        "files": {
+            "type": "nested",
+            "properties": {
+                "file_size": {"type": "long"},
+                "access": {"type": "keyword", "normalizer": "clinical_normalizer"},
+            },
+        },
+    },
+}
+
+
+@pytest.fixture
+def coercer() -> coercion.Coercer:
+    return coercion.compile_coercer(mapper.ModelMapper("foo", "foo", SETTINGS, MAPPING))
+
+
+@pytest.mark.parametrize(
+    ("document", "expected"),
+    (
+        ({"case_id": 1, "age": "12", "score": "1.5"}, {"case_id": "1", "age": 12, "score": 1.5}),
+        (
+            {"case_id": True, "age": "12.7", "score": 2},
+            {"case_id": "true", "age": 12, "score": 2.0},
+        ),
+        ({"is_ffpe": "true", "age": 3.9}, {"is_ffpe": True, "age": 3}),
+        ({"is_ffpe": ["false", ""]}, {"is_ffpe": [False, False]}),
+        ({"site": "Lung", "name": "Ångström"}, {"site": "lung", "name": "Ångström"}),
+        ({"created": 1, "age": None}, {"created": 1, "age": None}),
+        # Values which cannot be converted are left for elasticsearch to reject
+        (
+            {"age": "foo", "score": "nan?", "unknown": "1"},
+            {"age": "foo", "score": "nan?", "unknown": "1"},
+        ),
+        ({"__comment__": "foo", "case_id": "bar"}, {"case_id": "bar"}),
+        (
+            {"files": [{"file_size": "1", "access": "OPEN"}, {"file_size": ["2", 3]}, None]},
+            {"files": [{"file_size": 1, "access": "open"}, {"file_size": [2, 3]}, None]},
+        ),
+    ),
+)
+def test_coerce(
+    coercer: coercion.Coercer, document: Dict[str, Any], expected: Dict[str, Any]
+) -> None:
+    original = dict(document)
+
+    assert coercer.coerce(document) == expected
+    assert document == original
+
+
+def test_coerce__without_normalizing() -> None:
+    coercer = coercion.Coercer(MAPPING, SETTINGS, normalize=False)
+
+    assert coercer.coerce({"site": "Lung", "age": "1"}) == {"site": "Lung", "age": 1}
+
+
+def test_coerce__mapped_excludes_are_kept() -> None:
+    mapping = {
+        "_source": {"excludes": ["case_id"]},
+        "properties": {"case_id": {"type": "keyword"}},
+    }
+
+    assert coercion.Coercer(mapping).coerce({"case_id": 1}) == {"case_id": "1"}
+
+
+def test_coerce_batches(coercer: coercion.Coercer) -> None:
+    documents = ({"age": str(i)} for i in range(5))
+
+    batches = list(coercer.coerce_batches(documents, batch_size=2))
+
+    assert batches == [[{"age": 0}, {"age": 1}], [{"age": 2}, {"age": 3}], [{"age": 4}]]
+
+
+def test_coerce__real_model_documents_validate() -> None:
+    model = gdcmodels.get_es_models()["gdc_from_graph"]["case"]
+    document = {
+        "__comment__": "foo",
+        "case_id": 1,
+        "diagnoses": [{"age_at_diagnosis": "100", "primary_diagnosis": "Adenocarcinoma"}],
+    }
+
+    coerced = coercion.compile_coercer(model).coerce(document)
+
+    assert coerced["diagnoses"] == [
+        {"age_at_diagnosis": 100, "primary_diagnosis": "adenocarcinoma"}
+    ]
+    assert validation.compile_validator(model.mappings, coerce=False).validate(coerced) == []
@@ -0,0 +1,149 @@
+import tracemalloc
+from typing import Any, Dict, Iterator
+
+import pytest
+
+import gdcmodels
+from gdcmodels import columnar, mapper
+
+numpy = pytest.importorskip("numpy")
+
+MAPPING = {
+    "properties": {
+        "case_id": {"type": "keyword", "fields": {"analyzed": {"type": "text"}}},
+        "age": {"type": "long"},
+        "tags": {"type": "keyword"},
+        "project": {
+            "properties": {"code": {"type": "keyword"}, "is_legacy": {"type": "boolean"}}
+        },
+        "files": {
+            "type": "nested",
+            "properties": {
+                "file_size": {"type": "long"},
+                "reads": {"type": "nested", "properties": {"score": {"type": "float"}}},
+            },
+        },
+    }
+}
+
+
+@pytest.fixture
+def schema() -> columnar.ColumnarSchema:
+    return columnar.derive_schema(
+        mapper.ModelMapper("foo", "foo", {}, MAPPING), repeated=["tags"]
+    )
+
+
+def test_derive_schema(schema: columnar.ColumnarSchema) -> None:
+    assert schema.columns == (
+        columnar.Column("case_id", "keyword", "object", ""),
+        columnar.Column("age", "long", "int64", ""),
+        columnar.Column("tags", "keyword", "object", "tags"),
+        columnar.Column("project.code", "keyword", "object", ""),
+        columnar.Column("project.is_legacy", "boolean", "bool", ""),
+        columnar.Column("files.file_size", "long", "int64", "files"),
+        columnar.Column("files.reads.score", "float", "float32", "files.reads"),
+    )
+    assert schema.levels == (
+        columnar.ListLevel("tags", ""),
+        columnar.ListLevel("files", ""),
+        columnar.ListLevel("files.reads", "files"),
+    )
+    assert schema.names[-3:] == ("tags#offsets", "files#offsets", "files.reads#offsets")
+
+
+def test_derive_schema__unknown_repeated_field() -> None:
+    with pytest.raises(ValueError, match="project.missing"):
+        columnar.derive_schema(
+            mapper.ModelMapper("foo", "foo", {}, MAPPING), repeated=["project.missing"]
+        )
+
+
+def test_flatten(schema: columnar.ColumnarSchema) -> None:
+    documents = [
+        {
+            "case_id": "a",
+            "age": "12",
+            "tags": ["x", "y"],
+            "project": {"code": "TCGA", "is_legacy": "true"},
+            "files": [
+                {"file_size": 1, "reads": [{"score": 0.5}, {"score": "1.5"}]},
+                {"file_size": 2},
+            ],
+        },
+        {"case_id": "b", "tags": "z", "files": {"reads": {"score": 2}}},
+        {"case_id": "c", "project": [{"code": "FM"}], "files": [None]},
+    ]
+
+    (batch,) = columnar.Flattener(schema).flatten(documents)
+
+    assert set(batch) == set(schema.names)
+    assert batch["case_id"].tolist() == ["a", "b", "c"]
+    assert batch["age"].dtype == numpy.int64
+    assert batch["age"].tolist() == [12, None, None]
+    assert batch["project.code"].tolist() == ["TCGA", None, "FM"]
+    assert batch["project.is_legacy"].tolist() == [True, None, None]
+    assert batch["tags"].tolist() == ["x", "y", "z"]
+    assert batch["tags#offsets"].tolist() == [0, 2, 3, 3]
+    assert batch["files#offsets"].tolist() == [0, 2, 3, 3]
+    assert batch["files.file_size"].tolist() == [1, 2, None]
+    assert batch["files.reads#offsets"].tolist() == [0, 2, 2, 3]
+    assert batch["files.reads.score"].dtype == numpy.float32
+    assert batch["files.reads.score"].tolist() == [0.5, 1.5, 2.0]
+
+
+def test_flatten__batches(schema: columnar.ColumnarSchema) -> None:
+    documents = ({"age": i, "files": [{"file_size": i}] * i} for i in range(5))
+
+    batches = list(columnar.Flattener(schema).flatten(documents, batch_size=2))
+
+    assert [b["age"].tolist() for b in batches] == [[0, 1], [2, 3], [4]]
+    # The offsets start over within every batch
+    assert [b["files#offsets"].tolist() for b in batches] == [[0, 0, 1], [0, 2, 5], [0, 4]]
+
+
+@pytest.mark.parametrize(
+    ("document", "match"),
+    (
+        ({"case_id": ["a", "b"]}, "case_id holds an array"),
+        ({"age": "foo"}, "age holds 'foo', not a long"),
+        ({"age": True}, "age holds True, not a long"),
+        ({"project": "TCGA"}, "project holds 'TCGA', not an object"),
+    ),
+)
+def test_flatten__invalid(schema: columnar.ColumnarSchema, document: dict, match: str) -> None:
+    with pytest.raises(ValueError, match=match):
+        list(columnar.Flattener(schema).flatten([document]))
+
+
+def test_flatten__bounded_memory(schema: columnar.ColumnarSchema) -> None:
+    flattener = columnar.Flattener(schema)
+
+    def documents(count: int) -> Iterator[Dict[str, Any]]:
+        for i in range(count):
+            yield {"case_id": f"case-{i}", "files": [{"file_size": i, "reads": [{"score": 1}]}]}
+
+    def peak(count: int) -> int:
+        tracemalloc.start()
+        try:
+            for _ in flattener.flatten(documents(count), batch_size=100):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    assert peak(10000) < 2 * peak(1000)
+
+
+def test_derive_schema__real_model() -> None:
+    model = gdcmodels.get_es_models()["ssm_occurrence_centric"]["ssm_occurrence_centric"]
+
+    schema = columnar.derive_schema(model)
+    columns = {c.path: c for c in schema.columns}
+
+    assert columnar.ListLevel("case.diagnoses.treatments", "case.diagnoses") in schema.levels
+    assert (
+        columns["case.diagnoses.treatments.treatment_type"].level == "case.diagnoses.treatments"
+    )
+    assert columns["ssm.start_position"].dtype == "int64"
+    assert not any("." in c.path and c.path.endswith(".analyzed") for c in schema.columns)
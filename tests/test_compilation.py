@@ -0,0 +1,88 @@
+import importlib
+import pathlib
+import sys
+from typing import Iterator
+
+import pytest
+
+import gdcmodels
+from gdcmodels import compilation, esmodels, extraction, extraction_utils
+from tests import utils
+
+if sys.version_info < (3, 9):
+    import importlib_resources as resources
+else:
+    from importlib import resources
+
+
+@pytest.fixture
+def compiled(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[pathlib.Path]:
+    """Compile the real models into a temporary package used by get_es_models."""
+    package = "compiled_models"
+    target = tmp_path / package
+
+    compilation.compile_models(resources.files(esmodels), target)
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(extraction, "_COMPILED_PACKAGE", package)
+    importlib.invalidate_caches()
+
+    yield target
+
+    for name in [m for m in sys.modules if m.split(".")[0] == package]:
+        del sys.modules[name]
+
+
+def test_compile_models__matches_yaml(compiled: pathlib.Path) -> None:
+    assert compilation.verify(resources.files(esmodels)) == []
+
+
+def test_get_es_models__uses_compiled(
+    compiled: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    expected = gdcmodels.get_es_models(cache=False)
+    expected_mappings = {i: {d: m.mappings for d, m in ms.items()} for i, ms in expected.items()}
+
+    def fail(*_):
+        raise AssertionError("YAML should not be loaded")
+
+    monkeypatch.setattr(extraction_utils, "load_yaml", fail)
+    monkeypatch.setattr(extraction_utils, "load_settings", fail)
+
+    models = gdcmodels.get_es_models(cache=False)
+
+    assert {i: {d: m.mappings for d, m in ms.items()} for i, ms in models.items()} == (
+        expected_mappings
+    )
+    assert (
+        models["gdc_from_graph"]["case"].settings == expected["gdc_from_graph"]["case"].settings
+    )
+
+
+def test_get_es_models__compiled_returns_copies(compiled: pathlib.Path) -> None:
+    mapping = gdcmodels.get_es_models(cache=False)["gdc_from_graph"]["case"].mappings
+    mapping.pop("_meta")
+
+    assert "_meta" in gdcmodels.get_es_models(cache=False)["gdc_from_graph"]["case"].mappings
+
+
+def test_get_es_models__ignores_stale_compiled(
+    compiled: pathlib.Path, es_models: pathlib.Path
+) -> None:
+    mapping = {"properties": {"foo": {"type": "keyword"}}}
+    utils.load_model(es_models, "foo", mapping)
+
+    models = gdcmodels.get_es_models()
+
+    assert list(models.keys()) == ["foo"]
+    assert mapping == models["foo"]["foo"].mappings
+
+
+def test_get_es_models__compiled_ignores_workers(
+    compiled: pathlib.Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    with caplog.at_level("INFO", logger=extraction.logger.name):
+        models = gdcmodels.get_es_models(workers=2)
+
+    assert isinstance(models["case_set"], extraction._LazyMapping)
+    assert "Ignoring workers=2" in caplog.text
@@ -0,0 +1,279 @@
+import json
+import pathlib
+from typing import Any, Dict
+
+import pytest
+
+from gdcmodels import cli, drift, init_index
+from tests import utils
+
+PREFIX = "gdc_r53"
+
+CASE_MAPPING = {
+    "dynamic": "strict",
+    "properties": {
+        "all": {"type": "text"},
+        "case_id": {"type": "keyword"},
+        "primary_site": {
+            "type": "keyword",
+            "normalizer": "clinical_normalizer",
+            "copy_to": "all",
+        },
+        "project": {"type": "object", "properties": {"code": {"type": "keyword"}}},
+        "diagnoses": {"type": "nested", "properties": {"age_at_diagnosis": {"type": "long"}}},
+    },
+}
+
+CASE_SETTINGS = {
+    "analysis": {
+        "normalizer": {
+            "clinical_normalizer": {"type": "custom", "char_filter": [], "filter": ["lowercase"]}
+        }
+    },
+    "index": {
+        "mapping": {"total_fields": {"limit": 2000}},
+        "number_of_replicas": 0,
+        "number_of_shards": 12,
+        "refresh_interval": "1m",
+    },
+    "index.hidden": False,
+}
+
+SET_MAPPING = {"properties": {"ids": {"type": "keyword"}}}
+
+GRAPH_MAPPING = {"dynamic": False, "properties": {"id": {"type": "keyword"}}}
+
+
+def created_settings(name: str) -> Dict[str, Any]:
+    """The settings elasticsearch adds to every index it creates."""
+    return {
+        "index.creation_date": "1700000000000",
+        "index.provided_name": name,
+        "index.uuid": f"{name}-uuid",
+        "index.version.created": "7170099",
+    }
+
+
+@pytest.fixture
+def models(es_models: pathlib.Path) -> pathlib.Path:
+    utils.load_model(es_models, "case_centric", CASE_MAPPING, CASE_SETTINGS)
+    utils.load_model(es_models, "case_set", SET_MAPPING, {"index.max_result_window": 100000000})
+
+    for doc_type in ("case", "file"):
+        utils.load_model(
+            es_models,
+            "gdc_from_graph",
+            GRAPH_MAPPING,
+            {"index": {"number_of_shards": 1}},
+            doc_type=doc_type,
+        )
+
+    return es_models
+
+
+@pytest.fixture
+def live(models: pathlib.Path) -> Dict[str, Any]:
+    """The indices of the models, as the get index API reports them with flat settings."""
+    return {
+        f"{PREFIX}_case_centric": {
+            "aliases": {},
+            "mappings": {
+                "dynamic": "strict",
+                "properties": {
+                    "all": {"type": "text"},
+                    "case_id": {"type": "keyword"},
+                    "diagnoses": {
+                        "type": "nested",
+                        "properties": {"age_at_diagnosis": {"type": "long"}},
+                    },
+                    "primary_site": {
+                        "type": "keyword",
+                        "copy_to": ["all"],
+                        "normalizer": "clinical_normalizer",
+                    },
+                    "project": {"properties": {"code": {"type": "keyword"}}},
+                },
+            },
+            "settings": {
+                "index.analysis.normalizer.clinical_normalizer.char_filter": [],
+                "index.analysis.normalizer.clinical_normalizer.filter": ["lowercase"],
+                "index.analysis.normalizer.clinical_normalizer.type": "custom",
+                "index.hidden": "false",
+                "index.mapping.total_fields.limit": "2000",
+                "index.number_of_replicas": "0",
+                "index.number_of_shards": "12",
+                "index.refresh_interval": "1m",
+                **created_settings(f"{PREFIX}_case_centric"),
+            },
+        },
+        f"{PREFIX}_case_set": {
+            "aliases": {},
+            "mappings": {"properties": {"ids": {"type": "keyword"}}},
+            "settings": {
+                "index.max_result_window": "100000000",
+                "index.number_of_replicas": "1",
+                "index.number_of_shards": "1",
+                **created_settings(f"{PREFIX}_case_set"),
+            },
+        },
+        **{
+            f"{PREFIX}_gdc_from_graph_{doc_type}": {
+                "aliases": {},
+                "mappings": {"dynamic": "false", "properties": {"id": {"type": "keyword"}}},
+                "settings": {
+                    "index.number_of_replicas": "1",
+                    "index.number_of_shards": "1",
+                    **created_settings(f"{PREFIX}_gdc_from_graph_{doc_type}"),
+                },
+            }
+            for doc_type in ("case", "file")
+        },
+    }
+
+
+def test_detect_drift__no_drift(live: Dict[str, Any]) -> None:
+    es = utils.FakeElasticsearch(live=live)
+
+    report = drift.detect_drift(es, PREFIX)  # type: ignore
+
+    assert not report
+    assert sorted(i.index for i in report.indices) == sorted(live)
+    # Every index is fetched in a single request
+    assert es.indices.requests == {"get": 1}
+    assert es.indices.fetched == [{"index": f"{PREFIX}_*", "flat_settings": True}]
+
+
+def test_detect_drift__drifted(live: Dict[str, Any]) -> None:
+    case = live[f"{PREFIX}_case_centric"]
+    properties = case["mappings"]["properties"]
+    del properties["case_id"]
+    properties["dynamic_field"] = {"type": "keyword"}
+    properties["diagnoses"]["properties"]["age_at_diagnosis"]["type"] = "keyword"
+    case["settings"]["index.refresh_interval"] = "-1"
+    case["settings"]["index.analysis.normalizer.clinical_normalizer.filter"] = ["uppercase"]
+    del live[f"{PREFIX}_case_set"]
+    live[f"{PREFIX}_other"] = {"mappings": {}, "settings": {}}
+
+    report = drift.detect_drift(utils.FakeElasticsearch(live=live), PREFIX)  # type: ignore
+    indices = {i.index: i for i in report.indices}
+
+    assert report
+    assert indices[f"{PREFIX}_case_centric"] == drift.IndexDrift(
+        f"{PREFIX}_case_centric",
+        True,
+        missing=("case_id",),
+        extra=("dynamic_field",),
+        changed={"diagnoses.age_at_diagnosis.type": ("long", "keyword")},
+        settings={
+            "index.analysis.normalizer.clinical_normalizer.filter": (
+                ["lowercase"],
+                ["uppercase"],
+            ),
+            "index.refresh_interval": ("1m", "-1"),
+        },
+    )
+    assert indices[f"{PREFIX}_case_set"] == drift.IndexDrift(f"{PREFIX}_case_set", False)
+    assert not indices[f"{PREFIX}_gdc_from_graph_case"]
+    assert report.unexpected == (f"{PREFIX}_other",)
+
+
+def test_detect_drift__without_vestigial(es_models: pathlib.Path) -> None:
+    mapping = {"dynamic": "strict", "properties": {"case_id": {"type": "keyword"}}}
+    vestigial = {"dictionary_item_added": {"root['properties']['old']": {"type": "keyword"}}}
+    utils.load_model(es_models, "foo", mapping, vestigial=vestigial)
+    # The index as init_index creates it, without the vestigial properties
+    live = {f"{PREFIX}_foo": {"mappings": mapping, "settings": {}}}
+
+    report = drift.detect_drift(utils.FakeElasticsearch(live=live), PREFIX)  # type: ignore
+
+    assert not report
+    assert report.indices == (drift.IndexDrift(f"{PREFIX}_foo", True),)
+
+
+def test_detect_drift__selected_indices(live: Dict[str, Any]) -> None:
+    report = drift.detect_drift(
+        utils.FakeElasticsearch(live=live), PREFIX, ["case_set", "gdc_from_graph"]  # type: ignore
+    )
+
+    assert sorted(i.index for i in report.indices) == [
+        f"{PREFIX}_case_set",
+        init_index.ESIndexBuilder("gdc_from_graph", PREFIX, "case").full_index_name,
+        init_index.ESIndexBuilder("gdc_from_graph", PREFIX, "file").full_index_name,
+    ]
+    assert not report.unexpected
+
+
+def test_diff_index__ignores_defaults(live: Dict[str, Any]) -> None:
+    model = drift.expected_indices(PREFIX)[f"{PREFIX}_case_set"]
+    index = live[f"{PREFIX}_case_set"]
+    index["mappings"]["dynamic"] = "true"
+    index["mappings"]["properties"]["ids"].update({"index": True, "doc_values": True})
+
+    assert not drift.diff_index("case_set", model, index)
+
+    index["mappings"]["properties"]["ids"]["doc_values"] = False
+
+    assert drift.diff_index("case_set", model, index).changed == {"ids.doc_values": (None, False)}
+
+
+def test_normalize_mapping() -> None:
+    mapping = {
+        "dynamic": False,
+        "properties": {
+            "foo": {"type": "object", "properties": {"bar": {"type": "keyword"}}},
+            "baz": {"type": "keyword", "copy_to": "all"},
+        },
+    }
+
+    assert drift._normalize_mapping(mapping) == {
+        "dynamic": "false",
+        "properties": {
+            "foo": {"properties": {"bar": {"type": "keyword"}}},
+            "baz": {"type": "keyword", "copy_to": ["all"]},
+        },
+    }
+
+
+def test_flatten_settings() -> None:
+    settings = {
+        "index": {"number_of_shards": 12, "refresh_interval": "1m"},
+        "analysis": {"analyzer": {"foo": {"filter": ["lowercase"]}}},
+        "index.hidden": False,
+    }
+
+    assert drift._flatten_settings(settings) == {
+        "index.number_of_shards": "12",
+        "index.refresh_interval": "1m",
+        "index.analysis.analyzer.foo.filter": ["lowercase"],
+        "index.hidden": "false",
+    }
+
+
+def test_cli__drift(
+    live: Dict[str, Any],
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    del live[f"{PREFIX}_case_set"]["mappings"]["properties"]["ids"]
+    monkeypatch.setattr(
+        init_index, "get_elasticsearch", lambda _: utils.FakeElasticsearch(live=live)
+    )
+    report = tmp_path / "report.json"
+
+    with pytest.raises(SystemExit) as e:
+        cli.main(["drift", "--prefix", PREFIX, "--json", str(report)])
+
+    assert e.value.code == 1
+    assert "missing field   ids" in capsys.readouterr().out
+
+    result = json.loads(report.read_text())
+    assert result["drifted"] is True
+    assert {
+        "index": f"{PREFIX}_case_set",
+        "exists": True,
+        "missing": ["ids"],
+        "extra": [],
+        "changed": {},
+        "settings": {},
+    } in result["indices"]
@@ -1,7 +1,10 @@
 import functools
 import pathlib
 
+import pytest
+
 import gdcmodels
+from gdcmodels import extraction
 from tests import utils
 
 
@@ -238,3 +241,171 @@ def test__get_es_models__exclude_vestigial_properties(es_models: pathlib.Path) -
     assert "foo" in models
     assert "foo" in models["foo"]
     assert mapping == models["foo"]["foo"].mappings
+
+
+def test__get_es_models__writes_cache(es_models: pathlib.Path, model_cache: pathlib.Path) -> None:
+    mapping = {"properties": {"foo": {"type": "keyword"}}}
+
+    utils.load_model(es_models, "foo", mapping, {"foo": 1})
+
+    uncached = gdcmodels.get_es_models()
+    assert not list(model_cache.iterdir())
+
+    _ = uncached["foo"]["foo"]
+    assert len(list(model_cache.glob("*-vestigial/foo/mappings/foo.pickle"))) == 1
+
+    cached = gdcmodels.get_es_models()
+
+    assert uncached["foo"]["foo"].mappings == cached["foo"]["foo"].mappings
+    assert uncached["foo"]["foo"].settings == cached["foo"]["foo"].settings
+
+
+def test__get_es_models__cache_invalidated_on_change(
+    es_models: pathlib.Path, model_cache: pathlib.Path
+) -> None:
+    utils.load_model(es_models, "foo", {"properties": {"foo": {"type": "keyword"}}})
+    _ = gdcmodels.get_es_models()["foo"]["foo"]
+
+    mapping = {"properties": {"foo": {"type": "long"}}}
+    utils.load_model(es_models, "foo", mapping)
+
+    models = gdcmodels.get_es_models()
+
+    assert mapping == models["foo"]["foo"].mappings
+    assert len(list(model_cache.glob("*-vestigial/foo/mappings/foo.pickle"))) == 2
+
+
+def test__hash_models__memoized(es_models: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    utils.load_model(es_models, "foo", {"properties": {"foo": {"type": "keyword"}}})
+    digest = extraction._hash_models(es_models)
+    read_bytes = pathlib.Path.read_bytes
+
+    def fail(*_):
+        raise AssertionError("unchanged models should not be read")
+
+    monkeypatch.setattr(pathlib.Path, "read_bytes", fail)
+
+    assert extraction._hash_models(es_models) == digest
+
+    monkeypatch.setattr(pathlib.Path, "read_bytes", read_bytes)
+    utils.load_model(es_models, "foo", {"properties": {"foo": {"type": "long"}}})
+
+    assert extraction._hash_models(es_models) != digest
+
+
+def test__get_es_models__cache_disabled(
+    es_models: pathlib.Path, model_cache: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    utils.load_model(es_models, "foo", {"properties": {"foo": {"type": "keyword"}}})
+
+    _ = gdcmodels.get_es_models(cache=False)["foo"]["foo"]
+    monkeypatch.setenv("GDCMODELS_CACHE_DIR", "")
+    _ = gdcmodels.get_es_models()["foo"]["foo"]
+
+    assert not list(model_cache.iterdir())
+
+
+def test__get_es_models__cache_opt_in(
+    es_models: pathlib.Path, monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    utils.load_model(es_models, "foo", {"properties": {"foo": {"type": "keyword"}}})
+    monkeypatch.delenv("GDCMODELS_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+    _ = gdcmodels.get_es_models()["foo"]["foo"]
+
+    assert not list(tmp_path.iterdir())
+
+
+def test__get_es_models__cache_write_failure(
+    es_models: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: pathlib.Path,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    mapping = {"properties": {"foo": {"type": "keyword"}}}
+    utils.load_model(es_models, "foo", mapping)
+    utils.load_model(es_models, "bar", mapping)
+    # The cache directory is under a regular file, so it cannot be created
+    (tmp_path / "file").write_text("")
+    monkeypatch.setenv("GDCMODELS_CACHE_DIR", str(tmp_path / "file" / "cache"))
+
+    models = gdcmodels.get_es_models()
+    assert mapping == models["foo"]["foo"].mappings
+    assert mapping == models["bar"]["bar"].mappings
+
+    # The cache is disabled by the first failure, which is only logged once
+    assert len([r for r in caplog.records if "model cache" in r.getMessage()]) == 1
+    assert extraction._get_cache_dir() is None
+
+
+def test__get_es_models__ignores_corrupt_cache(
+    es_models: pathlib.Path, model_cache: pathlib.Path
+) -> None:
+    mapping = {"properties": {"foo": {"type": "keyword"}}}
+    utils.load_model(es_models, "foo", mapping)
+    _ = gdcmodels.get_es_models(vestigial_included=False)["foo"]["foo"]
+
+    (artifact,) = model_cache.glob("*-base/foo/mappings/foo.pickle")
+    artifact.write_bytes(b"not a pickle")
+
+    models = gdcmodels.get_es_models(vestigial_included=False)
+
+    assert mapping == models["foo"]["foo"].mappings
+
+
+def test__get_es_models__loads_lazily(es_models: pathlib.Path) -> None:
+    mapping = {"properties": {"foo": {"type": "keyword"}}}
+
+    utils.load_model(es_models, "foo", mapping)
+    utils.load_model(es_models, "bar", mapping, doc_type="good")
+    utils.load_model(es_models, "bar", mapping, doc_type="broken")
+    (es_models / "bar" / "broken" / "mapping.yaml").write_text("properties: [")
+
+    models = gdcmodels.get_es_models()
+
+    assert "broken" in models["bar"]
+    assert sorted(models["bar"].keys()) == ["broken", "good"]
+    assert mapping == models["bar"]["good"].mappings
+    assert models["foo"]["foo"] is models["foo"]["foo"]
+
+
+@pytest.mark.parametrize("cache", (False, True))
+def test__get_es_models__parallel_matches_serial(cache: bool) -> None:
+    serial = gdcmodels.get_es_models(cache=cache)
+    parallel = gdcmodels.get_es_models(cache=cache, workers=2)
+
+    assert serial.keys() == parallel.keys()
+
+    for index_name, models in serial.items():
+        assert models.keys() == parallel[index_name].keys()
+
+        for doc_type, model in models.items():
+            assert model.mappings == parallel[index_name][doc_type].mappings
+            assert model.settings == parallel[index_name][doc_type].settings
+
+
+def test__get_es_models__descriptions_shared() -> None:
+    graph = gdcmodels.get_es_models()["gdc_from_graph"]
+    case, file = graph["case"], graph["file"]
+
+    assert case.mappings["_meta"]["descriptions"] is file.mappings["_meta"]["descriptions"]
+    assert case.descriptions is case.mappings["_meta"]["descriptions"]
+
+
+def test__get_es_models__without_descriptions(es_models: pathlib.Path) -> None:
+    mapping = {"properties": {"foo": {"type": "keyword"}}}
+    descriptions = {"foo": "something"}
+
+    utils.load_model(es_models, "foo", mapping, descriptions=descriptions)
+    (es_models / "foo" / "descriptions.yaml").write_text("foo: [")
+
+    model = gdcmodels.get_es_models(descriptions=False)["foo"]["foo"]
+
+    # The (broken) descriptions are never parsed unless accessed
+    assert mapping == model.mappings
+
+    utils.load_model(es_models, "foo", mapping, descriptions=descriptions)
+
+    assert descriptions == model.descriptions
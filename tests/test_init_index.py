@@ -1,13 +1,15 @@
 import contextlib
 import sys
-from typing import Any, Callable, Iterator, NamedTuple, Optional, Sequence
+from typing import Any, Callable, Iterator, Mapping, NamedTuple, Optional, Sequence, Tuple
 
 import elasticsearch
 import pytest
 import yaml
 from typing_extensions import Protocol
 
+import gdcmodels
 from gdcmodels import esmodels, init_index
+from tests import utils
 
 if sys.version_info < (3, 9):
     import importlib_resources as resources
@@ -369,3 +371,264 @@ class TestVizIndices:
     ) -> None:
         """Verify `init_index` can create the visualization indices correctly."""
         validate_index(index, files)
+
+
+@pytest.fixture
+def fake_es(monkeypatch: pytest.MonkeyPatch) -> Callable[..., utils.FakeElasticsearch]:
+    """Create a function making init_index use a stand-in Elasticsearch client."""
+
+    def create(
+        indices: Mapping[str, Sequence[str]] = {}, delay: float = 0.0
+    ) -> utils.FakeElasticsearch:
+        es = utils.FakeElasticsearch(indices, delay)
+        monkeypatch.setattr(init_index, "get_elasticsearch", lambda _: es)
+        return es
+
+    return create
+
+
+def parse_args(*args: str) -> init_index.Arguments:
+    return init_index.get_parser().parse_args(("--host", "localhost", *args))
+
+
+def test_init_index__fetches_state_once(
+    fake_es: Callable[..., utils.FakeElasticsearch], capsys: pytest.CaptureFixture
+) -> None:
+    es = fake_es(delay=0.02)
+    index_names = ("case_set", "file_set", "gene_set", "ssm_set")
+
+    init_index.init_index(
+        parse_args("--index", *index_names, "--alias", *index_names, "--prefix", "test")
+    )
+
+    assert es.indices.requests == {"get_alias": 1, "create": 4, "update_aliases": 1}
+    assert es.indices.indices == {f"test_{name}": {name} for name in index_names}
+    assert es.indices.max_concurrency > 1
+
+    summary = capsys.readouterr().out
+    assert "create test_case_set" in summary
+    assert "total" in summary
+
+
+def test_init_index__skips_existing_indices_and_aliases(
+    fake_es: Callable[..., utils.FakeElasticsearch],
+) -> None:
+    es = fake_es({"test_case_set": [], "other_gene_set": ["gene_set"]})
+
+    init_index.init_index(
+        parse_args(
+            "--index",
+            "case_set",
+            "gene_set",
+            "--alias",
+            "case_set",
+            "gene_set",
+            "--prefix",
+            "test",
+        )
+    )
+
+    # The existing index is aliased, but the existing alias is left untouched
+    assert es.indices.requests == {"get_alias": 1, "create": 1, "update_aliases": 1}
+    assert es.indices.indices == {
+        "test_case_set": {"case_set"},
+        "test_gene_set": set(),
+        "other_gene_set": {"gene_set"},
+    }
+
+
+@pytest.mark.parametrize(("user_input", "deleted"), (("test_case_set", True), ("NO", False)))
+def test_init_index__deletes_confirmed_indices(
+    fake_es: Callable[..., utils.FakeElasticsearch],
+    patch_input: Callable[[str], None],
+    user_input: str,
+    deleted: bool,
+) -> None:
+    es = fake_es({"test_case_set": []})
+    patch_input(user_input)
+
+    init_index.init_index(parse_args("--index", "case_set", "--prefix", "test", "--delete"))
+
+    assert es.indices.requests["delete"] == es.indices.requests["create"] == int(deleted)
+    assert "test_case_set" in es.indices.indices
+
+
+def test_init_index__does_not_alias_graph_indices(
+    fake_es: Callable[..., utils.FakeElasticsearch],
+) -> None:
+    es = fake_es()
+
+    init_index.init_index(
+        parse_args(
+            "--index", "gdc_from_graph", "--alias", "graph", "--prefix", "test", "--workers", "2"
+        )
+    )
+
+    # Too many indices are created for a single alias
+    assert es.indices.requests == {"get_alias": 1, "create": 4}
+    assert set(es.indices.indices) == {
+        f"test_gdc_from_graph_{t}" for t in ("annotation", "case", "file", "project")
+    }
+
+
+def test_init_index__swap(fake_es: Callable[..., utils.FakeElasticsearch]) -> None:
+    es = fake_es({"gdc_r52_case_set": ["case_set"], "gdc_r52_file_set": ["file_set"]})
+
+    init_index.init_index(
+        parse_args(
+            "--index",
+            "case_set",
+            "file_set",
+            "gene_set",
+            "--alias",
+            "case_set",
+            "file_set",
+            "gene_set",
+            "--prefix",
+            "gdc_r53",
+            "--swap",
+        )
+    )
+
+    assert es.indices.requests == {"get_alias": 1, "create": 3, "update_aliases": 1}
+    assert es.indices.actions == [
+        {"remove": {"index": "gdc_r52_case_set", "alias": "case_set"}},
+        {"add": {"index": "gdc_r53_case_set", "alias": "case_set"}},
+        {"remove": {"index": "gdc_r52_file_set", "alias": "file_set"}},
+        {"add": {"index": "gdc_r53_file_set", "alias": "file_set"}},
+        {"add": {"index": "gdc_r53_gene_set", "alias": "gene_set"}},
+    ]
+    assert es.indices.indices["gdc_r52_case_set"] == set()
+    assert es.indices.indices["gdc_r53_case_set"] == {"case_set"}
+
+
+def test_init_index__swap_already_swapped(
+    fake_es: Callable[..., utils.FakeElasticsearch],
+) -> None:
+    es = fake_es({"gdc_r53_case_set": ["case_set"]})
+
+    init_index.init_index(
+        parse_args("--index", "case_set", "--alias", "case_set", "--prefix", "gdc_r53", "--swap")
+    )
+
+    assert es.indices.requests == {"get_alias": 1}
+
+
+@pytest.mark.parametrize(("user_input", "deleted"), (("gdc_r52_case_set", True), ("NO", False)))
+def test_init_index__swap_delete_previous(
+    fake_es: Callable[..., utils.FakeElasticsearch],
+    patch_input: Callable[[str], None],
+    user_input: str,
+    deleted: bool,
+) -> None:
+    es = fake_es({"gdc_r52_case_set": ["case_set"], "gdc_r52_file_set": ["file_set", "other"]})
+    patch_input(user_input)
+
+    init_index.init_index(
+        parse_args(
+            "--index",
+            "case_set",
+            "file_set",
+            "--alias",
+            "case_set",
+            "file_set",
+            "--prefix",
+            "gdc_r53",
+            "--swap",
+            "--delete-previous",
+        )
+    )
+
+    assert es.indices.requests["update_aliases"] == 1
+    assert ("gdc_r52_case_set" not in es.indices.indices) is deleted
+    # The previous index is still aliased by 'other', so it is kept
+    assert es.indices.indices["gdc_r52_file_set"] == {"other"}
+    assert es.indices.indices["gdc_r53_case_set"] == {"case_set"}
+
+
+def test_init_index__delete_previous_requires_swap(
+    fake_es: Callable[..., utils.FakeElasticsearch],
+) -> None:
+    es = fake_es()
+
+    init_index.init_index(
+        parse_args("--index", "case_set", "--prefix", "gdc_r53", "--delete-previous")
+    )
+
+    assert es.indices.requests == {}
+
+
+def test_init_index__bulk_load_profile(fake_es: Callable[..., utils.FakeElasticsearch]) -> None:
+    es = fake_es()
+
+    init_index.init_index(
+        parse_args("--index", "case_set", "--prefix", "gdc_r53", "--bulk-load-profile")
+    )
+
+    settings = es.indices.settings["gdc_r53_case_set"]["index"]
+    assert settings["refresh_interval"] == "-1"
+    assert settings["number_of_replicas"] == 0
+    assert settings["translog"] == {"durability": "async"}
+    # The model settings are left untouched
+    model = gdcmodels.get_es_models()["case_set"]["case_set"]
+    assert "refresh_interval" not in model.settings["index"]
+
+
+def test_init_index__finalize(fake_es: Callable[..., utils.FakeElasticsearch]) -> None:
+    es = fake_es({"gdc_r53_case_set": [], "gdc_r53_file_set": []})
+
+    init_index.init_index(
+        parse_args(
+            "--index",
+            "case_set",
+            "file_set",
+            "gene_set",
+            "--prefix",
+            "gdc_r53",
+            "--finalize",
+            "--force-merge",
+        )
+    )
+
+    # Neither model declares the settings, which are reset to their defaults together
+    assert es.indices.settings_updates == [
+        (
+            "gdc_r53_case_set,gdc_r53_file_set",
+            {
+                "index.refresh_interval": None,
+                "index.number_of_replicas": None,
+                "index.translog.durability": None,
+            },
+        )
+    ]
+    assert es.indices.force_merged == [["gdc_r53_case_set", "gdc_r53_file_set"]]
+    assert es.indices.requests["create"] == 0
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("--finalize", "--delete"),
+        ("--finalize", "--bulk-load-profile"),
+        ("--finalize", "--swap", "--alias", "case_set"),
+        ("--force-merge",),
+    ],
+)
+def test_init_index__finalize_conflicting_arguments(
+    fake_es: Callable[..., utils.FakeElasticsearch], args: Tuple[str, ...]
+) -> None:
+    es = fake_es({"gdc_r53_case_set": []})
+
+    init_index.init_index(parse_args("--index", "case_set", "--prefix", "gdc_r53", *args))
+
+    assert es.indices.requests == {}
+
+
+def test_finalized_settings() -> None:
+    settings = {"index": {"refresh_interval": "30s", "translog": {"durability": "request"}}}
+
+    assert init_index.finalized_settings(settings) == {
+        "index.refresh_interval": "30s",
+        "index.number_of_replicas": None,
+        "index.translog.durability": "request",
+    }
@@ -64,3 +64,45 @@ def test_select_mapping_results(
         expected = expected[part]
 
     assert actual == expected, actual
+
+
+def test_select_mapping__dotted_doc_type(mock_mapper: mapper.ModelMapper) -> None:
+    actual = mock_mapper.select_mapping("bar.multiple")
+
+    assert actual is mock_mapper.mappings["properties"]["bar"]["properties"]["multiple"]
+
+
+def test_select_mapping__walks_mapping_once(
+    mock_mapper: mapper.ModelMapper, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    walks = []
+    walk_mapping = mapper._walk_mapping
+
+    def _walk_mapping(mapping, path="root"):
+        # Only count the walks of the entire mapping, not the recursive calls
+        if path == "root":
+            walks.append(mapping)
+        return walk_mapping(mapping, path)
+
+    monkeypatch.setattr(mapper, "_walk_mapping", _walk_mapping)
+
+    mock_mapper.select_mapping("foo_single")
+    mock_mapper.select_mapping("multiple", "bar")
+    mock_mapper.select_mapping("multiple", "foo")
+
+    assert len(walks) == 1
+
+
+def test_select_mappings(mock_mapper: mapper.ModelMapper) -> None:
+    selectors = {"foo": None, "foo_single": None, "multiple": "bar", "gene": None}
+
+    actual = mock_mapper.select_mappings(selectors)
+
+    assert actual == {d: mock_mapper.select_mapping(d, s) for d, s in selectors.items()}
+    assert actual["gene"] is mock_mapper.mappings
+
+
+@pytest.mark.parametrize("doc_type", ("multiple", "missing"))
+def test_select_mappings__errors(mock_mapper: mapper.ModelMapper, doc_type: str) -> None:
+    with pytest.raises(ValueError):
+        mock_mapper.select_mappings({"foo": None, doc_type: None})
@@ -0,0 +1,122 @@
+import copy
+
+import pytest
+
+import gdcmodels
+from gdcmodels import extraction_utils, mapper, mapping_diff, vestigial
+
+OLD = {
+    "dynamic": "strict",
+    "properties": {
+        "case_id": {"type": "keyword", "copy_to": ["autocomplete"]},
+        "age": {"type": "long"},
+        "files": {
+            "type": "nested",
+            "properties": {"file_id": {"type": "keyword"}, "file_size": {"type": "long"}},
+        },
+    },
+}
+
+NEW = {
+    "dynamic": "false",
+    "properties": {
+        "case_id": {"type": "keyword", "copy_to": ["autocomplete", "other"]},
+        "age": {"type": "integer"},
+        "files": {
+            "type": "nested",
+            "properties": {
+                "file_id": {"type": "keyword", "normalizer": "clinical_normalizer"},
+                "access": {"type": "keyword"},
+            },
+        },
+        "project": {"properties": {"code": {"type": "keyword"}}},
+    },
+}
+
+
+def test_diff_mappings() -> None:
+    diff = mapping_diff.diff_mappings(OLD, NEW)
+
+    assert diff.added == {
+        ("properties", "files", "properties", "file_id", "normalizer"): "clinical_normalizer",
+        ("properties", "files", "properties", "access"): {"type": "keyword"},
+        ("properties", "project"): {"properties": {"code": {"type": "keyword"}}},
+    }
+    assert diff.removed == {("properties", "files", "properties", "file_size"): {"type": "long"}}
+    assert diff.changed == {
+        ("dynamic",): ("strict", "false"),
+        ("properties", "case_id", "copy_to"): (["autocomplete"], ["autocomplete", "other"]),
+        ("properties", "age", "type"): ("long", "integer"),
+    }
+    assert diff
+
+
+def test_diff_mappings__property_paths() -> None:
+    paths = mapping_diff.diff_mappings(OLD, NEW).property_paths()
+
+    assert paths == mapping_diff.PropertyPaths(
+        added=("files.access", "project"),
+        removed=("files.file_size",),
+        changed=("case_id", "age", "files.file_id"),
+    )
+
+
+def test_diff_mappings__attribute_changes() -> None:
+    changes = mapping_diff.diff_mappings(OLD, NEW).attribute_changes()
+
+    assert changes == {
+        "dynamic": ("strict", "false"),
+        "case_id.copy_to": (["autocomplete"], ["autocomplete", "other"]),
+        "age.type": ("long", "integer"),
+        "files.file_id.normalizer": (None, "clinical_normalizer"),
+    }
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    (
+        ({"a": 1}, {"a": True}),
+        ({"a": 1}, {"a": 1.0}),
+        ({"a": {"b": 1}}, {"a": [{"b": 1}]}),
+    ),
+)
+def test_diff_mappings__kinds_of_values(old: dict, new: dict) -> None:
+    assert mapping_diff.diff_mappings(old, new).changed == {("a",): (old["a"], new["a"])}
+
+
+def test_diff_mappings__no_differences() -> None:
+    model = gdcmodels.get_es_models()["case_centric"]["case_centric"]
+
+    diff = mapping_diff.diff_mappings(model.mappings, copy.deepcopy(model.mappings))
+
+    assert diff == mapping_diff.MappingDiff({}, {}, {})
+    assert not diff
+    assert diff.vestigial_delta() == {}
+
+
+def test_vestigial_delta__restores_the_removed_properties() -> None:
+    old = gdcmodels.get_es_models()["case_centric"]["case_centric"].mappings
+    new = copy.deepcopy(old)
+    removed = ["case_id", "diagnoses.treatments", "files.analysis.workflow_type"]
+
+    for path in removed:
+        *parents, name = path.split(".")
+        properties = new["properties"]
+        for parent in parents:
+            properties = properties[parent]["properties"]
+        del properties[name]
+
+    diff = mapping_diff.diff_mappings(old, new)
+    delta = diff.vestigial_delta()
+
+    assert diff.property_paths().removed == tuple(removed)
+    assert vestigial.ITEM_ADDED in delta
+    assert (
+        vestigial.apply_overlay(
+            copy.deepcopy(new),
+            vestigial.load_overlay(extraction_utils.dump_yaml(delta, None)),  # type: ignore
+        )
+        == old
+    )
+    assert vestigial.apply_overlay(copy.deepcopy(new), diff.overlay()) == old
+    assert {p for p, _ in mapper._walk_mapping(old)} > {p for p, _ in mapper._walk_mapping(new)}
@@ -39,3 +39,13 @@ def test_deep_merge_mapping_files(one, two, expected):
 )
 def test_deep_diff_mapping_files(old, new, difference):
     assert mapping_utils.deep_diff_mapping_files(new, old) == difference
+
+
+def test_deep_diff_mapping_files__changed_values():
+    old = {"a": {"type": "keyword", "normalizer": "foo"}, "b": {"type": "long"}}
+    new = {"a": {"type": "text"}}
+
+    assert mapping_utils.deep_diff_mapping_files(new, old) == {
+        "a": {"type": "keyword", "normalizer": "foo"},
+        "b": {"type": "long"},
+    }
@@ -0,0 +1,141 @@
+import json
+import logging
+import pathlib
+import sys
+
+import pytest
+
+import gdcmodels
+from gdcmodels import cli, profiling
+from tests import utils
+
+
+@pytest.fixture
+def models(es_models: pathlib.Path) -> pathlib.Path:
+    utils.load_model(
+        es_models,
+        "foo",
+        {"properties": {"foo": {"type": "keyword"}}},
+        settings={"index.number_of_shards": 1},
+        doc_type="bar",
+        descriptions={"foo": "The foo."},
+        vestigial={"dictionary_item_added": {"root['properties']['old']": {"type": "long"}}},
+    )
+
+    return es_models
+
+
+def test_record__stages(models: pathlib.Path) -> None:
+    with profiling.record() as events:
+        model = gdcmodels.get_es_models(cache=False)["foo"]["bar"]
+
+    assert {(e.doc_type, e.stage) for e in events} == {
+        ("bar", profiling.READ),
+        ("bar", profiling.PARSE),
+        ("bar", profiling.VESTIGIAL),
+        (None, profiling.DESCRIPTIONS),
+        (None, profiling.SETTINGS),
+        (None, profiling.EXPAND_SETTINGS),
+    }
+    assert all(e.index_name == "foo" and e.seconds >= 0 for e in events)
+
+    bytes_read = {e.stage: e.bytes_read for e in events}
+    assert bytes_read[profiling.READ] == (models / "foo/bar/mapping.yaml").stat().st_size
+    assert bytes_read[profiling.PARSE] == 0
+
+    assert model.settings == {"index": {"number_of_shards": 1}}
+
+    # The hook is removed when leaving the context
+    with profiling.record() as other:
+        pass
+
+    gdcmodels.get_es_models(cache=False)["foo"]["bar"]
+
+    assert not other and len(events) == 6
+
+
+def test_record__logging(models: pathlib.Path, caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.DEBUG, logger="gdcmodels.profiling"):
+        gdcmodels.get_es_models(cache=False)["foo"]["bar"]
+
+    assert any("foo/bar parse" in r.getMessage() for r in caplog.records)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 9), reason="tracemalloc.reset_peak is 3.9+")
+def test_stage__peak_memory() -> None:
+    import tracemalloc
+
+    with profiling.record() as events:
+        with profiling.stage("foo", None, profiling.PARSE):
+            pass
+
+        tracemalloc.start()
+
+        try:
+            with profiling.stage("foo", None, profiling.PARSE):
+                _ = [0] * 100_000
+        finally:
+            tracemalloc.stop()
+
+    assert events[0].peak_memory is None
+    assert events[1].peak_memory >= 800_000
+
+
+def test_summarize() -> None:
+    events = [
+        profiling.StageEvent("foo", "a", profiling.READ, 1.0, 10, None),
+        profiling.StageEvent("foo", "b", profiling.READ, 2.0, 20, 5),
+        profiling.StageEvent("foo", None, profiling.SETTINGS, 0.5, 1, 7),
+        profiling.StageEvent("bar", "bar", profiling.PARSE, 0.25, 0, None),
+    ]
+
+    summary = profiling.summarize(events)
+
+    assert summary == {
+        "foo": {
+            "doc_types": 2,
+            "stages": {profiling.READ: 3.0, profiling.SETTINGS: 0.5},
+            "seconds": 3.5,
+            "bytes_read": 31,
+            "peak_memory": 7,
+        },
+        "bar": {
+            "doc_types": 1,
+            "stages": {profiling.PARSE: 0.25},
+            "seconds": 0.25,
+            "bytes_read": 0,
+            "peak_memory": None,
+        },
+    }
+
+    table = profiling.format_table(summary).splitlines()
+
+    assert table[0].split() == [
+        "index",
+        "doc_types",
+        "read",
+        "parse",
+        "settings",
+        "total",
+        "read",
+        "(KiB)",
+        "peak",
+        "(KiB)",
+    ]
+    assert table[1].split()[0] == "foo"
+
+
+def test_cli__profile_load(
+    models: pathlib.Path, tmp_path: pathlib.Path, capsys: pytest.CaptureFixture
+) -> None:
+    report = tmp_path / "report.json"
+
+    cli.main(["profile-load", "--no-vestigial", "--json", str(report)])
+
+    assert capsys.readouterr().out.splitlines()[1].split()[:2] == ["foo", "1"]
+
+    content = json.loads(report.read_text())
+
+    assert content["vestigial_included"] is False
+    assert content["indices"]["foo"]["doc_types"] == 1
+    assert profiling.VESTIGIAL not in {e["stage"] for e in content["events"]}
@@ -0,0 +1,89 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+import gdcmodels
+from gdcmodels import registry
+
+
+@pytest.fixture
+def frozen() -> registry.FrozenDict:
+    return registry.freeze(
+        {"properties": {"foo": {"type": "keyword", "copy_to": ["bar"]}, "bar": {"type": "long"}}}
+    )
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    (
+        lambda m: m.__setitem__("foo", 1),
+        lambda m: m.pop("properties"),
+        lambda m: m.update(foo=1),
+        lambda m: m["properties"].__delitem__("foo"),
+        lambda m: m["properties"]["foo"].setdefault("normalizer", "foo"),
+        lambda m: m["properties"]["foo"]["copy_to"].append("foo"),
+    ),
+)
+def test_freeze__is_immutable(frozen: registry.FrozenDict, mutate) -> None:
+    with pytest.raises(TypeError):
+        mutate(frozen)
+
+
+def test_freeze__behaves_as_dict(frozen: registry.FrozenDict) -> None:
+    expected = {
+        "properties": {"foo": {"type": "keyword", "copy_to": ["bar"]}, "bar": {"type": "long"}}
+    }
+
+    assert frozen == expected
+    assert json.loads(json.dumps(frozen)) == expected
+    assert pickle.loads(pickle.dumps(frozen)) == expected
+    assert copy.copy(frozen) is frozen
+
+
+def test_deepcopy__is_plain(frozen: registry.FrozenDict) -> None:
+    copied = copy.deepcopy(registry.thaw(frozen))
+
+    assert type(copied) is dict
+    assert type(copied["properties"]["foo"]) is dict
+    assert type(copied["properties"]["foo"]["copy_to"]) is list
+
+
+def test_thaw__copy_on_write(frozen: registry.FrozenDict) -> None:
+    thawed = registry.thaw(frozen)
+
+    thawed["properties"]["foo"]["normalizer"] = "clinical_normalizer"
+    thawed["properties"]["foo"]["copy_to"].append("baz")
+    thawed.setdefault("_meta", {})["descriptions"] = {}
+
+    assert "normalizer" not in frozen["properties"]["foo"]
+    assert frozen["properties"]["foo"]["copy_to"] == ["bar"]
+    assert "_meta" not in frozen
+    # untouched branches are still shared with the frozen value
+    assert dict.__getitem__(dict.__getitem__(thawed, "properties"), "bar") is (
+        frozen["properties"]["bar"]
+    )
+
+
+def test_get_models__shared_and_frozen() -> None:
+    models = registry.get_models()
+    expected = gdcmodels.get_es_models()["gdc_from_graph"]["case"]
+    model = models["gdc_from_graph"]["case"]
+
+    assert registry.get_models() is models
+    assert models["gdc_from_graph"]["case"] is model
+    assert model.mappings == expected.mappings
+    assert model.settings == expected.settings
+
+    with pytest.raises(TypeError):
+        model.mappings.pop("_meta")
+
+
+def test_get_models__shares_index_details() -> None:
+    graph = registry.get_models()["gdc_from_graph"]
+    case, file = graph["case"], graph["file"]
+
+    assert case.settings is file.settings
+    assert case.descriptions is file.descriptions
+    assert case.mappings["_meta"]["descriptions"] is case.descriptions
@@ -0,0 +1,124 @@
+import pickle
+from typing import List, Tuple
+
+import pytest
+
+import gdcmodels
+from gdcmodels import mapper, source
+
+MAPPING = {
+    "properties": {
+        "case_id": {"type": "keyword"},
+        "autocomplete": {"type": "keyword", "fields": {"analyzed": {"type": "text"}}},
+        "project": {"properties": {"code": {"type": "keyword"}, "name": {"type": "keyword"}}},
+        "files": {
+            "type": "nested",
+            "properties": {
+                "file_id": {"type": "keyword"},
+                "file_size": {"type": "long"},
+                "access": {"type": "keyword"},
+                "state": {"type": "keyword"},
+                "analysis": {
+                    "properties": {
+                        "workflow": {"type": "keyword"},
+                        "reads": {
+                            "type": "nested",
+                            "properties": {"count": {"type": "long"}, "id": {"type": "keyword"}},
+                        },
+                    }
+                },
+            },
+        },
+    }
+}
+
+
+@pytest.fixture
+def model() -> mapper.ModelMapper:
+    return mapper.ModelMapper("foo", "foo", {}, MAPPING)
+
+
+@pytest.mark.parametrize(
+    ("fields", "includes", "excludes"),
+    (
+        (["case_id"], ["case_id"], []),
+        (["autocomplete.analyzed"], ["autocomplete"], []),
+        (["project.code", "project.name"], ["project"], []),
+        (["project", "project.code"], ["project"], []),
+        (
+            ["files.file_id", "files.file_size", "files.access", "files.state"],
+            ["files"],
+            ["files.analysis"],
+        ),
+        (
+            ["files.file_id", "files.analysis.workflow", "files.analysis.reads.count"],
+            ["files.analysis.reads.count", "files.analysis.workflow", "files.file_id"],
+            [],
+        ),
+        (["case_id", "autocomplete", "project"], ["*"], ["files"]),
+        (["case_id", "autocomplete", "project", "files"], ["*"], []),
+        ([], [], []),
+    ),
+)
+def test_plan_source(
+    model: mapper.ModelMapper, fields: List[str], includes: List[str], excludes: List[str]
+) -> None:
+    plan = model.plan_source(fields)
+
+    assert plan == source.SourcePlan(tuple(includes), tuple(excludes))
+
+
+def test_plan_source__source(model: mapper.ModelMapper) -> None:
+    assert model.plan_source([]).source is False
+    assert model.plan_source(["case_id"]).source == {"includes": ["case_id"]}
+    assert model.plan_source(["case_id", "autocomplete", "project"]).source == {
+        "includes": ["*"],
+        "excludes": ["files"],
+    }
+
+
+def test_plan_source__inner_hits(model: mapper.ModelMapper) -> None:
+    plan = model.plan_source(
+        ["case_id", "files.file_id", "files.analysis.reads.count", "files.analysis.reads.id"],
+        inner_hits=True,
+    )
+
+    assert plan.includes == ("case_id",)
+    assert dict(plan.inner_hits) == {
+        "files": source.SourcePlan(("files.file_id",)),
+        "files.analysis.reads": source.SourcePlan(("files.analysis.reads",)),
+    }
+
+
+def test_plan_source__unknown_field(model: mapper.ModelMapper) -> None:
+    with pytest.raises(ValueError, match="files.missing"):
+        model.plan_source(["case_id", "files.missing"])
+
+
+def test_plan_source__memoized(model: mapper.ModelMapper) -> None:
+    plan = model.plan_source(["project.code", "case_id"])
+
+    # Equivalent sets of fields share the same plan
+    assert model.plan_source(["case_id", "project.code", "case_id"]) is plan
+    assert model.plan_source(["case_id", "project.code", "project"]) is not plan
+    assert model._source_planner.cache_info().hits == 1
+
+
+def test_plan_source__real_model() -> None:
+    model = gdcmodels.get_es_models()["case_centric"]["case_centric"]
+    fields = model.fields()
+    files: Tuple[str, ...] = fields.filter("files.*").paths
+
+    assert model.plan_source(files).includes == ("files",)
+    assert model.plan_source([p for p in files if not p.startswith("files.analysis")]) == (
+        source.SourcePlan(("files",), ("files.analysis",))
+    )
+
+
+def test_plan_source__pickled_model(model: mapper.ModelMapper) -> None:
+    plan = model.plan_source(["case_id"])
+
+    unpickled = pickle.loads(pickle.dumps(model))
+
+    assert unpickled.mappings == model.mappings
+    assert unpickled.plan_source(["case_id"]) == plan
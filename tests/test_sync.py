@@ -3,7 +3,7 @@ from typing import Iterable, Mapping
 import pytest
 
 import gdcmodels
-from gdcmodels import esmodels, mapper
+from gdcmodels import esmodels, mapper, mapping_diff
 from gdcmodels.sync import cli, common
 from gdcmodels.sync.graph import common as graph
 
@@ -80,6 +80,18 @@ def test__normalizer_sync__exclude_properties() -> None:
     assert "normalizer" not in mapping["properties"]["foo"]
 
 
+def test__compute_delta__only_adds_removed_properties() -> None:
+    old_mapping: esmodels.ESMapping = {
+        "properties": {"foo": {"type": "keyword"}, "bar": {"type": "long"}}
+    }
+    new_mapping: esmodels.ESMapping = {"properties": {"foo": {"type": "text"}}}
+
+    delta = cli.compute_delta(new_mapping, old_mapping)
+
+    assert list(delta.vestigial_delta()["dictionary_item_added"]) == ["root['properties']['bar']"]
+    assert delta.property_paths() == mapping_diff.PropertyPaths((), ("bar",), ("foo",))
+
+
 @pytest.mark.parametrize(
     ("field", "substring"),
     (
@@ -0,0 +1,46 @@
+import pathlib
+
+import gdcmodels
+from benchmarks import synthetic
+from gdcmodels import mapper
+
+
+def test_generate__loads_as_a_model(es_models: pathlib.Path) -> None:
+    shape = synthetic.Shape(fields=300, depth=3, nested_ratio=0.5, vestigial=20)
+
+    synthetic.generate(es_models, shape, index_name="foo", doc_type="bar")
+
+    base = gdcmodels.get_es_models(vestigial_included=False, cache=False)["foo"]["bar"]
+    full = gdcmodels.get_es_models(cache=False)["foo"]["bar"]
+
+    base_paths = {p for p, _ in mapper._walk_mapping(base.mappings)}
+    full_paths = {p for p, _ in mapper._walk_mapping(full.mappings)}
+
+    assert len(base_paths) == shape.fields
+    assert len(full_paths - base_paths) == shape.vestigial
+    assert any(p.get("type") == "nested" for _, p in mapper._walk_mapping(base.mappings))
+    assert max(p.count(".") for p in base_paths) <= shape.depth + 1
+    assert base.settings == {"index": {"mapping": {"total_fields": {"limit": 600}}}}
+    assert len(base.descriptions) == sum(
+        "properties" not in p for _, p in mapper._walk_mapping(base.mappings)
+    )
+
+
+def test_build_model__is_deterministic() -> None:
+    shape = synthetic.Shape(fields=100, vestigial=10)
+
+    assert synthetic.build_model(shape, seed=1) == synthetic.build_model(shape, seed=1)
+    assert synthetic.build_model(shape, seed=1) != synthetic.build_model(shape, seed=2)
+
+
+def test_build_documents__match_the_mapping() -> None:
+    from gdcmodels import validation
+
+    mapping, _, _ = synthetic.build_model(synthetic.Shape(fields=200, nested_ratio=0.5))
+    validator = validation.compile_validator(mapping)
+
+    documents = list(synthetic.build_documents(mapping, 3))
+
+    assert len(documents) == 3
+    assert documents == list(synthetic.build_documents(mapping, 3))
+    assert all(validator.validate(d) == [] for d in documents)
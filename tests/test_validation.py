@@ -0,0 +1,196 @@
+import gzip
+import json
+import pathlib
+from typing import Any, List, Optional
+
+import pytest
+
+import gdcmodels
+from gdcmodels import cli, validation
+from tests import utils
+
+MAPPING = {
+    "dynamic": "strict",
+    "properties": {
+        "case_id": {"type": "keyword"},
+        "age": {"type": "integer"},
+        "score": {"type": "float"},
+        "is_ffpe": {"type": "boolean"},
+        "project": {"properties": {"code": {"type": "keyword"}}},
+        "files": {
+            "type": "nested",
+            "properties": {
+                "file_size": {"type": "long"},
+                "tags": {"dynamic": "false", "properties": {"name": {"type": "keyword"}}},
+            },
+        },
+    },
+}
+
+
+@pytest.fixture
+def validator() -> validation.Validator:
+    return validation.compile_validator(MAPPING)
+
+
+@pytest.mark.parametrize(
+    "document",
+    (
+        {},
+        {"case_id": "foo", "age": 1, "score": 1.5, "is_ffpe": True},
+        {"case_id": 1, "age": None, "score": 2, "project": {"code": "TCGA"}},
+        {"files": [{"file_size": 1}, {"file_size": [2, 3], "tags": [{"foo": "bar"}]}]},
+        {"project": [{"code": "foo"}, None], "files": {"file_size": 1}},
+    ),
+)
+def test_validate__valid(validator: validation.Validator, document: dict) -> None:
+    assert validator.validate(document) == []
+
+
+@pytest.mark.parametrize(
+    ("document", "expected"),
+    (
+        ({"missing": 1}, [("missing", validation.UNKNOWN_FIELD)]),
+        ({"project": {"missing": 1}}, [("project.missing", validation.UNKNOWN_FIELD)]),
+        ({"age": "foo", "score": "1.5.0"}, [("age", "type"), ("score", "type")]),
+        ({"age": True, "is_ffpe": "yes"}, [("age", "type"), ("is_ffpe", "type")]),
+        ({"project": "TCGA", "case_id": {"id": 1}}, [("project", "shape"), ("case_id", "shape")]),
+        (
+            {"files": [{"file_size": 1}, {"file_size": [2, "three"], "other": 1}]},
+            [("files.file_size", "type"), ("files.other", validation.UNKNOWN_FIELD)],
+        ),
+    ),
+)
+def test_validate__errors(
+    validator: validation.Validator, document: dict, expected: List[Any]
+) -> None:
+    assert [(e.path, e.kind) for e in validator.validate(document)] == expected
+
+
+def test_validate__coerce() -> None:
+    document = {"age": "1", "score": "1.5", "is_ffpe": "true"}
+
+    assert validation.compile_validator(MAPPING).validate(document) == []
+    assert [
+        e.path for e in validation.compile_validator(MAPPING, coerce=False).validate(document)
+    ] == [
+        "age",
+        "score",
+        "is_ffpe",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("value", "valid"),
+    ((1.5, True), ("1.5", True), ("-2.0", True), ("nan", False), ("inf", False), (1e400, False)),
+)
+def test_validate__coerce_integer_fractions(value: Any, valid: bool) -> None:
+    # elasticsearch truncates the fraction of the numbers given for integer fields
+    assert (validation.compile_validator(MAPPING).validate({"age": value}) == []) is valid
+    assert validation.compile_validator(MAPPING, coerce=False).validate({"age": value})
+
+
+def test_validate_ndjson(validator: validation.Validator) -> None:
+    lines = [json.dumps({"age": i if i % 7 else "foo"}) for i in range(1, 50)]
+    lines[10] = "{not json"
+    lines.insert(20, "")
+
+    report = validation.validate_ndjson(lines, MAPPING, batch_size=8)
+
+    assert report.documents == 49
+    assert report.invalid_documents == 8
+    # Line numbers count the blank line too
+    assert report.invalid == [7, 11, 14, 22, 29, 36, 43, 50]
+    assert report.errors == {("age", "type"): 7, ("", "json"): 1}
+    assert not report.valid
+    assert validation.validate_ndjson(lines, MAPPING, batch_size=8, workers=2) == report
+
+
+@pytest.mark.parametrize("workers", (None, 2))
+def test_validate_ndjson__max_invalid(workers: Optional[int]) -> None:
+    lines = [json.dumps({"age": "foo"})] * 50
+
+    report = validation.validate_ndjson(
+        lines, MAPPING, batch_size=8, workers=workers, max_invalid=10
+    )
+
+    # Every invalid document is counted, but only the first line numbers are kept
+    assert report.invalid_documents == 50
+    assert report.invalid == list(range(1, 11))
+    assert report.errors == {("age", "type"): 50}
+    assert not report.valid
+
+
+def test_validate_ndjson__real_model() -> None:
+    model = gdcmodels.get_es_models()["case_centric"]["case_centric"]
+    lines = [
+        json.dumps({"case_id": "foo", "diagnoses": [{"treatments": [{"treatment_type": "x"}]}]}),
+        json.dumps({"case_id": "foo", "diagnoses": "bar"}),
+    ]
+
+    report = validation.validate_ndjson(lines, model.mappings)
+
+    assert report.invalid == [2]
+    assert report.errors == {("diagnoses", "shape"): 1}
+
+
+def test_cli__validate(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture) -> None:
+    documents = tmp_path / "documents.ndjson.gz"
+    report = tmp_path / "report.json"
+
+    with gzip.open(documents, "wt") as f:
+        f.write('{"case_id": "foo"}\n{"case_id": "foo", "unknown": 1}\n')
+
+    with pytest.raises(SystemExit) as e:
+        cli.main(["validate", "--index", "case_centric", "--json", str(report), str(documents)])
+
+    assert e.value.code == 1
+    assert "2 documents" in capsys.readouterr().out
+    assert json.loads(report.read_text()) == {
+        "documents": 2,
+        "invalid": 1,
+        "invalid_lines": [2],
+        "errors": [{"path": "unknown", "kind": "unknown_field", "count": 1}],
+    }
+
+
+def test_cli__validate__without_vestigial(
+    es_models: pathlib.Path, tmp_path: pathlib.Path, capsys: pytest.CaptureFixture
+) -> None:
+    mapping = {"dynamic": "strict", "properties": {"case_id": {"type": "keyword"}}}
+    vestigial = {"dictionary_item_added": {"root['properties']['old']": {"type": "keyword"}}}
+    utils.load_model(es_models, "foo", mapping, vestigial=vestigial)
+    documents = tmp_path / "documents.ndjson"
+    documents.write_text('{"case_id": "foo", "old": "x"}\n')
+
+    # init_index creates the indices without the vestigial properties, which are rejected
+    with pytest.raises(SystemExit) as e:
+        cli.main(["validate", "--index", "foo", str(documents)])
+
+    assert e.value.code == 1
+    assert "unknown_field" in capsys.readouterr().out
+
+    cli.main(["validate", "--index", "foo", "--vestigial", str(documents)])
+
+    assert "0 invalid" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    ("args", "message"),
+    (
+        (["--index", "missing"], "unknown index 'missing', expected one of: case_centric"),
+        (["--index", "gdc_from_graph"], "expected one of (with --doc-type): annotation, case"),
+        (["--index", "gdc_from_graph", "--doc-type", "missing"], "unknown doc type 'missing'"),
+    ),
+)
+def test_cli__validate__unknown_model(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture, args: List[str], message: str
+) -> None:
+    documents = tmp_path / "documents.ndjson"
+    documents.write_text("{}\n")
+
+    with pytest.raises(SystemExit) as e:
+        cli.main(["validate", *args, str(documents)])
+
+    assert e.value.code == 2
+    assert message in capsys.readouterr().err
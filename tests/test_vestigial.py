@@ -0,0 +1,71 @@
+import copy
+
+import deepdiff
+import pytest
+import yaml
+
+from gdcmodels import extraction_utils, vestigial
+
+MAPPING = {
+    "properties": {
+        "foo": {"type": "keyword"},
+        "bar": {"properties": {"baz": {"type": "long"}}},
+    }
+}
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    (
+        ("root", ()),
+        ("root['properties']", ("properties",)),
+        ("root['properties']['foo.bar']", ("properties", "foo.bar")),
+        ("""root["it's"][0]""", ("it's", 0)),
+    ),
+)
+def test_parse_path(path: str, expected: tuple) -> None:
+    assert vestigial.parse_path(path) == expected
+    assert vestigial.parse_path(vestigial.format_path(expected)) == expected
+
+
+@pytest.mark.parametrize("path", ("properties", "root[properties]", "root['a']x"))
+def test_parse_path__invalid(path: str) -> None:
+    with pytest.raises(ValueError):
+        vestigial.parse_path(path)
+
+
+def test_apply_overlay__matches_deepdiff() -> None:
+    delta = {
+        vestigial.ITEM_ADDED: {
+            "root['properties']['vestigial']": {"properties": {"id": {"type": "keyword"}}},
+            "root['properties']['bar']['properties']['qux']": {"type": "double"},
+        }
+    }
+    content = yaml.safe_dump(delta)
+
+    expected = copy.deepcopy(MAPPING)
+    expected += deepdiff.Delta(content, deserializer=extraction_utils.load_yaml)
+
+    actual = vestigial.apply_overlay(copy.deepcopy(MAPPING), vestigial.load_overlay(content))
+
+    assert actual == expected
+
+
+def test_apply_overlay__skips_missing_parent() -> None:
+    overlay = vestigial.load_overlay(
+        yaml.safe_dump({vestigial.ITEM_ADDED: {"root['missing']['foo']": {"type": "long"}}})
+    )
+
+    assert vestigial.apply_overlay(copy.deepcopy(MAPPING), overlay) == MAPPING
+
+
+@pytest.mark.parametrize("content", ("", "--- {}\n"))
+def test_load_overlay__empty(content: str) -> None:
+    assert vestigial.load_overlay(content) == ()
+
+
+def test_load_overlay__unsupported() -> None:
+    content = yaml.safe_dump({"values_changed": {"root['foo']": {"new_value": 1}}})
+
+    with pytest.raises(vestigial.UnsupportedOverlayError):
+        vestigial.load_overlay(content)
@@ -1,5 +1,10 @@
+import collections
+import contextlib
+import fnmatch
 import pathlib
-from typing import Optional
+import threading
+import time
+from typing import Any, Counter, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 import yaml
 
@@ -43,3 +48,125 @@ def load_model(
     if descriptions is not None:
         with open(index_dir / "descriptions.yaml", "w+") as f:
             yaml.safe_dump(descriptions, f)
+
+
+class FakeIndicesClient:
+    """A stand-in for the indices client, recording the requests made to it.
+
+    Attributes:
+        indices: The aliases of every index.
+        mappings: The mappings of every index.
+        settings: The settings of every index, as created or given.
+        requests: The number of requests made per method.
+    """
+
+    def __init__(
+        self,
+        indices: Mapping[str, Sequence[str]],
+        delay: float,
+        live: Mapping[str, Mapping[str, Any]],
+    ) -> None:
+        self.indices = {index: set() for index in live}
+        self.indices.update({index: set(aliases) for index, aliases in indices.items()})
+        self.mappings = {index: details.get("mappings", {}) for index, details in live.items()}
+        self.settings = {index: details.get("settings", {}) for index, details in live.items()}
+        self.requests: Counter[str] = collections.Counter()
+        self.fetched: List[Dict[str, Any]] = []
+        self.actions: List[Dict[str, Any]] = []
+        self.settings_updates: List[Tuple[str, Dict[str, Any]]] = []
+        self.force_merged: List[Any] = []
+        self.concurrency = 0
+        self.max_concurrency = 0
+        self._delay = delay
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _request(self, name: str) -> Iterator[None]:
+        with self._lock:
+            self.requests[name] += 1
+            self.concurrency += 1
+            self.max_concurrency = max(self.max_concurrency, self.concurrency)
+
+        try:
+            time.sleep(self._delay)
+            yield
+        finally:
+            with self._lock:
+                self.concurrency -= 1
+
+    def exists(self, index: str) -> bool:
+        with self._request("exists"):
+            return index in self.indices
+
+    def get(self, index: str, flat_settings: bool = False) -> Dict[str, Any]:
+        # NOTE: the settings are returned as given, flat or not
+        with self._request("get"):
+            self.fetched.append({"index": index, "flat_settings": flat_settings})
+
+            return {
+                name: {
+                    "aliases": {a: {} for a in aliases},
+                    "mappings": self.mappings.get(name, {}),
+                    "settings": self.settings.get(name, {}),
+                }
+                for name, aliases in self.indices.items()
+                if fnmatch.fnmatch(name, index)
+            }
+
+    def get_alias(self) -> Dict[str, Any]:
+        with self._request("get_alias"):
+            return {
+                i: {"aliases": {a: {} for a in aliases}} for i, aliases in self.indices.items()
+            }
+
+    def create(self, index: str, settings: Any, mappings: Any) -> None:
+        with self._request("create"):
+            assert index not in self.indices, f"{index} already exists"
+            self.indices[index] = set()
+            self.mappings[index] = mappings
+            self.settings[index] = settings
+
+    def delete(self, index: str) -> None:
+        with self._request("delete"):
+            del self.indices[index]
+
+    def put_settings(self, body: Dict[str, Any], index: str) -> None:
+        with self._request("put_settings"):
+            self.settings_updates.append((index, body))
+
+    def forcemerge(self, index: Any, max_num_segments: int) -> None:
+        with self._request("forcemerge"):
+            self.force_merged.append(index)
+
+    def update_aliases(self, body: Dict[str, Any]) -> None:
+        with self._request("update_aliases"):
+            self.actions.extend(body["actions"])
+
+            for action in body["actions"]:
+                ((kind, details),) = action.items()
+                if kind == "add":
+                    self.indices[details["index"]].add(details["alias"])
+                elif kind == "remove":
+                    self.indices[details["index"]].remove(details["alias"])
+                elif kind == "remove_index":
+                    del self.indices[details["index"]]
+
+
+class FakeElasticsearch:
+    """A stand-in for the elasticsearch client, see FakeIndicesClient."""
+
+    def __init__(
+        self,
+        indices: Mapping[str, Sequence[str]] = {},
+        delay: float = 0.0,
+        live: Mapping[str, Mapping[str, Any]] = {},
+    ) -> None:
+        """Create the client.
+
+        Args:
+            indices: The aliases of the existing indices.
+            delay: The seconds each request takes.
+            live: The mappings and settings of existing indices, as the get index API
+                returns them.
+        """
+        self.indices = FakeIndicesClient(indices, delay, live)